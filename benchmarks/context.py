@@ -0,0 +1,79 @@
+"""
+Compare findig's contextvars-backed request context against werkzeug's Local.
+
+Usage: python -m benchmarks.context [--accesses N ...] [--number N]
+
+Each simulated request sets up the context variables that findig sets for a
+request, reads them N times through both the context object and its
+proxies (as an attribute-access-heavy handler would), and then tears the
+context down: with LocalManager.cleanup() for werkzeug's Local, and with
+RequestContext.pop() for findig's.
+"""
+
+import argparse
+import timeit
+
+from werkzeug.local import Local, LocalManager
+
+from findig.context import RequestContext
+
+
+class Request:
+    method = "GET"
+
+
+def make_request(ctx, start, end, accesses):
+    request = ctx('request')
+    resource = ctx('resource')
+
+    def run():
+        token = start()
+        ctx.app = object()
+        ctx.request = Request()
+        ctx.resource = object()
+        ctx.url_values = {'id': 1}
+
+        for _ in range(accesses):
+            ctx.url_values
+            ctx.resource
+            request.method
+            resource.__class__
+
+        end(token)
+
+    return run
+
+
+def bench_local(accesses, number):
+    ctx = Local()
+    manager = LocalManager([ctx])
+    run = make_request(ctx, lambda: None, lambda token: manager.cleanup(),
+                       accesses)
+    return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+def bench_context(accesses, number):
+    ctx = RequestContext('findig_benchmark')
+    run = make_request(ctx, ctx.push, ctx.pop, accesses)
+    return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--accesses", type=int, nargs="+",
+                        default=[0, 10, 100])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("{:>10} {:>14} {:>20} {:>8}".format(
+        "accesses", "Local (us)", "RequestContext (us)", "speedup"))
+
+    for accesses in args.accesses:
+        local = bench_local(accesses, args.number)
+        context = bench_context(accesses, args.number)
+        print("{:>10} {:>14.2f} {:>20.2f} {:>7.1f}x".format(
+            accesses, local * 1e6, context * 1e6, local / context))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the generic (in-memory) data set views at several data sizes.
+
+Usage: python -m benchmarks.datasets [--sizes N ...] [--number N]
+
+Each query is run over an in-memory data set of records, both through the
+query views that ``filtered()``, ``sorted()`` and ``limit()`` return, and
+through the plain views stacked on top of each other (a full sort followed
+by a slice, and so on), reporting the time per query and the peak memory
+that it used.
+"""
+
+import argparse
+import random
+import timeit
+import tracemalloc
+
+from findig.tools.dataset import (AbstractDataSet, AbstractRecord,
+                                  DataSetSlice, FilteredDataSet,
+                                  OrderedDataSet)
+
+
+class MemoryRecord(AbstractRecord):
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class MemorySet(AbstractDataSet):
+    def __init__(self, size):
+        rand = random.Random(size)
+        self.items = [
+            {'id': i, 'score': rand.random(), 'team': rand.randrange(100)}
+            for i in range(size)
+        ]
+
+    def __iter__(self):
+        for item in self.items:
+            yield MemoryRecord(item)
+
+
+def top_20(data):
+    return data.sorted('score', descending=True).limit(20)
+
+
+def top_20_plain(data):
+    return DataSetSlice(OrderedDataSet(data, 'score', descending=True), 0, 20)
+
+
+def page_5(data):
+    return data.sorted('score').limit(20, 80)
+
+
+def page_5_plain(data):
+    return DataSetSlice(OrderedDataSet(data, 'score'), 80, 100)
+
+
+def first_matches(data):
+    return data.filtered(team=7).limit(10)
+
+
+def first_matches_plain(data):
+    return DataSetSlice(FilteredDataSet(data, team=7), 0, 10)
+
+
+#: (name, query, query over the plain views)
+queries = [
+    ("sorted+limit", top_20, top_20_plain),
+    ("sorted+page", page_5, page_5_plain),
+    ("filtered+limit", first_matches, first_matches_plain),
+]
+
+
+def bench(query, data, number):
+    def run():
+        for _ in query(data):
+            pass
+
+    best = min(timeit.repeat(run, number=number, repeat=3)) / number
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 10000, 100000])
+    parser.add_argument("--number", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:<15} {:>8} {:>12} {:>12} {:>8} {:>11} {:>11}".format(
+        "query", "size", "plain (ms)", "query (ms)", "speedup",
+        "plain KiB", "query KiB"))
+
+    for size in args.sizes:
+        data = MemorySet(size)
+        for name, query, plain_query in queries:
+            plain, plain_mem = bench(plain_query, data, args.number)
+            fast, fast_mem = bench(query, data, args.number)
+            print("{:<15} {:>8} {:>12.2f} {:>12.2f} {:>7.1f}x {:>11.0f} "
+                  "{:>11.0f}".format(name, size, plain * 1e3, fast * 1e3,
+                                     plain / fast, plain_mem / 1024,
+                                     fast_mem / 1024))
+
+
+if __name__ == "__main__":
+    main()
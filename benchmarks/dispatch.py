@@ -0,0 +1,315 @@
+"""
+Benchmark findig's request dispatch pipeline at the HTTP (WSGI) level.
+
+Usage: python -m benchmarks.dispatch [--requests N] [--only NAME ...]
+                                     [--json FILE] [--compare FILE]
+                                     [--threshold FRACTION]
+
+Each scenario builds an app and drives its WSGI callable in-process with
+the same request over and over, reporting requests per second, latency
+percentiles and memory allocated per request. The scenarios cover the
+plain and JSON apps, plain and lazy resources, collections with item URLs,
+and apps with the validator, protector and counter tools attached.
+
+``--json FILE`` saves the results in a machine-readable form, and
+``--compare FILE`` compares the results against a file saved that way: any
+scenario whose throughput drops (or whose p99 latency grows) by more than
+``--threshold`` is flagged, and the command exits with status 1.
+"""
+
+from collections import namedtuple
+from io import BytesIO
+from time import perf_counter
+import argparse
+import base64
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+
+from werkzeug.test import EnvironBuilder
+
+import findig
+from findig.json import App as JSONApp
+from findig.tools.counter import Counter
+from findig.tools.memory import MemorySet
+from findig.tools.protector import BasicProtector
+from findig.tools.validator import Validator
+
+
+Scenario = namedtuple('Scenario', 'name description setup')
+
+#: Registered scenarios, in the order that they're run.
+scenarios = []
+
+
+def scenario(description):
+    def decorator(setup):
+        name = setup.__name__.replace('_', '-')
+        scenarios.append(Scenario(name, description, setup))
+        return setup
+    return decorator
+
+
+def make_tasks(count):
+    return MemorySet(
+        {'id': i, 'title': "Task {}".format(i), 'done': i % 2 == 0}
+        for i in range(count)
+    )
+
+
+@scenario("findig.App, plain resource returning text")
+def app_plain():
+    app = findig.App()
+
+    @app.route("/hello/<name>")
+    def hello(name):
+        return "Hello, {}!".format(name)
+
+    return app, {'path': "/hello/world"}
+
+
+@scenario("findig.json.App, plain resource returning a dict")
+def json_plain():
+    app = JSONApp()
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        return {'id': id, 'title': "An item", 'tags': ["a", "b", "c"]}
+
+    return app, {'path': "/items/7"}
+
+
+@scenario("findig.json.App, lazy resource over an in-memory data set")
+def json_lazy():
+    app = JSONApp()
+    data = make_tasks(100)
+
+    @app.route("/tasks/<int:id>")
+    @app.resource(lazy=True)
+    def task(id):
+        return data.fetch(id=id)
+
+    return app, {'path': "/tasks/50"}
+
+
+@scenario("findig.json.App, collection of 100 items with include_urls")
+def json_collection_urls():
+    app = JSONApp()
+    data = make_tasks(100)
+
+    @app.route("/tasks/<int:id>")
+    @app.resource(lazy=True)
+    def task(id):
+        return data.fetch(id=id)
+
+    @app.route("/tasks/")
+    @task.collection(lazy=True, include_urls=True)
+    def tasks():
+        return data
+
+    return app, {'path': "/tasks/"}
+
+
+@scenario("findig.json.App, PUT validated by a Validator")
+def json_validator():
+    app = JSONApp()
+    validator = Validator(app)
+    store = {}
+
+    @validator.enforce(id=int, title=str, tags=[str])
+    @app.route("/items/<int:id>")
+    def item(id):
+        return store
+
+    @item.model("write")
+    def write_item(data, id):
+        store.update(data)
+
+    body = json.dumps({'id': "7", 'title': "An item", 'tags': ["a", "b"]})
+    return app, {'path': "/items/7", 'method': "PUT", 'data': body,
+                 'content_type': "application/json"}
+
+
+@scenario("findig.json.App, resource guarded by a BasicProtector")
+def json_protector():
+    app = JSONApp()
+    protector = BasicProtector(app, auth_func=lambda u, p: p == "secret")
+
+    @protector.guard
+    @app.route("/items/<int:id>")
+    def item(id):
+        return {'id': id, 'user': protector.authenticated_user}
+
+    credentials = base64.b64encode(b"user:secret").decode()
+    return app, {'path': "/items/7",
+                 'headers': {'Authorization': "Basic " + credentials}}
+
+
+@scenario("findig.json.App, with a Counter attached")
+def json_counter():
+    app = JSONApp()
+    counter = Counter(app)
+    counter.partition('method', lambda request: request.method)
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        return {'id': id}
+
+    return app, {'path': "/items/7"}
+
+
+def make_caller(app, request_args):
+    builder = EnvironBuilder(**request_args)
+    environ = builder.get_environ()
+    body = environ['wsgi.input'].read()
+    builder.close()
+    statuses = [None]
+
+    def start_response(status, headers, exc_info=None):
+        statuses[0] = status
+
+    def call():
+        env = dict(environ)
+        env['wsgi.input'] = BytesIO(body)
+        app_iter = app(env, start_response)
+        try:
+            for _ in app_iter:
+                pass
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    # Make sure the scenario works, and warm up any caches
+    call()
+    if not statuses[0].startswith(("2", "3")):
+        raise RuntimeError("Request failed: {}".format(statuses[0]))
+    return call
+
+
+def percentile(ordered, fraction):
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(call, requests):
+    for _ in range(min(requests // 10, 200)):
+        call()
+
+    latencies = []
+    gc.collect()
+    start = perf_counter()
+    for _ in range(requests):
+        t = perf_counter()
+        call()
+        latencies.append(perf_counter() - t)
+    total = perf_counter() - start
+
+    latencies.sort()
+    result = {
+        'requests': requests,
+        'rps': requests / total,
+        'mean_us': total / requests * 1e6,
+        'p50_us': percentile(latencies, 0.5) * 1e6,
+        'p90_us': percentile(latencies, 0.9) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+    }
+    result.update(measure_allocations(call, min(requests, 500)))
+    return result
+
+
+def measure_allocations(call, requests):
+    # Memory allocated while handling each request (its high-water
+    # mark above what was already allocated), and the number of memory
+    # blocks left allocated afterwards.
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        allocated = 0
+        for _ in range(requests):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            call()
+            allocated += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+
+    return {
+        'alloc_kib': allocated / requests / 1024,
+        'retained_blocks': (sys.getallocatedblocks() - blocks) / requests,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline, and return a list of regressions
+    as human-readable strings.
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+
+        if result['rps'] < old['rps'] * (1 - threshold):
+            regressions.append("{}: throughput {:.0f} -> {:.0f} req/s".format(
+                name, old['rps'], result['rps']))
+        if result['p99_us'] > old['p99_us'] * (1 + threshold):
+            regressions.append("{}: p99 latency {:.1f} -> {:.1f} us".format(
+                name, old['p99_us'], result['p99_us']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        choices=[s.name for s in scenarios])
+    parser.add_argument("--json", metavar="FILE",
+                        help="save the results as JSON")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare against results saved with --json")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print("{:<22} {:>10} {:>9} {:>9} {:>9} {:>10} {:>9}".format(
+        "scenario", "req/s", "p50 us", "p90 us", "p99 us", "alloc KiB",
+        "retained"))
+
+    results = {}
+    for s in scenarios:
+        if args.only and s.name not in args.only:
+            continue
+
+        app, request_args = s.setup()
+        result = results[s.name] = measure(make_caller(app, request_args),
+                                           args.requests)
+        print("{:<22} {rps:>10.0f} {p50_us:>9.1f} {p90_us:>9.1f} "
+              "{p99_us:>9.1f} {alloc_kib:>10.1f} {retained_blocks:>9.2f}"
+              .format(s.name, **result))
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({
+                'findig': findig.__version__,
+                'python': platform.python_version(),
+                'results': results,
+            }, fh, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)['results']
+
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against {}".format(args.compare))
+
+
+if __name__ == "__main__":
+    main()
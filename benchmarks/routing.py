@@ -0,0 +1,76 @@
+"""
+Compare URL matching with werkzeug's Map against findig's IndexedMap.
+
+Usage: python -m benchmarks.routing [--resources N ...] [--number N]
+
+The generated URL map has five rules per resource (a collection, an item,
+and a few sub-resources); each map is asked to match paths that are spread
+evenly across the rule list.
+"""
+
+import argparse
+import random
+import timeit
+
+from werkzeug.routing import Map, Rule
+
+from findig.routing import IndexedMap
+
+
+def make_rules(resources):
+    for i in range(resources):
+        base = "/api/v1/resource{}".format(i)
+        yield Rule(base, endpoint="list{}".format(i))
+        yield Rule(base + "/<int:id>", endpoint="item{}".format(i))
+        yield Rule(base + "/<int:id>/history", endpoint="history{}".format(i))
+        yield Rule(base + "/<int:id>/tags/<tag>", endpoint="tag{}".format(i))
+        yield Rule(base + "/search/<path:query>",
+                   endpoint="search{}".format(i))
+
+
+def make_paths(resources, count=200):
+    rand = random.Random(resources)
+    templates = [
+        "/api/v1/resource{}",
+        "/api/v1/resource{}/17",
+        "/api/v1/resource{}/17/history",
+        "/api/v1/resource{}/17/tags/red",
+        "/api/v1/resource{}/search/a/b",
+    ]
+    return [rand.choice(templates).format(rand.randrange(resources))
+            for _ in range(count)]
+
+
+def bench(map_cls, resources, paths, number):
+    adapter = map_cls(list(make_rules(resources))).bind("localhost")
+    adapter.match(paths[0])  # sort (and index) the rules up front
+
+    def run():
+        for path in paths:
+            adapter.match(path)
+
+    best = min(timeit.repeat(run, number=number, repeat=3))
+    return best / (number * len(paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resources", type=int, nargs="+",
+                        default=[10, 100, 1000])
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    print("{:>10} {:>8} {:>14} {:>14} {:>8}".format(
+        "resources", "rules", "Map (us)", "IndexedMap (us)", "speedup"))
+
+    for resources in args.resources:
+        paths = make_paths(resources)
+        plain = bench(Map, resources, paths, args.number)
+        indexed = bench(IndexedMap, resources, paths, args.number)
+        print("{:>10} {:>8} {:>14.2f} {:>14.2f} {:>7.1f}x".format(
+            resources, resources * 5, plain * 1e6, indexed * 1e6,
+            plain / indexed))
+
+
+if __name__ == "__main__":
+    main()
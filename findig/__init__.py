@@ -6,17 +6,25 @@ and is a WSGI callable that can be passed to any WSGI complaint server.
 
 """
 
-from contextlib import contextmanager, ExitStack
+from asyncio import CancelledError
+from contextlib import (asynccontextmanager, contextmanager, AsyncExitStack,
+                        ExitStack)
+from functools import partial
+from inspect import isasyncgenfunction
 from os.path import join, dirname
 from threading import Lock
 import traceback
 
-from werkzeug.local import LocalManager
 from werkzeug.routing import Map
 from werkzeug.wrappers import BaseResponse
+from werkzeug.wsgi import ClosingIterator
 
+from findig.asgi import (make_environ, read_body, run_sync, send_response,
+                         ThreadedContext)
 from findig.context import ctx
 from findig.dispatcher import Dispatcher
+from findig.resource import Collection, Resource
+from findig.timing import RequestTimer, timed
 from findig.wrappers import Request
 
 
@@ -29,8 +37,15 @@ with open(join(dirname(__file__), "VERSION.txt")) as fh:
 class App(Dispatcher):
     #: The class used to wrap WSGI environments by this App instance.
     request_class = Request
-    # This is used internally to track and clean up context variables
-    local_manager = LocalManager()
+
+    #: The class of the URL map that is built from the app's routes. It
+    #: can be replaced by :class:`findig.routing.IndexedMap` to speed up
+    #: URL matching for apps with many routes.
+    url_map_class = Map
+
+    #: If ``True``, the time taken by each phase of a request is sent back
+    #: in a ``Server-Timing`` response header. See :mod:`findig.timing`.
+    server_timing = False
 
     def __init__(self, autolist=False):
         """
@@ -44,10 +59,11 @@ class App(Dispatcher):
         """
         super(App, self).__init__()
 
-        self.local_manager.locals.append(ctx)
         self.context_hooks = []
+        self.lazy_context_hooks = []
         self.cleanup_hooks = []
         self.startup_hooks = []
+        self.timing_subscribers = []
         self._startup_hook_lock = Lock()
         self._startup_hooks_run = False
 
@@ -56,7 +72,7 @@ class App(Dispatcher):
         if autolist:
             self.route(self.iter_resources, "/")
 
-    def context(self, func):
+    def context(self, func=None, lazy=False):
         """
         Register a request context manager for the application.
 
@@ -90,9 +106,43 @@ class App(Dispatcher):
             >>> items
             []
 
+        :param lazy: If ``True``, the context manager isn't entered at the
+            beginning of the request context. Instead, it is entered the
+            first time its value is read from :data:`findig.context.ctx`,
+            and is only exited if it was entered. This is useful for
+            expensive values that many requests do not use, like database
+            sessions. A lazy context manager should always yield a value.
+
+        Under ASGI (see :meth:`asgi`), a request context manager may also
+        be an asynchronous generator function (``async def`` with
+        ``yield``). Such context managers can't be lazy, and can't be used
+        by the app as a WSGI application.
+
+        This method can also be used as a decorator factory::
+
+            @app.context(lazy=True)
+            def connection():
+                conn = open_connection()
+                yield conn
+                conn.close()
+
         """
-        self.context_hooks.append(contextmanager(func))
-        return func
+        def decorator(func):
+            if isasyncgenfunction(func):
+                if lazy:
+                    raise ValueError("Lazy request context managers can't "
+                                     "be asynchronous.")
+                self.context_hooks.append(asynccontextmanager(func))
+            elif lazy:
+                self.lazy_context_hooks.append(contextmanager(func))
+            else:
+                self.context_hooks.append(contextmanager(func))
+            return func
+
+        if func is not None:
+            return decorator(func)
+        else:
+            return decorator
 
     def cleanup_hook(self, func):
         """
@@ -110,14 +160,37 @@ class App(Dispatcher):
         self.startup_hooks.append(func)
         return func
 
-    def __cleanup(self):
+    def timing_subscriber(self, func):
+        """
+        Register a function that receives the timings for each request in
+        the application.
+
+        The function is called at the end of every request with a list of
+        :class:`findig.timing.Timing` tuples. Registering a subscriber
+        turns timing on for the application; see :mod:`findig.timing`.
+        """
+        self.timing_subscribers.append(func)
+        return func
+
+    def __cleanup(self, token):
         for hook in self.cleanup_hooks:
             try:
                 hook()
             except:
                 pass
         else:
-            self.local_manager.cleanup()
+            timer = ctx.timer
+            if timer is not None:
+                for subscriber in self.timing_subscribers:
+                    try:
+                        subscriber(timer.timings)
+                    except Exception:
+                        pass
+            ctx.pop(token)
+
+    @staticmethod
+    def __enter_lazy(stack, hook):
+        return stack.enter_context(hook())
 
     def __run_startup_hooks(self):
         if not self._startup_hooks_run:
@@ -142,33 +215,143 @@ class App(Dispatcher):
 
         """
         self.__run_startup_hooks()
+        token = self.__start_context(environ)
 
-        ctx.app = self
-        ctx.url_adapter = adapter = self.url_map.bind_to_environ(environ)
+        context = ExitStack()
+        context.callback(self.__cleanup, token)
+        self.__enter_context_hooks(context)
+
+        # Lazy context managers are entered into their own exit stack when
+        # their values are first read, which is exited along with the
+        # request context.
+        if self.lazy_context_hooks:
+            self.__set_lazy_hooks(context.enter_context(ExitStack()))
+        return context
 
-        # ALWAYS set this after adapter
-        ctx.request = self.request_class(environ)
+    def dispatch_subrequest(self, environ):
+        """
+        Dispatch a sub-request of the current request, and return its
+        response.
 
-        rule, url_values = adapter.match(return_rule=True)
-        dispatcher = self  # FIXME: self.get_dispatcher(rule)
+        :param environ: A WSGI environment for the sub-request.
 
-        # Set up context variables
-        ctx.url_values = url_values
-        ctx.dispatcher = dispatcher
-        ctx.resource = dispatcher.get_resource(rule)
+        The sub-request gets a request context of its own, which ends
+        before this method returns (so the response body is generated
+        up-front). Lazy context values are shared with the current request:
+        each lazy context manager is entered at most once for a request and
+        all of its sub-requests, and exited along with the request. Other
+        request context managers are entered for each sub-request, since
+        they may depend on it (to check its authorization, for example).
 
-        context = ExitStack()
-        context.callback(self.__cleanup)
+        Sub-requests are always dispatched synchronously, so
+        asynchronous request context managers aren't supported.
+
+        .. note:: This method is intended for internal use; see
+            :class:`findig.tools.batch.BatchResource`.
+
+        """
+        token = ctx.push([hook.__name__ for hook in self.lazy_context_hooks])
+        with ExitStack() as context:
+            context.callback(self.__cleanup, token)
+            try:
+                self.__init_context(environ)
+                self.__enter_context_hooks(context)
+                response = ctx.dispatcher.dispatch()
+                response.freeze()
+            except BaseException as err:
+                try:
+                    response = self.error_handler(err)
+                except Exception:
+                    traceback.print_exc()
+                    response = BaseResponse(None, status=500)
+        return response
+
+    def __enter_context_hooks(self, context):
         # Add all the application's context managers to
         # the exit stack. If any of them return a value,
         # we'll add the value to the application context
         # with the function name.
+        timer = ctx.timer
         for hook in self.context_hooks:
-            retval = context.enter_context(hook())
+            if timer is None:
+                retval = context.enter_context(hook())
+            else:
+                retval = timer.call(_hook_phase(hook),
+                                    context.enter_context, hook())
             if retval is not None:
                 setattr(ctx, hook.__name__, retval)
+
+    async def build_context_async(self, environ):
+        """
+        Start a request context for an ASGI request.
+
+        This works like :meth:`build_context`, except that the request
+        context managers are entered asynchronously; synchronous ones are
+        entered in the event loop's executor.
+
+        :param environ: A WSGI environment, built from the ASGI scope.
+        :return: An asynchronous context manager for the request.
+
+        .. note:: This method is intended for internal use.
+
+        """
+        if not self._startup_hooks_run:
+            await run_sync(self.__run_startup_hooks)
+        token = self.__start_context(environ)
+
+        context = AsyncExitStack()
+        context.callback(self.__cleanup, token)
+        timer = ctx.timer
+        for hook in self.context_hooks:
+            cm = hook()
+            if not hasattr(cm, '__aenter__'):
+                cm = ThreadedContext(cm)
+            if timer is None:
+                retval = await context.enter_async_context(cm)
+            else:
+                with timer.phase(_hook_phase(hook)):
+                    retval = await context.enter_async_context(cm)
+            if retval is not None:
+                setattr(ctx, hook.__name__, retval)
+
+        if self.lazy_context_hooks:
+            self.__set_lazy_hooks(
+                await context.enter_async_context(
+                    ThreadedContext(ExitStack())))
         return context
 
+    def __set_lazy_hooks(self, stack):
+        timer = ctx.timer
+        for hook in self.lazy_context_hooks:
+            factory = partial(self.__enter_lazy, stack, hook)
+            if timer is not None:
+                factory = partial(timer.call, _hook_phase(hook), factory)
+            ctx.set_lazy(hook.__name__, factory)
+
+    def __start_context(self, environ):
+        token = ctx.push()
+        self.__init_context(environ)
+        return token
+
+    def __init_context(self, environ):
+        ctx.timer = timer = RequestTimer() \
+            if self.server_timing or self.timing_subscribers \
+            else None
+        ctx.app = self
+        ctx.url_adapter = adapter = self.url_map.bind_to_environ(environ)
+
+        # ALWAYS set this after adapter
+        ctx.request = self.request_class(environ)
+
+        rule, url_values = timed(timer, 'match', adapter.match,
+                                 return_rule=True)
+        dispatcher = self  # FIXME: self.get_dispatcher(rule)
+
+        # Set up context variables
+        ctx.url_values = url_values
+        ctx.dispatcher = dispatcher
+        ctx.resource = dispatcher.get_resource(rule)
+
     def test_context(self, create_route=False, **args):
         """
         Make a mock request context for testing.
@@ -207,16 +390,23 @@ class App(Dispatcher):
             path = args.get('path', '/')
             self.route(lambda: {}, path)
 
-        ctx.testing = True
         builder = EnvironBuilder(**args)
-        return self.build_context(builder.get_environ())
+        context = self.build_context(builder.get_environ())
+        ctx.testing = True
+        return context
 
     def __call__(self, environ, start_response):
         # Set up the application context and run the
         # app inside it.
+        deferred = None
         try:
-            with self.build_context(environ):
+            with self.build_context(environ) as context:
                 response = ctx.dispatcher.dispatch()
+                if getattr(response, 'is_streamed', False):
+                    # The response body is generated as it is sent, so
+                    # the request context must outlive this function;
+                    # it's torn down when the server closes the body.
+                    deferred = context.pop_all()
         except BaseException as err:
             try:
                 response = self.error_handler(err)
@@ -224,7 +414,92 @@ class App(Dispatcher):
                 traceback.print_exc()
                 response = BaseResponse(None, status=500)
         finally:
-            return response(environ, start_response)
+            app_iter = response(environ, start_response)
+            if deferred is not None:
+                app_iter = ClosingIterator(app_iter, deferred.close)
+            return app_iter
+
+    async def asgi(self, scope, receive, send):
+        """
+        Run the app as an `ASGI`_ application.
+
+        :class:`App` instances are WSGI applications; this method is the
+        app's ASGI interface, and can be passed to any ASGI server::
+
+            $ uvicorn myapp:app.asgi
+
+        Under ASGI, resource functions, data-model actions, request
+        context managers and formatters may be coroutine functions, which
+        are awaited. Synchronous ones are run in the event loop's default
+        executor, so that slow backends only hold up the requests that use
+        them. See :mod:`findig.asgi`.
+
+        Startup hooks are run when the server sends a lifespan startup
+        event, or else before the first request.
+
+        .. _ASGI: https://asgi.readthedocs.io/
+
+        """
+        if scope['type'] == 'lifespan':
+            return await self.__run_lifespan(receive, send)
+        elif scope['type'] != 'http':
+            raise ValueError(
+                "Unsupported ASGI scope type: {!r}".format(scope['type']))
+
+        environ = make_environ(scope, await read_body(receive))
+        deferred = None
+        try:
+            try:
+                context = await self.build_context_async(environ)
+                async with context:
+                    response = await ctx.dispatcher.dispatch_async()
+                    if getattr(response, 'is_streamed', False):
+                        deferred = context.pop_all()
+            except CancelledError:
+                raise
+            except BaseException as err:
+                try:
+                    response = self.error_handler(err)
+                except Exception:
+                    traceback.print_exc()
+                    response = BaseResponse(None, status=500)
+
+            await send_response(response, environ, send)
+        finally:
+            if deferred is not None:
+                await deferred.aclose()
+
+    async def __run_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await run_sync(self.__run_startup_hooks)
+                except Exception as err:
+                    await send({'type': 'lifespan.startup.failed',
+                                'message': str(err)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def dispatch(self):
+        response = super().dispatch()
+        if self.server_timing:
+            self.__add_server_timing(response)
+        return response
+
+    async def dispatch_async(self):
+        response = await super().dispatch_async()
+        if self.server_timing:
+            self.__add_server_timing(response)
+        return response
+
+    def __add_server_timing(self, response):
+        timer = ctx.timer
+        if timer is not None and timer.timings:
+            response.headers.add('Server-Timing', timer.server_timing())
 
     def iter_resource_rules(self, resource):
         yield from self.url_map.iter_rules(resource.name)
@@ -244,4 +519,20 @@ class App(Dispatcher):
             yield dispatcher.get_resource(endpoints[endpoint])
 
     def __build_url_map(self):
-        self.url_map = Map([r for r in self.build_rules()])
+        self.url_map = self.url_map_class([r for r in self.build_rules()])
+
+        # Compile the dispatch plans for non-lazy resources up front, so
+        # that requests don't have to inspect their data-models, along with
+        # templates for the URLs of collection items.
+        for resource in self.endpoints.values():
+            if isinstance(resource, Resource) and not resource.lazy:
+                resource.get_dispatch_plan()
+            if isinstance(resource, Collection) and resource.include_urls:
+                resource.get_item_url_template(self.url_map)
+
+
+def _hook_phase(hook):
+    # Name the timing phase for a request context manager after the
+    # function that it wraps.
+    func = getattr(hook, '__wrapped__', hook)
+    return "hook." + getattr(func, '__name__', type(func).__name__)
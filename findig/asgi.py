@@ -0,0 +1,187 @@
+"""
+The :mod:`findig.asgi` module contains the helpers that let a Findig
+application run as an `ASGI`_ application (see :meth:`findig.App.asgi`).
+
+Under ASGI, resource functions, data-model actions, request context
+managers and formatters may be coroutines (``async def``), and are
+awaited on the server's event loop. Synchronous ones are run in the
+event loop's default executor, so that they don't block other requests;
+the executor can be replaced with
+:meth:`asyncio.AbstractEventLoop.set_default_executor`.
+
+.. _ASGI: https://asgi.readthedocs.io/
+
+"""
+
+from contextvars import copy_context
+from functools import partial
+from io import BytesIO
+import asyncio
+import inspect
+import sys
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Run a synchronous function in the event loop's executor, and return
+    its result.
+
+    The function runs in a copy of the current :mod:`contextvars` context,
+    so it sees the same request context (:data:`findig.context.ctx`) as
+    the coroutine that called it.
+    """
+    loop = asyncio.get_running_loop()
+    call = partial(copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(None, call)
+
+
+async def call_async(func, *args, **kwargs):
+    """
+    Call a function that may or may not be a coroutine function, and
+    return its result.
+
+    Coroutine functions are awaited directly; other functions are run
+    with :func:`run_sync`. If a synchronous function returns an awaitable,
+    that is awaited as well.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+
+    result = await run_sync(func, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class ThreadedContext:
+    """
+    An asynchronous context manager that enters and exits a synchronous
+    context manager in the event loop's executor.
+    """
+
+    def __init__(self, cm):
+        self.cm = cm
+
+    async def __aenter__(self):
+        return await run_sync(self.cm.__enter__)
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        return await run_sync(self.cm.__exit__, exc_type, exc_value, tb)
+
+
+async def read_body(receive):
+    """
+    Read the entire body of an HTTP request from an ASGI *receive*
+    callable.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+
+    return b"".join(chunks)
+
+
+def make_environ(scope, body):
+    """
+    Build a WSGI environment from an ASGI HTTP connection scope.
+
+    :param scope: The ASGI connection scope.
+    :param body: The request body, as bytes.
+    """
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': _to_wsgi_str(root_path),
+        'PATH_INFO': _to_wsgi_str(path),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': "HTTP/{}".format(scope.get('http_version', '1.1')),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,
+    }
+
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+        environ['REMOTE_PORT'] = str(scope['client'][1])
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = "HTTP_" + name
+
+        if name in environ:
+            value = "{},{}".format(environ[name], value)
+        environ[name] = value
+
+    # The body has already been read in full (it may have been sent
+    # chunked), so its length is known.
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+async def send_response(response, environ, send):
+    """
+    Send a :class:`werkzeug.wrappers.BaseResponse` with an ASGI *send*
+    callable.
+
+    The bodies of streamed responses are generated in the event loop's
+    executor, since generating them may block.
+    """
+    app_iter, status, headers = response.get_wsgi_response(environ)
+
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(None, 1)[0]),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ],
+        })
+
+        if response.is_streamed:
+            chunks = iter(app_iter)
+            while True:
+                chunk = await run_sync(next, chunks, None)
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+        else:
+            for chunk in app_iter:
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+
+        await send({'type': 'http.response.body', 'body': b""})
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+
+
+def _to_wsgi_str(s):
+    # WSGI strings are bytes decoded as latin-1 (PEP 3333).
+    return s.encode('utf-8').decode('latin-1')
+
+
+__all__ = ['run_sync', 'call_async', 'ThreadedContext', 'read_body',
+           'make_environ', 'send_response']
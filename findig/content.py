@@ -22,16 +22,25 @@ from werkzeug.exceptions import NotAcceptable, UnsupportedMediaType
 from werkzeug.http import parse_accept_header, parse_options_header
 
 from findig.context import ctx
-from findig.utils import tryeach
+from findig.utils import LRUCache, tryeach
+
+
+# Marks a negotiation that found no acceptable handler
+_unacceptable = object()
 
 
 class HandlerAggregator:
     def __init__(self):
         self.handlers = {}
 
+        # Incremented on every registration, so that anything composed
+        # from this aggregator knows when to rebuild.
+        self.revision = 0
+
     def register(self, key, handler=None):
         def register_handler(handler):
             self.handlers[key] = handler
+            self.revision += 1
             return handler
 
         if handler is None:
@@ -57,6 +66,11 @@ class ErrorHandler(HandlerAggregator):
 
     """
 
+    def __init__(self):
+        super().__init__()
+        self._resolved = {}
+        self._resolved_revision = self.revision
+
     def register(self, err_type, handler=None):
         """
         Register a handler function for a particular exception type and
@@ -81,18 +95,37 @@ class ErrorHandler(HandlerAggregator):
                              "exception type.")
         return super().register(err_type, handler)
 
-    def choose_best_handler(self, err):
-        # Try to find the most specific error handler for this method
-        best_htype = BaseException
-        err_type = type(err)
+    def _resolve(self, err_type):
+        mro = err_type.__mro__
+        best_htype = next(
+            (htype for htype in mro if htype in self.handlers), None)
 
+        # Registered types that aren't in the MRO can still be virtual
+        # base classes of the type (see ABCMeta.register).
         for htype in self.handlers:
-            if issubclass(err_type, htype):
-                if issubclass(htype, best_htype):
+            if htype not in mro and issubclass(err_type, htype):
+                if best_htype is None or issubclass(htype, best_htype):
                     best_htype = htype
 
-        if best_htype in self.handlers:
-            return self.handlers[best_htype]
+        return None if best_htype is None else self.handlers[best_htype]
+
+    def choose_best_handler(self, err):
+        # Handlers are resolved once for each exception type, by walking
+        # the type's MRO; the resolutions are forgotten whenever a new
+        # handler is registered.
+        if self._resolved_revision != self.revision:
+            self._resolved = {}
+            self._resolved_revision = self.revision
+
+        err_type = type(err)
+
+        try:
+            handler = self._resolved[err_type]
+        except KeyError:
+            handler = self._resolved[err_type] = self._resolve(err_type)
+
+        if handler is not None:
+            return handler
 
         else:
             # Re-raise the exception
@@ -104,6 +137,12 @@ class ErrorHandler(HandlerAggregator):
 
 
 class ContentPipe(HandlerAggregator, metaclass=ABCMeta):
+    #: A cache of content negotiation results that is shared by all
+    #: formatters and parsers. It maps the pipe, its revision and the raw
+    #: request header to the chosen mime-type and handler, so that only
+    #: the first request with a particular header has to parse it.
+    negotiation_cache = LRUCache(maxsize=512)
+
     def register(self, mime_type, handler=None, default=False):
         """
         Register a handler function for a particular content-type.
@@ -166,15 +205,22 @@ class Formatter(ContentPipe):
                                      "for this formatter.")
 
         else:
-            accept = parse_accept_header(accept_header, MIMEAccept)
-            mime_type = accept.best_match(self.handlers)
+            key = (self, self.revision, accept_header)
+            chosen = self.negotiation_cache.get(key)
 
-            if mime_type is not None:
-                return mime_type, self.handlers[mime_type]
+            if chosen is None:
+                accept = parse_accept_header(accept_header, MIMEAccept)
+                mime_type = accept.best_match(self.handlers)
+                chosen = self.negotiation_cache[key] = _unacceptable \
+                    if mime_type is None \
+                    else (mime_type, self.handlers[mime_type])
 
-            else:
+            if chosen is _unacceptable:
                 raise NotAcceptable
 
+            else:
+                return chosen
+
         # Parse the Accept header
         accept = parse_accept_header(
             ctx.request.headers.get("Accept", "*/*"),
@@ -227,9 +273,22 @@ class Parser(ContentPipe):
 
     """
     def choose_best_handler(self):
-        content_type, options = ctx.request.headers.get(
-            "content-type", type=parse_options_header
-        )
+        content_type_header = ctx.request.headers.get("content-type", "")
+        key = (self, self.revision, content_type_header)
+        chosen = self.negotiation_cache.get(key)
+
+        if chosen is None:
+            chosen = self.negotiation_cache[key] = \
+                self._negotiate(content_type_header)
+
+        if chosen is _unacceptable:
+            raise UnsupportedMediaType
+
+        else:
+            return chosen
+
+    def _negotiate(self, content_type_header):
+        content_type, options = parse_options_header(content_type_header)
 
         if content_type in self.handlers:
             return content_type, partial(
@@ -240,6 +299,6 @@ class Parser(ContentPipe):
                 self.handlers[self.default], **options)
 
         else:
-            raise UnsupportedMediaType
+            return _unacceptable
 
 __all__ = "Formatter", "Parser", "ErrorHandler"
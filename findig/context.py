@@ -8,16 +8,129 @@ immediately after the request is done.
    proxy to *ctx.app*.
 """
 
-from werkzeug.local import Local
+from contextvars import ContextVar
+from functools import partial
 
+from werkzeug.local import LocalProxy
 
-#: A global request context local that can be used by anyone to store
+
+class RequestContext:
+    """
+    An object whose attributes are local to the current request context.
+
+    Its data is kept in a :class:`contextvars.ContextVar`, so each thread,
+    greenlet and :mod:`asyncio` task sees its own data. A request starts
+    with empty data (see :meth:`push`), and the data that was there
+    before is put back when it ends (see :meth:`pop`); neither has to
+    look at the data itself.
+
+    It can also hold *lazy* values, which are registered with
+    :meth:`set_lazy` as a function that creates the value. The function
+    is only called the first time the value is read, and its result is
+    stored from then on.
+
+    Calling the object with an attribute name returns a
+    :class:`werkzeug.local.LocalProxy` for that attribute.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, name='findig_ctx'):
+        object.__setattr__(self, '_data', ContextVar(name, default=None))
+
+    def push(self, share=()):
+        """
+        Start a new, empty request context.
+
+        :param share: The names of lazy values to share with the request
+            context that is being replaced, if any. They are read from
+            it (and created there, if they haven't been read yet), so that
+            a request and its sub-requests share a single value.
+        :return: A token that must be passed to :meth:`pop` when the
+            request context ends.
+        """
+        previous = self._data.get()
+        data = {}
+        if share and previous is not None:
+            data['_lazy_factories'] = {
+                name: partial(_read, previous, name) for name in share
+            }
+        self._data.set(data)
+        return previous
+
+    def pop(self, token):
+        """
+        End a request context started with :meth:`push`, restoring the
+        data that was there before it.
+        """
+        self._data.set(token)
+
+    def set_lazy(self, name, factory):
+        """
+        Register a lazy value.
+
+        :param name: The attribute name that the value is read from.
+        :param factory: A function taking no arguments that creates the
+            value.
+        """
+        factories = self.__storage().setdefault('_lazy_factories', {})
+        factories[name] = factory
+
+    def __storage(self):
+        data = self._data.get()
+        if data is None:
+            data = {}
+            self._data.set(data)
+        return data
+
+    def __call__(self, name):
+        return LocalProxy(self, name)
+
+    def __release_local__(self):
+        self._data.set(None)
+
+    def __iter__(self):
+        return iter((self._data.get() or {}).items())
+
+    def __getattr__(self, name):
+        data = self._data.get()
+        if data is None:
+            raise AttributeError(name)
+        return _read(data, name)
+
+    def __setattr__(self, name, value):
+        self.__storage()[name] = value
+
+    def __delattr__(self, name):
+        try:
+            del self._data.get()[name]
+        except (KeyError, TypeError):
+            raise AttributeError(name) from None
+
+
+def _read(data, name):
+    # Read a value from request context data, creating it first if it's
+    # a lazy value that hasn't been read yet.
+    try:
+        return data[name]
+    except KeyError:
+        try:
+            factory = data['_lazy_factories'].pop(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    value = data[name] = factory()
+    return value
+
+
+#: A global request context object that can be used by anyone to store
 #: data about the current request. Data stored on this object will be
-#: cleared automatically at the end of each request and call only be
-#: seen on the same thread that set the data. This means that data
-#: accessed through this object will only ever be relevant to the current
-#: request that is being processed.
-ctx = Local()
+#: cleared automatically at the end of each request and can only be
+#: seen by the thread (or greenlet, or asyncio task) that set the data.
+#: This means that data accessed through this object will only ever be
+#: relevant to the current request that is being processed. Lazy context
+#: values (see :meth:`findig.App.context`) are created the first time
+#: they are read from this object.
+ctx = RequestContext()
 
 # A bunch of context local proxies
 
@@ -45,5 +158,5 @@ resource = ctx('resource')
 url_values = ctx('url_values')
 
 
-__all__ = ['ctx', 'app', 'request', 'url_adapter',
+__all__ = ['RequestContext', 'ctx', 'app', 'request', 'url_adapter',
            'dispatcher', 'resource', 'url_values']
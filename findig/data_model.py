@@ -33,6 +33,14 @@ class AbstractDataModel(Mapping):
         Replace the resource's existing data with the new data. If
         the resource doesn't exist yet, create it.
 
+    * .. function:: patch(data)
+        :noindex:
+
+        Change some of the resource's fields, leaving the others as they
+        are. *data* maps each field to change to its new value; fields
+        that map to ``None`` are removed (following the semantics of
+        JSON merge patches).
+
     * .. function:: delete()
         :noindex:
 
@@ -48,6 +56,42 @@ class AbstractDataModel(Mapping):
         :return: A mapping that can identify the created child (i.e.,
             a key).
 
+    * .. function:: make_many(items)
+        :noindex:
+
+        Create several child resources at once. If a collection's
+        data-model has this action, ``POST`` requests with a list of
+        items use it instead of calling :func:`make` for each item.
+
+        :return: A list of mappings that identify the created children,
+            in the same order as *items*.
+
+    * .. function:: version()
+        :noindex:
+
+        Retrieve a value that changes whenever the resource's data does
+        (a revision number, a hash or a :class:`~datetime.datetime` of the
+        last modification), without reading the data itself. If this is
+        implemented, the resource's responses have an ``ETag`` header
+        (and a ``Last-Modified`` header if the version is a datetime), and
+        Findig uses it to answer conditional requests: a ``GET`` with a
+        matching ``If-None-Match`` or ``If-Modified-Since`` header gets
+        a ``304 Not Modified`` response without the data being read, and
+        a write whose ``If-Match`` or ``If-Unmodified-Since`` header
+        doesn't match fails with ``412 Precondition Failed``.
+
+        :return: The version, or ``None`` if the resource isn't versioned.
+
+    * .. function:: head()
+        :noindex:
+
+        Retrieve the response headers for a ``HEAD`` request to the
+        resource (a ``Content-Length``, for example), without reading its
+        data. If this isn't implemented, ``HEAD`` requests read the
+        resource's data, but don't format it into a response body.
+
+        :return: A mapping of header names to values, or ``None``.
+
     To implement this abstract base class, do *either* of the following:
 
     * Implement methods on your subclass with the names
@@ -68,7 +112,8 @@ class AbstractDataModel(Mapping):
       take a look at the source code for this class.
     """
 
-    all_actions = ('read', 'write', 'delete', 'make')
+    all_actions = ('read', 'write', 'patch', 'delete', 'make', 'make_many',
+                   'version', 'head')
 
     def compose(self, other):
         if isinstance(other, Mapping):
@@ -122,10 +167,18 @@ class DataModel(AbstractDataModel, MutableMapping):
         >>> dm['write'] == write_some_data
         True
 
+    Every change made through the mapping interface increments
+    :attr:`revision`, which lets resources know when to recompile their
+    dispatch plans.
+
     """
     def __init__(self):
         self.registry = {}
 
+        #: A counter that is incremented whenever an action is set or
+        #: deleted on the model.
+        self.revision = 0
+
     def __setitem__(self, action, func):
         if action not in self.all_actions:
             raise ValueError("Unsupported action: {}".format(action))
@@ -135,6 +188,7 @@ class DataModel(AbstractDataModel, MutableMapping):
 
         else:
             setattr(self, action, func)
+            self.revision += 1
 
     def __delitem__(self, action):
         if action not in self.all_actions:
@@ -145,6 +199,7 @@ class DataModel(AbstractDataModel, MutableMapping):
 
         else:
             delattr(self, action)
+            self.revision += 1
 
     def __call__(self, action):
         def decorator(func):
@@ -171,17 +226,24 @@ class DataSetDataModel(AbstractDataModel):
 
         if isinstance(self.ds, MutableDataSet):
             yield 'make'
+            yield 'make_many'
 
         if isinstance(self.ds, MutableRecord):
             yield 'write'
+            yield 'patch'
             yield 'delete'
 
+        if isinstance(getattr(self.ds, 'version', None), Callable):
+            yield 'version'
+
     def __len__(self):
         length = 1
         if isinstance(self.ds, MutableDataSet):
-            length += 1
-        if isinstance(self.ds, MutableRecord):
             length += 2
+        if isinstance(self.ds, MutableRecord):
+            length += 3
+        if isinstance(getattr(self.ds, 'version', None), Callable):
+            length += 1
         return length
 
     def __getitem__(self, action):
@@ -189,10 +251,22 @@ class DataSetDataModel(AbstractDataModel):
             return lambda: self.ds
         elif action == 'make':
             return lambda data: self.ds.add(data)
+        elif action == 'make_many':
+            return lambda items: self.ds.add_many(items)
         elif action == 'write':
             return lambda data: self.ds.patch(data, (), replace=True)
+        elif action == 'patch':
+            return lambda data: self.__patch(data)
         elif action == 'delete':
             return lambda: self.ds.delete()
+        elif action == 'version':
+            return lambda: self.ds.version()
+
+    def __patch(self, data):
+        # Only the changed fields are sent to the backend.
+        add_data = {k: v for k, v in data.items() if v is not None}
+        remove_fields = [k for k, v in data.items() if v is None]
+        self.ds.patch(add_data, remove_fields)
 
 
 __all__ = ['AbstractDataModel', 'DictDataModel', 'DataModel',
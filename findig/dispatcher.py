@@ -1,4 +1,6 @@
-from functools import singledispatch
+from asyncio import CancelledError
+from functools import partial, singledispatch
+from inspect import isawaitable
 import warnings
 import traceback
 
@@ -6,10 +8,12 @@ from werkzeug.exceptions import HTTPException
 from werkzeug.routing import Rule
 from werkzeug.wrappers import Response, BaseResponse
 
+from findig.asgi import call_async
 from findig.content import ErrorHandler, Formatter, Parser
 from findig.context import ctx
 from findig.resource import Resource, AbstractResource
-from findig.utils import DataPipe
+from findig.timing import timed, timed_async
+from findig.utils import DataPipe, tryeach
 
 
 class Dispatcher:
@@ -71,6 +75,9 @@ class Dispatcher:
         self.routes = []
         self.endpoints = {}
 
+        # Composed content pipelines, keyed by (kind, resource)
+        self._pipelines = {}
+
     def _handle_exception(self, err):
         # TODO: log error
         traceback.print_exc()
@@ -222,6 +229,63 @@ class Dispatcher:
     def get_resource(self, rule):
         return self.endpoints[rule.endpoint]
 
+    def _get_pipeline(self, kind, resource, compose, *parts):
+        # Return a pipeline composed from the given parts, reusing the
+        # last one built for the resource unless one of the parts has
+        # been replaced or had something registered on it since.
+        token = tuple((part, getattr(part, 'revision', None))
+                      for part in parts)
+        cached = self._pipelines.get((kind, resource))
+
+        if cached is None or cached[0] != token:
+            parts = [part for part in parts if part is not None]
+            pipeline = compose(*parts) if len(parts) > 1 else parts[0]
+            cached = self._pipelines[kind, resource] = (token, pipeline)
+
+        return cached[1]
+
+    def get_formatter(self, resource):
+        """
+        Return the formatter used to format output for a resource.
+
+        The resource's own formatter (if any) is composed with the
+        dispatcher's formatter. The composition is cached, and only rebuilt
+        if either formatter changes.
+        """
+        return self._get_pipeline(
+            'formatter', resource, Formatter.compose,
+            getattr(resource, 'formatter', None), self.formatter)
+
+    def get_parser(self, resource):
+        """
+        Return the parser used to parse input for a resource.
+
+        The resource's own parser (if any) is tried before the
+        dispatcher's parser. Like :meth:`get_formatter`, the result is
+        cached.
+        """
+        return self._get_pipeline(
+            'parser', resource, lambda *parsers: partial(tryeach, parsers),
+            getattr(resource, 'parser', None), self.parser)
+
+    def get_pre_processor(self, resource):
+        """
+        Return a :class:`~findig.utils.DataPipe` that combines the resource's
+        pre-processor with the dispatcher's.
+        """
+        return self._get_pipeline(
+            'pre_processor', resource, DataPipe,
+            getattr(resource, 'pre_processor', None), self.pre_processor)
+
+    def get_post_processor(self, resource):
+        """
+        Return a :class:`~findig.utils.DataPipe` that combines the resource's
+        post-processor with the dispatcher's.
+        """
+        return self._get_pipeline(
+            'post_processor', resource, DataPipe,
+            getattr(resource, 'post_processor', None), self.post_processor)
+
     def dispatch(self):
         """
         Dispatch the current request to the appropriate resource, based on
@@ -234,10 +298,60 @@ class Dispatcher:
         url_values = ctx.url_values
         resource = ctx.resource
 
+        timer = getattr(ctx, 'timer', None)
+        ctx.response = response = {'headers': {}}  # response arguments
+
+        try:
+            data = timed(timer, 'handle', resource.handle_request,
+                         request, url_values)
+            response = {
+                k: v for k, v in response.items()
+                if k in ('status', 'headers')
+            }
+
+            if isinstance(data, (self.response_class, BaseResponse)):
+                return data
+
+            elif request.method == 'HEAD' and self._negotiate_head(
+                    resource, response):
+                return timed(timer, 'serialize', self._head_response,
+                             response)
+
+            elif data is not None:
+                process = self.get_post_processor(resource)
+                data = timed(timer, 'post-process', process, data)
+
+                format = self.get_formatter(resource)
+                mime_type, data = timed(timer, 'format', format, data)
+                response['mimetype'] = mime_type
+                response['response'] = data
+
+            return timed(timer, 'serialize', self.response_class, **response)
+        except BaseException as err:
+            return self.error_handler(err)
+
+    async def dispatch_async(self):
+        """
+        Like :meth:`dispatch`, but for requests handled by an ASGI
+        application (see :meth:`findig.App.asgi`).
+
+        The resource's request handler is awaited, and so are
+        post-processors and formatters that are coroutine functions (or
+        that return awaitable output). Synchronous ones run in the event
+        loop's executor, since formatting a large response may take a
+        while.
+        """
+        request = ctx.request
+        url_values = ctx.url_values
+        resource = ctx.resource
+
+        timer = getattr(ctx, 'timer', None)
         ctx.response = response = {'headers': {}}  # response arguments
 
         try:
-            data = resource.handle_request(request, url_values)
+            data = await timed_async(timer, 'handle',
+                                     resource.handle_request_async,
+                                     request, url_values)
             response = {
                 k: v for k, v in response.items()
                 if k in ('status', 'headers')
@@ -246,25 +360,51 @@ class Dispatcher:
             if isinstance(data, (self.response_class, BaseResponse)):
                 return data
 
+            elif request.method == 'HEAD' and self._negotiate_head(
+                    resource, response):
+                return timed(timer, 'serialize', self._head_response,
+                             response)
+
             elif data is not None:
-                process = DataPipe(
-                    getattr(resource, 'post_processor', None),
-                    self.post_processor
-                )
-                data = process(data)
-
-                format = Formatter.compose(
-                    getattr(resource, 'formatter', Formatter()),
-                    self.formatter
-                )
-                mime_type, data = format(data)
+                process = self.get_post_processor(resource)
+                data = await timed_async(timer, 'post-process', process, data)
+
+                format = self.get_formatter(resource)
+                mime_type, data = await timed_async(
+                    timer, 'format', _format_async, format, data)
+
                 response['mimetype'] = mime_type
                 response['response'] = data
 
-            return self.response_class(**response)
+            return timed(timer, 'serialize', self.response_class, **response)
+        except CancelledError:
+            raise
         except BaseException as err:
             return self.error_handler(err)
 
+    def _negotiate_head(self, resource, response):
+        # The body of a response to a HEAD request is never sent, so
+        # rather than format the resource data, just negotiate the
+        # content-type that it would have been formatted as. This isn't
+        # possible for formatters that aren't Formatter-like; their
+        # output is formatted (and then discarded) as usual.
+        if any(k.lower() == 'content-type' for k in response['headers']):
+            return True
+
+        format = self.get_formatter(resource)
+        if hasattr(format, 'choose_best_handler'):
+            response['mimetype'], _ = format.choose_best_handler()
+            return True
+        else:
+            return False
+
+    def _head_response(self, response):
+        response = self.response_class(**response)
+        # An empty body isn't the resource's real length; only send a
+        # Content-Length if the resource gave one.
+        response.automatically_set_content_length = False
+        return response
+
     @property
     def unrouted_resources(self):
         """
@@ -278,3 +418,12 @@ class Dispatcher:
         else:
             return list(map(self.resources.get,
                             set(self.resources) - routed))
+
+
+async def _format_async(format, data):
+    # Format resource data for an ASGI request, awaiting the formatter's
+    # output if it's awaitable.
+    mime_type, data = await call_async(format, data)
+    if isawaitable(data):
+        data = await data
+    return mime_type, data
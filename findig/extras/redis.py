@@ -1,6 +1,7 @@
 from ast import literal_eval
-from collections.abc import Mapping
+from collections.abc import Callable, Mapping
 from contextlib import contextmanager
+from hashlib import sha1
 from time import time
 import random
 
@@ -23,7 +24,11 @@ class IndexToken(Mapping):
                         for k in sorted(self.fields))
 
     def __hash__(self):
-        return hash(str(self)) & (2**(8*self.sz - 1) - 1)
+        # A stable hash (unlike the built-in one for strings), so that
+        # every process finds the same index entries.
+        digest = sha1(str(self).encode('utf8')).digest()
+        return int.from_bytes(digest[:self.sz], 'big') \
+            & (2**(8*self.sz - 1) - 1)
 
     def __iter__(self):
         yield from self.fields
@@ -36,12 +41,18 @@ class IndexToken(Mapping):
 
     @property
     def value(self):
-        return hash(self).to_bytes(self.sz, 'big')
+        # The token itself follows its hash, so that tokens with the same
+        # hash don't share a prefix in the index. It ends with a NUL byte,
+        # which the reprs of the values never contain.
+        return hash(self).to_bytes(self.sz, 'big') \
+            + str(self).encode('utf8') + b'\x00'
 
 
 class RedisObj(MutableRecord):
-    def __init__(self, key, collection=None, include_id=True):
+    def __init__(self, key, collection=None, include_id=True, fields=None):
         self.itemkey = key
+        self.fields = fields
+        self.versionkey = key + ':version'
         self.collection = collection
         self.include_id = include_id
         self.r = (collection.r
@@ -96,11 +107,15 @@ class RedisObj(MutableRecord):
             p.hdel(self.itemkey, *remove_fields)
 
         self.store(add_data, self.itemkey, p)
+        p.incr(self.versionkey)
         p.execute()
 
-        if self.inblock:
-            data = {k: old_data[k] for k in old_data
-                    if k not in remove_fields}
+        if not self.inblock:
+            if replace:
+                data = {k: old_data[k] for k in ('id',) if k in old_data}
+            else:
+                data = {k: old_data[k] for k in old_data
+                        if k not in remove_fields}
             data.update(add_data)
 
             self.invalidate(new_data=data)
@@ -112,20 +127,47 @@ class RedisObj(MutableRecord):
             self.invalidate()
 
     def read(self):
-        data = self.r.hgetall(self.itemkey)
-        if self.include_id:
+        if self.fields is None:
+            data = self.r.hgetall(self.itemkey)
+            include_id = self.include_id
+        else:
+            # Only fetch (and decode) the projected fields
+            fields = [f for f in self.fields if f != 'id']
+            values = self.r.hmget(self.itemkey, fields) if fields else []
+            data = {
+                k.encode('utf8'): v for k, v in zip(fields, values)
+                if v is not None
+            }
+            include_id = self.include_id and 'id' in self.fields
+
+        if include_id:
             data[b'id'] = self.id.encode("utf8")
         return {
             k.decode('utf8'): literal_eval(v.decode('utf8'))
             for k, v in data.items()
         }
 
+    def project(self, *fields):
+        if self.fields is not None:
+            fields = [f for f in fields if f in self.fields]
+        return RedisObj(self.itemkey, self.collection, self.include_id,
+                        fields)
+
     def delete(self):
         if self.collection is not None:
             self.collection.remove_from_index(self.id, self)
             self.collection.untrack_id(self.id)
 
-        self.r.delete(self.itemkey)
+        self.r.delete(self.itemkey, self.versionkey)
+
+    def version(self):
+        # A counter that's bumped by every patch, so that the version
+        # can be checked without reading the item's hash. It starts at a
+        # random value when the item is added to a set, so that the
+        # versions of a deleted item aren't reused if it's added again.
+        # Items that were stored without one aren't versioned.
+        version = self.r.get(self.versionkey)
+        return None if version is None else int(version)
 
     @staticmethod
     def store(data, key, client):
@@ -170,14 +212,13 @@ class RedisSet(MutableDataSet):
         self.itemkey = self.colkey + ':item:{id}'
         self.indkey = self.colkey + ':index'
         self.incrkey = self.colkey + ':next-id'
-        self.genid = args.pop(
-            'generate_id',
-            lambda d: self.r.incr(self.incrkey)
-        )
+        self.genid = args.pop('generate_id', None)
         self.indsize = args.pop('index_size', 4)
         self.filterby = args.pop('filterby', {})
         self.indexby = args.pop('candidate_keys', [('id',)])
         self.include_ids = args.pop('include_ids', True)
+        self.range = args.pop('range', None)
+        self.fields = args.pop('fields', None)
         self.r = redis.StrictRedis() if client is None else client
 
     def __repr__(self):
@@ -202,13 +243,18 @@ class RedisSet(MutableDataSet):
         # If there is a filter, and it is completely encapsulated by
         # our index, we can use that to iter through the items
 
-        tokens = self.__buildindextokens(self.filterby, raise_err=False)
+        tokens = self.__buildindextokens(
+            self.indexed_filter(), raise_err=False)
         if tokens:
             # Pick an index to scan
-            token = random.choice(tokens)
-            id_blobs = self.r.zrangebylex(
-                self.indkey, token.value, token.value)
-            ids = [bs[self.indsize:] for bs in id_blobs]
+            ids = self.__scanindex(random.choice(tokens))
+
+        elif self.range is not None:
+            # Only the ids in the requested range are fetched
+            start, stop = self.range
+            # Redis would read a stop of -1 as the end of the set
+            ids = self.r.zrange(self.colkey, start, stop - 1) \
+                if stop > start else []
 
         else:
             ids = self.r.zrange(self.colkey, 0, -1)
@@ -222,18 +268,99 @@ class RedisSet(MutableDataSet):
                 if FilteredDataSet.check_match(data, self.filterby):
                     yield data
             else:
-                yield RedisObj(itemkey, self, self.include_ids)
+                yield RedisObj(itemkey, self, self.include_ids, self.fields)
+
+    def indexed_filter(self):
+        """
+        Return the part of the set's filter that the index can look up
+        (predicates can't be).
+
+        **This is an internal method.**
+        """
+        return {k: v for k, v in self.filterby.items()
+                if not isinstance(v, Callable)}
+
+    def count(self):
+        if not self.filterby:
+            total = self.r.zcard(self.colkey)
+            if self.range is None:
+                return total
+            start, stop = self.range
+            return max(0, min(stop, total) - start)
+
+        tokens = self.__buildindextokens(
+            self.indexed_filter(), raise_err=False)
+        for token in tokens:
+            if set(token) == set(self.filterby):
+                # The filter is fully indexed, so its matches are the
+                # index entries that start with the token.
+                return self.r.zlexcount(
+                    self.indkey, b'[' + token.value,
+                    b'[' + token.value + b'\xff')
+
+        return super().count()
+
+    def __scanindex(self, token):
+        # Index entries are the token followed by the item id, so scan
+        # every entry with the token as a prefix.
+        id_blobs = self.r.zrangebylex(
+            self.indkey, b'[' + token.value, b'[' + token.value + b'\xff')
+        return [bs[len(token.value):] for bs in id_blobs]
+
+    def explain(self):
+        """
+        Return a description of the set, and of how its items are read
+        from redis.
+        """
+        tokens = self.__buildindextokens(
+            self.indexed_filter(), raise_err=False)
+        if tokens:
+            scan = "index scan ({})".format(tokens[0])
+        elif self.range is not None:
+            scan = "range scan [{}:{}]".format(*self.range)
+        else:
+            scan = "full scan"
+        if self.fields is not None:
+            scan += ", fields ({})".format(", ".join(self.fields))
+        return "{!r}\nredis: {}".format(self, scan)
 
     def add(self, data):
-        id = str(data['id'] if 'id' in data else self.genid(data))
-        itemkey = self.itemkey.format(id=id)
+        return self.add_many([data])[0]
+
+    def add_many(self, items):
+        items = list(items)
+        ids = self.allocate_ids(items)
+        tokens = []
 
+        # All of the items are stored in a single round trip.
         with self.group_redis_commands():
-            tokens = self.add_to_index(id, data)
-            self.track_id(id)
-            RedisObj.store(data, itemkey, self.r)
+            for id, data in zip(ids, items):
+                tokens.append(self.add_to_index(id, data)[0])
+                self.track_id(id)
+                itemkey = self.itemkey.format(id=id)
+                RedisObj.store(data, itemkey, self.r)
+                self.r.set(itemkey + ':version', random.getrandbits(48))
 
-        return tokens[0]
+        return tokens
+
+    def allocate_ids(self, items):
+        """
+        Return a list of ids for new items, taking them from the items'
+        ``id`` fields if they have them. Otherwise they are generated with
+        *generate_id*, or if that wasn't given, allocated in a single
+        block from a counter.
+
+        **This is an internal method.**
+        """
+        missing = sum(1 for data in items if 'id' not in data)
+        if missing and self.genid is None:
+            last = self.r.incrby(self.incrkey, missing)
+            generated = iter(range(last - missing + 1, last + 1))
+            return [str(data['id'] if 'id' in data else next(generated))
+                    for data in items]
+
+        return [str(data['id'] if 'id' in data else self.genid(data))
+                for data in items]
 
     def fetch_now(self, **spec):
         if list(spec) == ['id']:
@@ -274,7 +401,7 @@ class RedisSet(MutableDataSet):
 
     def reindex(self, id, data, old_data):
         with self.group_redis_commands():
-            self.remove_from_index(id, data)
+            self.remove_from_index(id, old_data)
             self.add_to_index(id, data)
 
     def clear(self):
@@ -292,6 +419,13 @@ class RedisSet(MutableDataSet):
         # Redis should clean up the other data structures
 
     def filtered(self, **spec):
+        if self.range is not None or self.fields is not None \
+                or not self.filterby.keys().isdisjoint(spec):
+            # Filtering a slice or projection of the set can't be done
+            # with the index, and neither can a second filter on a field
+            # (whose values must match both filters).
+            return super().filtered(**spec)
+
         filter = dict(self.filterby)
         filter.update(spec)
         args = {
@@ -303,6 +437,36 @@ class RedisSet(MutableDataSet):
         }
         return RedisSet(**args)
 
+    def limit(self, count, offset=0):
+        if self.filterby or self.range is not None \
+                or self.fields is not None:
+            return super().limit(count, offset)
+
+        return RedisSet(
+            key=self.colkey,
+            candidate_keys=self.indexby,
+            index_size=self.indsize,
+            include_ids=self.include_ids,
+            range=(offset, offset + count),
+            client=self.r,
+        )
+
+    def project(self, *fields):
+        if self.filterby:
+            return super().project(*fields)
+        if self.fields is not None:
+            fields = [f for f in fields if f in self.fields]
+
+        return RedisSet(
+            key=self.colkey,
+            candidate_keys=self.indexby,
+            index_size=self.indsize,
+            include_ids=self.include_ids,
+            range=self.range,
+            fields=fields,
+            client=self.r,
+        )
+
     @contextmanager
     def group_redis_commands(self):
         client = self.r
@@ -6,7 +6,7 @@ import traceback
 
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base, declared_attr
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import load_only, sessionmaker
 from sqlalchemy.sql.expression import desc
 from werkzeug.datastructures import MultiDict
 from werkzeug.exceptions import BadRequest
@@ -40,8 +40,9 @@ class SQLA:
     A helper clase for declaring SQLAlchemy ORM models for Findig apps.
 
     This object will handle the creation and destruction of the SQLAlchemy
-    session automatically, with the downside that a session is created on
-    every request (regardless as to whether it is used).
+    session automatically. A session is only created for requests that use
+    it (through :attr:`session` or ``ctx.sqla_session``), and is closed at
+    the end of the request.
 
     After you create one of these, you can declare your ORM models by
     subclassing ``sqla.Base``::
@@ -87,9 +88,9 @@ class SQLA:
 
     def attach_to(self, app):
         """Hook the helper into an App."""
-        # This request context manager creates a session at the start
-        # of the request, and closes it at the end.
-        @app.context
+        # This request context manager creates a session the first time
+        # it's used in a request, and closes it at the end.
+        @app.context(lazy=True)
         def sqla_session():
             session = self._session_cls()
             yield session
@@ -168,6 +169,10 @@ class SQLASet(MutableDataSet):
         ``sqla.Base``. If you haven't then ensure that the mapped class takes
         field names as keyword arguments.
 
+    If the mapped class has a version counter (set with the
+    ``version_id_col`` mapper argument), then the records in the set use it
+    as their :meth:`~findig.tools.dataset.AbstractRecord.version`.
+
     """
     class InvalidField(BadRequest):
         pass
@@ -187,9 +192,28 @@ class SQLASet(MutableDataSet):
     def __init__(self, orm_cls):
         self._cls = orm_cls
         self._modifiers = []
+        self._fields = None
 
     def __iter__(self):
-        query = ctx.sqla_session.query(self._cls)
+        for obj in self._build_query().all():
+            yield _SQLRecord(obj, self._fields)
+
+    def __repr__(self):
+        return "<sqla-set({})>".format(self._cls.__name__)
+
+    def count(self):
+        # SELECT COUNT(*) over the query, with its filters and limits
+        return self._build_query().count()
+
+    def explain(self):
+        """
+        Return a description of the data set, with the SQL query that
+        it runs.
+        """
+        return "{!r}\nSQL: {}".format(self, self._build_query())
+
+    def _build_query(self):
+        query = self._query()
         for modifier in self._modifiers:
             mod_name, *args = modifier
             if mod_name == "filter":
@@ -203,30 +227,39 @@ class SQLASet(MutableDataSet):
                 if offset:
                     query = query.offset(offset)
                 query = query.limit(count).from_self()
-
-        yield from map(_SQLRecord, query.all())
+        return query
 
     def add(self, data):
-        data = data.to_dict() if isinstance(data, MultiDict) else data
-        try:
-            obj = self._cls(**data)
-        except TypeError:
-            traceback.print_exc()
-            raise self.InvalidField
-
-        ctx.sqla_session.add(obj)
+        return self.add_many([data])[0]
+
+    def add_many(self, items):
+        objs = []
+        for data in items:
+            data = data.to_dict() if isinstance(data, MultiDict) else data
+            try:
+                objs.append(self._cls(**data))
+            except TypeError:
+                traceback.print_exc()
+                raise self.InvalidField
+
+        # The items are added in a single transaction; the session's unit
+        # of work batches their INSERTs (with executemany) where it can.
+        ctx.sqla_session.add_all(objs)
 
         try:
             ctx.sqla_session.commit()
         except Exception as e:
             raise self.CommitError(e)
 
-        key = obj.__table__.primary_key
-        return {c.name: getattr(obj, c.name) for c in key}
+        return [
+            {c.name: getattr(obj, c.name) for c in obj.__table__.primary_key}
+            for obj in objs
+        ]
 
     def copy(self):
         copy = SQLASet(self._cls)
         copy._modifiers = self._modifiers[:]
+        copy._fields = self._fields
         return copy
 
     def filtered(self, *filters, **filter_by):
@@ -245,14 +278,36 @@ class SQLASet(MutableDataSet):
         copy._modifiers.append(("limit", count, offset))
         return copy
 
+    def project(self, *fields):
+        if self._fields is not None:
+            fields = [f for f in fields if f in self._fields]
+        copy = self.copy()
+        copy._fields = fields
+        return copy
+
     def fetch_now(self, *args, **kwargs):
-        query = ctx.sqla_session.query(self._cls)
+        query = self._query()
         query = self._filter_query(query, *args, **kwargs)
         obj = query.first()
         if obj is None:
             raise LookupError("No matching records.")
         else:
-            return _SQLRecord(obj)
+            return _SQLRecord(obj, self._fields)
+
+    def _query(self):
+        query = ctx.sqla_session.query(self._cls)
+        if self._fields is not None:
+            # Only load the projected columns (and the primary key, which
+            # SQLAlchemy always loads).
+            mapper = self._cls.__mapper__
+            attrs = [
+                mapper.get_property_by_column(c).key
+                for c in self._cls.__table__.columns
+                if c.name in self._fields
+            ]
+            if attrs:
+                query = query.options(load_only(*attrs))
+        return query
 
     def _filter_query(self, query, *filter_args, **filter_by):
         query = query.filter_by(**filter_by)
@@ -262,16 +317,33 @@ class SQLASet(MutableDataSet):
 
 
 class _SQLRecord(MutableRecord):
-    def __init__(self, obj):
+    def __init__(self, obj, fields=None):
         self._obj = obj
+        self._fields = fields
 
     def read(self):
         d = {}
+        fields = self._fields
         for c in self._obj.__class__.__table__.columns:
-            d[c.name] = getattr(self._obj, c.name)
+            if fields is None or c.name in fields:
+                d[c.name] = getattr(self._obj, c.name)
         return d
 
-    def patch(self, add_data, remove_fields):
+    def project(self, *fields):
+        if self._fields is not None:
+            fields = [f for f in fields if f in self._fields]
+        return _SQLRecord(self._obj, fields)
+
+    def patch(self, add_data, remove_fields, replace=False):
+        if replace:
+            # Every column that isn't part of the primary key or in the
+            # new data is reset.
+            table = self._obj.__class__.__table__
+            remove_fields = [
+                c.name for c in table.columns
+                if c.name not in add_data and not c.primary_key
+            ]
+
         try:
             for field in remove_fields:
                 setattr(self._obj, field, None)
@@ -287,5 +359,12 @@ class _SQLRecord(MutableRecord):
         ctx.sqla_session.delete(self._obj)
         ctx.sqla_session.commit()
 
+    def version(self):
+        mapper = self._obj.__mapper__
+        if mapper.version_id_col is None:
+            return None
+        prop = mapper.get_property_by_column(mapper.version_id_col)
+        return getattr(self._obj, prop.key)
+
 
 __all__ = ["SQLA", "SQLASet"]
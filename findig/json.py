@@ -1,4 +1,9 @@
 from collections.abc import Iterable, Mapping
+from datetime import date, time
+from decimal import Decimal
+from functools import singledispatch
+from itertools import chain
+from uuid import UUID
 import json
 import re
 import traceback
@@ -14,58 +19,318 @@ from findig.dispatcher import Dispatcher as Dispatcher_
 from findig.resource import AbstractResource, Collection, Resource
 
 
+@singledispatch
+def to_json(obj):
+    """
+    to_json(obj)
+
+    Convert an object that JSON can't represent natively into one that it
+    can.
+
+    This is a :func:`~functools.singledispatch` function, so converters
+    for new types can be registered with ``to_json.register(type)``. The
+    following conversions are registered by default:
+
+    * Any mapping is converted to a :class:`dict` (a JSON object).
+    * Any other iterable is converted to a :class:`list` (a JSON array).
+    * :class:`~datetime.datetime`, :class:`~datetime.date` and
+      :class:`~datetime.time` objects are converted to ISO 8601 strings.
+    * :class:`~uuid.UUID` and :class:`~decimal.Decimal` objects are
+      converted to strings, so that no precision is lost.
+    * :class:`~findig.resource.AbstractResource` instances are converted
+      to an object describing how to reach the resource.
+
+    ::
+
+        >>> to_json(UUID(int=42))
+        '00000000-0000-0000-0000-00000000002a'
+        >>> to_json(date(2015, 7, 18))
+        '2015-07-18'
+
+    """
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+
+to_json.register(Mapping, dict)
+to_json.register(Iterable, list)
+to_json.register(UUID, str)
+to_json.register(Decimal, str)
+
+
+@to_json.register(date)
+@to_json.register(time)
+def _isoformat(obj):
+    return obj.isoformat()
+
+
+def _global_to_json(obj):
+    # The fallback for per-app converters. It can't be to_json itself,
+    # since singledispatch() would copy its registry functions.
+    return to_json(obj)
+
+
+#: A pattern that matches the variable parts of a URL rule.
+_value_pattern = re.compile("<(?:.*?:)?(.*?)>")
+
+
+@to_json.register(AbstractResource)
+def _describe_resource(obj):
+    rule = next(ctx.app.iter_resource_rules(obj))
+
+    d = {
+        'methods': rule.methods,
+    }
+
+    try:
+        url = ctx.url_adapter.build(obj.name)
+        d['url'] = url
+    except URLBuildError:
+        url = _value_pattern.sub(r":\1", rule.rule)
+        d['url_rule'] = url
+        d['url'] = None
+
+    if isinstance(obj, Resource):
+        d['is_strict_collection'] = isinstance(obj, Collection)
+
+    return d
+
+
 class CustomEncoder(json.JSONEncoder):
     """
+    CustomEncoder(*, to_json=to_json, **args)
+
     A custom :class:`json.JSONEncoder` that goes a bit further to coerce
     data into json.
 
-    Any Python mapping is converted to a javascript object.
+    :param to_json: A function that converts objects that JSON can't
+        represent natively. By default, :func:`to_json` is used, which
+        converts mappings to javascript objects and all other iterables to
+        lists, among other things.
 
-    Any Python iterable that isn't a mapping is converted to a list.
-
-    The encoder also provides an object representation for
-    :class:`~findig.resource.AbstractResource`.
+    The remaining arguments are passed to :class:`json.JSONEncoder`.
 
     """
 
     #: A pattern that matches the variable parts of a URL rule.
-    value_pattern = re.compile("<(?:.*?:)?(.*?)>")
+    value_pattern = _value_pattern
+
+    def __init__(self, *, to_json=to_json, **args):
+        super().__init__(**args)
+        self.to_json = to_json
 
     def default(self, obj):
-        if isinstance(obj, Mapping):
-            return dict(obj)
-        elif isinstance(obj, Iterable):
-            return list(obj)
-        elif isinstance(obj, AbstractResource):
-            rule = next(ctx.app.iter_resource_rules(obj))
-
-            d = {
-                'methods': rule.methods,
-            }
-
-            try:
-                url = ctx.url_adapter.build(obj.name)
-                d['url'] = url
-            except URLBuildError:
-                url = self.value_pattern.sub(r":\1", rule.rule)
-                d['url_rule'] = url
-                d['url'] = None
-
-            if isinstance(obj, Resource):
-                d['is_strict_collection'] = isinstance(obj, Collection)
-
-            return d
+        try:
+            return self.to_json(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+class StdlibCodec:
+    """
+    A JSON codec backed by Python's standard :mod:`json` module.
 
+    :param encoder_cls: The :class:`json.JSONEncoder` subclass used to
+        encode data. If it is a subclass of :class:`CustomEncoder`, then
+        it is passed the *to_json* function of whoever uses the codec.
+
+    A JSON codec is any object with the following methods:
+
+    * ``make_encoder(to_json, indent=None)``, which returns an encoder with
+      an ``encode(obj)`` method that returns a JSON string, as well as
+      ``item_separator`` and ``key_separator`` attributes (which are used
+      to stream output; see :func:`iter_json`).
+    * ``loads(text)``, which parses a JSON string.
+
+    """
+    def __init__(self, encoder_cls=CustomEncoder):
+        self.encoder_cls = encoder_cls
+
+    def make_encoder(self, to_json, indent=None):
+        if issubclass(self.encoder_cls, CustomEncoder):
+            return self.encoder_cls(indent=indent, to_json=to_json)
         else:
-            return super().default(obj)
+            return self.encoder_cls(indent=indent)
+
+    def loads(self, text):
+        return json.loads(text)
+
+
+class OrjsonCodec:
+    """
+    A faster JSON codec backed by `orjson`_. Apps use it by default when
+    orjson is installed (see :func:`default_codec`).
+
+    Output is compact (i.e., without whitespace between items), unlike the
+    output of :class:`StdlibCodec`. Since orjson can only indent by two
+    spaces, any *indent* other than ``None`` results in two-space
+    indentation. Data that orjson can't encode natively (such as integers
+    wider than 64 bits) is encoded with :class:`CustomEncoder` instead.
+
+    Instantiating this class raises an :class:`ImportError` if orjson is
+    not installed.
+
+    .. _orjson: https://pypi.org/project/orjson/
+
+    """
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def make_encoder(self, to_json, indent=None):
+        return _OrjsonEncoder(self._orjson, to_json, indent)
+
+    def loads(self, text):
+        return self._orjson.loads(text)
+
+
+class _OrjsonEncoder:
+    item_separator = ","
+    key_separator = ":"
+
+    def __init__(self, orjson, to_json, indent):
+        self._dumps = orjson.dumps
+        self._error = orjson.JSONEncodeError
+        self._to_json = to_json
+        self._indent = indent
+        # Send datetimes through to_json, so that they're converted the
+        # same way as by CustomEncoder.
+        self._options = orjson.OPT_NON_STR_KEYS \
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent is not None:
+            self._options |= orjson.OPT_INDENT_2
+
+    def encode(self, obj):
+        # The objects converted by to_json are remembered, so that if
+        # orjson gives up, the fallback encoder doesn't convert them again
+        # (generators, for example, can only be read once).
+        converted = {}
+
+        def to_json(obj):
+            if id(obj) not in converted:
+                converted[id(obj)] = obj, self._to_json(obj)
+            return converted[id(obj)][1]
+
+        try:
+            return self._dumps(
+                obj, default=to_json, option=self._options
+            ).decode("utf8")
+        except self._error:
+            encoder = CustomEncoder(
+                to_json=to_json,
+                indent=None if self._indent is None else 2,
+                separators=(self.item_separator, self.key_separator))
+            return encoder.encode(obj)
+
+
+def default_codec(indent=None):
+    """
+    Return the fastest JSON codec available.
+
+    An :class:`OrjsonCodec` is returned if orjson is installed and can
+    honour *indent*; otherwise, a :class:`StdlibCodec` is returned.
+    """
+    if indent in (None, 2):
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            pass
+
+    return StdlibCodec()
+
+
+def _is_streamable(obj):
+    # Iterables that would otherwise be converted into a list; these
+    # are the objects that are serialized incrementally.
+    return isinstance(obj, Iterable) \
+        and not isinstance(obj, (str, bytes, bytearray, Mapping))
+
+
+def _encode_key(key, encoder):
+    # Mirror the way the json module coerces keys to strings
+    if isinstance(key, str):
+        pass
+    elif isinstance(key, float) or key is None or key is True \
+            or key is False:
+        key = encoder.encode(key)
+    elif isinstance(key, int):
+        key = int.__repr__(key)
+    else:
+        raise TypeError("key {!r} is not a string".format(key))
+
+    return encoder.encode(key)
+
+
+def iter_json(obj, encoder):
+    """
+    Serialize *obj* to JSON incrementally, yielding string fragments.
+
+    :param obj: The data to serialize.
+    :param encoder: An encoder made by a JSON codec (see
+        :class:`StdlibCodec`), or a :class:`json.JSONEncoder` instance. It
+        is used to encode everything that isn't streamed.
+
+    Iterables that aren't mappings (generators, data sets and the like)
+    are consumed one item at a time, so that only one item needs to be
+    held in memory at once. A top-level mapping is serialized one value
+    at a time, so that any iterables it contains are streamed too; nested
+    mappings are serialized whole.
+
+    Unless the encoder is set up to indent its output, the joined
+    fragments are identical to the output of :func:`json.dumps`::
+
+        >>> encoder = CustomEncoder()
+        >>> "".join(iter_json({'items': (i*i for i in range(3))}, encoder))
+        '{"items": [0, 1, 4]}'
+
+    """
+    if _is_streamable(obj):
+        yield "["
+        for i, item in enumerate(obj):
+            if i:
+                yield encoder.item_separator
+            if _is_streamable(item):
+                yield from iter_json(item, encoder)
+            else:
+                yield encoder.encode(item)
+        yield "]"
+
+    elif isinstance(obj, Mapping):
+        yield "{"
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                yield encoder.item_separator
+            yield _encode_key(key, encoder)
+            yield encoder.key_separator
+            if _is_streamable(value):
+                yield from iter_json(value, encoder)
+            else:
+                yield encoder.encode(value)
+        yield "}"
+
+    else:
+        yield encoder.encode(obj)
 
 
 class JSONMixin:
-    def __init__(self, indent=None, encoder_cls=None, **args):
+    def __init__(self, indent=None, encoder_cls=None, stream=False,
+                 chunk_size=16384, codec=None, plain_dicts=False, **args):
         self.indent = indent
         self.encoder_cls = CustomEncoder \
             if encoder_cls is None \
             else encoder_cls
+
+        if codec is not None:
+            self.codec = codec
+        elif encoder_cls is not None:
+            self.codec = StdlibCodec(encoder_cls)
+        else:
+            self.codec = default_codec(indent)
+
+        # Converters registered here take precedence over the global ones
+        self.to_json = singledispatch(_global_to_json)
+        self.plain_dicts = plain_dicts
+        self.stream = stream
+        self.chunk_size = chunk_size
         super().__init__(**args)
 
         self.error_handler = ErrorHandler()
@@ -74,7 +339,10 @@ class JSONMixin:
 
         self.formatter = Formatter()
         self.formatter.register(
-            'application/json', self.serialize, default=True)
+            'application/json',
+            self.serialize_stream if stream else self.serialize,
+            default=True
+        )
 
         self.parser = Parser()
         self.parser.register(
@@ -109,20 +377,64 @@ class JSONMixin:
         return Response(jsonified, mimetype="application/json", **args)
 
     def serialize(self, data):
-        jsonified = json.dumps(data, indent=self.indent, cls=self.encoder_cls)
-        return jsonified
+        encoder = self.codec.make_encoder(self.to_json, self.indent)
+        return encoder.encode(data)
+
+    def serialize_stream(self, data):
+        """
+        Serialize data into JSON, incrementally if possible.
+
+        If the data contains iterables that would have to be converted into
+        lists (see :func:`iter_json`), an iterator over chunks of the JSON
+        output, each roughly ``chunk_size`` characters long, is returned.
+        Otherwise (or if the output fits into a single chunk), the JSON
+        string is returned as-is.
+
+        The first chunk is produced before this method returns, so that
+        errors that occur early on (such as a failing database query) can
+        still be turned into an error response.
+        """
+        if not _is_streamable(data) and not (
+                isinstance(data, Mapping)
+                and any(map(_is_streamable, data.values()))):
+            return self.serialize(data)
+
+        encoder = self.codec.make_encoder(self.to_json, self.indent)
+        chunks = self._iter_chunks(iter_json(data, encoder))
+        first = next(chunks, "")
+        rest = next(chunks, None)
+
+        if rest is None:
+            return first
+        else:
+            return chain((first, rest), chunks)
+
+    def _iter_chunks(self, fragments):
+        buffer = []
+        size = 0
+
+        for fragment in fragments:
+            buffer.append(fragment)
+            size += len(fragment)
+            if size >= self.chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+
+        if buffer:
+            yield "".join(buffer)
 
     def deserialize(self, byte_string, **opts):
         byte_string = b"" if byte_string is None else byte_string
         try:
             jsonified = byte_string.decode(opts.get('charset', 'utf8'))
-            data = json.loads(jsonified) if jsonified else {}
+            data = self.codec.loads(jsonified) if jsonified else {}
         except UnicodeDecodeError:
             raise BadRequest("Cannot decode request data")
         except ValueError as err:
             raise BadRequest("Can't parse request data {}".format(err))
         else:
-            if isinstance(data, dict):
+            if isinstance(data, dict) and not self.plain_dicts:
                 return request.parameter_storage_class(data)
             else:
                 return data
@@ -134,7 +446,8 @@ class Dispatcher(JSONMixin, Dispatcher_):
 
 class App(JSONMixin, App_):
     """
-    App(indent=None, encoder_cls=None, autolist=False)
+    App(indent=None, encoder_cls=None, stream=False, chunk_size=16384, \
+codec=None, plain_dicts=False, autolist=False)
 
     A :class:`findig.App` that works with application/json data.
 
@@ -146,12 +459,34 @@ class App(JSONMixin, App_):
         JSON. By default, no indentation is used.
     :param encoder_cls: A :class:`json.JSONEncoder` subclass that should be
         used to serialize data into JSON. By default, an encoder that
-        converts all mappings to JSON objects and all other iterables to
-        JSON lists in addition to the normally supported simplejson types
-        (int, float, str) is used.
+        converts objects with :func:`to_json` is used. Giving an encoder
+        class selects the standard library codec (see *codec*).
+    :param stream: If ``True``, resource data containing iterables (such as
+        generators or data sets) are serialized incrementally and sent to
+        the client in chunks, instead of being built up in memory first.
+        See :meth:`serialize_stream`.
+    :param chunk_size: The approximate size (in characters) of each chunk
+        of a streamed response.
+    :param codec: The JSON codec used to encode and decode JSON; see
+        :class:`StdlibCodec`. By default, the fastest codec available is
+        used (see :func:`default_codec`).
+    :param plain_dicts: If ``True``, JSON objects in request content are
+        parsed into plain dictionaries. Otherwise, they're copied into
+        the request's ``parameter_storage_class`` (a
+        :class:`~werkzeug.datastructures.MultiDict` by default).
     :param autolist: Same as the *autolist* parameter in
         :class:`findig.App`.
 
+    Objects that JSON can't represent natively are converted with the app's
+    ``to_json`` function, which falls back on the module-level
+    :func:`to_json`. Converters for specific types can be registered on it
+    like so::
+
+        @app.to_json.register(Money)
+        def money_to_json(money):
+            return {'amount': money.amount, 'currency': money.currency}
+
     """
 
-__all__ = ["Dispatcher", "App"]
+__all__ = ["Dispatcher", "App", "CustomEncoder", "StdlibCodec",
+           "OrjsonCodec", "default_codec", "iter_json", "to_json"]
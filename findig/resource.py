@@ -1,19 +1,38 @@
 import abc
+import base64
 import collections
 import functools
 import inspect
 import itertools
 import uuid
 from collections.abc import Mapping
+from datetime import datetime, timezone
 from functools import partial
 
-from werkzeug.exceptions import MethodNotAllowed, NotFound
-from werkzeug.routing import BuildError as URLBuildError
+from werkzeug.exceptions import (BadRequest, HTTPException, MethodNotAllowed,
+                                 NotFound, PreconditionFailed)
+from werkzeug.http import (http_date, is_resource_modified, parse_date,
+                           parse_etags, quote_etag)
+from werkzeug.routing import BuildError as URLBuildError, parse_rule
+from werkzeug.urls import url_encode, url_quote
 from werkzeug.utils import validate_arguments
+from werkzeug.wrappers import BaseResponse
 
+from findig.asgi import call_async, run_sync
 from findig.content import ErrorHandler, Formatter, Parser
 from findig.context import url_adapter, ctx
 from findig.data_model import DataModel, DataSetDataModel, DictDataModel
+from findig.tools.dataset import AbstractDataSet
+
+
+# A precompiled record of how requests to a non-lazy resource are
+# dispatched. *model* and *revision* identify the data-model that the
+# plan was compiled from, *methods* is the set of supported HTTP methods,
+# *handlers* maps each HTTP method to a (model_function, takes_input)
+# pair, and *version* and *head* are the model's 'version' and 'head'
+# functions, if it has them.
+_DispatchPlan = collections.namedtuple(
+    "_DispatchPlan", "model revision methods handlers version head")
 
 
 class AbstractResource(metaclass=abc.ABCMeta):
@@ -70,6 +89,20 @@ class AbstractResource(metaclass=abc.ABCMeta):
                  resource will accept.
         """
 
+    async def handle_request_async(self, request, url_values):
+        """
+        Handle a request to one of the resource URLs from an ASGI
+        application (see :meth:`findig.App.asgi`).
+
+        This takes the same parameters as :meth:`handle_request`, and
+        returns the same data. By default, :meth:`handle_request` is run
+        in the event loop's executor; subclasses can override this to
+        await coroutines directly.
+
+        This method is *not* abstract.
+        """
+        return await run_sync(self.handle_request, request, url_values)
+
     def build_url(self, values, **args):
         """
         build_url(values)
@@ -118,7 +151,7 @@ class AbstractResource(metaclass=abc.ABCMeta):
 class Resource(AbstractResource):
     """
     Resource(wrapped=None, lazy=None, name=None, model=None,
-    formatter=None, parser=None, error_handler=None)
+    formatter=None, parser=None, error_handler=None, sparse_fields=False)
 
     A concrete implementation of :class:`AbstractResource`.
 
@@ -151,14 +184,38 @@ class Resource(AbstractResource):
     :keyword error_handler: A function that should be used to convert
         exception into :class:`Responses <werkzeug.wrappers.BaseResponse>`.
         By default, a :class:`findig.content.ErrorHandler` is used.
+    :keyword sparse_fields: If ``True``, clients can ask for only some of
+        the resource's fields with a comma-separated ``fields`` query
+        parameter (see :attr:`fields_param`). Data sets and records are
+        projected with their
+        :meth:`~findig.tools.dataset.AbstractDataSet.project` method, so
+        that backends only fetch the fields that were asked for; other
+        mappings are filtered.
 
     """
+
+    #: The name of the query parameter that clients use to select the
+    #: fields that they want, if *sparse_fields* is set.
+    fields_param = 'fields'
+
+    #: Maps HTTP methods to the data-model action that handles them, and
+    #: whether or not that action is passed the request input.
+    method_actions = {
+        'GET': ('read', False),
+        'HEAD': ('read', False),
+        'DELETE': ('delete', False),
+        'PUT': ('write', True),
+        'PATCH': ('patch', True),
+    }
+
     def __init__(self, **args):
+        self._plan = None
         self.name = args.get('name', str(uuid.uuid4()))
         self.model = args.get('model', DataModel())
         self.lazy = args.get('lazy', False)
         self.parser = args.get('parser', Parser())
         self.formatter = args.get('formatter', Formatter())
+        self.sparse_fields = args.get('sparse_fields', False)
 
         if 'error_handler' not in args:
             args['error_handler'] = ErrorHandler()
@@ -234,6 +291,9 @@ class Resource(AbstractResource):
         if 'write' in model:
             supported_methods.add('PUT')
 
+        if 'patch' in model:
+            supported_methods.add('PATCH')
+
         return supported_methods
 
     def handle_request(self, request, wrapper_args):
@@ -246,16 +306,189 @@ class Resource(AbstractResource):
         """
         method = request.method.upper()
         try:
-            model = self.compose_model(wrapper_args)
-            handler = self._extract_handler(request, method, model)
+            model = self.compose_model(wrapper_args) if self.lazy else None
+            handler, version, head = self._get_actions(
+                request, method, wrapper_args, model)
+
+            if version is not None and _is_conditional(request, method):
+                args, kwargs = _action_args(version, (), wrapper_args)
+                response = self._check_preconditions(
+                    request, method, version(*args, **kwargs))
+                if response is not None:
+                    return response
+
+            if method == 'HEAD' and head is not None:
+                args, kwargs = _action_args(head, (), wrapper_args)
+                return self._set_head_headers(head(*args, **kwargs))
+
+            args, kwargs = _action_args(
+                handler.func, handler.args, wrapper_args)
+            ret = handler.func(*args, **kwargs)
+            return self._finish_request(request, ret)
 
-            args, kwargs = validate_arguments(
+        except BaseException as err:
+            return self.error_handler(err)
+
+    async def handle_request_async(self, request, wrapper_args):
+        """
+        Dispatch a request to a resource from an ASGI application.
+
+        The resource function and data-model actions may be coroutine
+        functions, in which case they are awaited; otherwise they are run
+        in the event loop's executor.
+        """
+        method = request.method.upper()
+        try:
+            model = await run_sync(self.compose_model, wrapper_args) \
+                if self.lazy else None
+            handler, version, head = self._get_actions(
+                request, method, wrapper_args, model)
+
+            if version is not None and _is_conditional(request, method):
+                args, kwargs = _action_args(version, (), wrapper_args)
+                response = self._check_preconditions(
+                    request, method,
+                    await call_async(version, *args, **kwargs))
+                if response is not None:
+                    return response
+
+            if method == 'HEAD' and head is not None:
+                args, kwargs = _action_args(head, (), wrapper_args)
+                return self._set_head_headers(
+                    await call_async(head, *args, **kwargs))
+
+            args, kwargs = _action_args(
                 handler.func, handler.args, wrapper_args)
-            return handler.func(*args, **kwargs)
+            ret = await call_async(handler.func, *args, **kwargs)
+            return await self._finish_request_async(request, ret)
 
         except BaseException as err:
             return self.error_handler(err)
 
+    def _get_actions(self, request, method, wrapper_args, model=None):
+        # Return the handler for the request, and the resource's version
+        # and head actions. Lazy resources find them in the model
+        # composed for the request; the others use their dispatch plan.
+        if self.lazy:
+            handler = self._extract_handler(request, method, model)
+            return handler, model.get('version'), model.get('head')
+        else:
+            handler = self._plan_handler(request, method, wrapper_args)
+            plan = self.get_dispatch_plan()
+            return handler, plan.version, plan.head
+
+    def _set_head_headers(self, headers):
+        # A head action's headers make up the whole response to a HEAD
+        # request; there's no resource data to format.
+        ctx.response['headers'].update(headers or {})
+        return None
+
+    def _finish_request(self, request, ret):
+        # Make any changes to the resource data that depend on the
+        # request, after it has been handled.
+        if request.method.upper() == 'GET':
+            fields = self._get_fields(request)
+            if fields is not None:
+                ret = _project(ret, fields)
+        return ret
+
+    async def _finish_request_async(self, request, ret):
+        return self._finish_request(request, ret)
+
+    def _get_fields(self, request):
+        if self.sparse_fields:
+            fields = tuple(
+                field.strip()
+                for value in request.args.getlist(self.fields_param)
+                for field in value.split(",")
+                if field.strip()
+            )
+            return fields or None
+
+    def _check_preconditions(self, request, method, version):
+        # Check the request's conditional headers against the current
+        # version of the resource. For reads, a response is returned if
+        # the client's copy is still current; requests that don't match
+        # the client's expectations fail.
+        if version is None:
+            return None
+
+        if isinstance(version, datetime):
+            if version.tzinfo is not None:
+                version = version.astimezone(timezone.utc).replace(
+                    tzinfo=None)
+            last_modified = version.replace(microsecond=0)
+        else:
+            last_modified = None
+
+        etag = str(version)
+
+        if method == 'GET' or method == 'HEAD':
+            headers = ctx.response['headers']
+            headers['ETag'] = quote_etag(etag)
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified)
+
+        if not check_preconditions(request, etag, last_modified):
+            return ctx.dispatcher.response_class(status=304, headers=headers)
+
+    def get_dispatch_plan(self):
+        """
+        Return the precompiled dispatch plan for a non-lazy resource.
+
+        The plan records the HTTP methods that the resource supports and
+        the data-model functions that handle them, so that requests can be
+        dispatched without inspecting the data-model each time. It is
+        compiled when the application's URL map is built, and is
+        recompiled only if the resource's model is replaced or mutated.
+
+        **This is an internal method.**
+        """
+        model = self.model
+        plan = self._plan
+        if plan is None or plan.model is not model \
+                or plan.revision != getattr(model, 'revision', None):
+            plan = self._plan = self._compile_dispatch_plan(model)
+        return plan
+
+    def _compile_dispatch_plan(self, model):
+        methods = frozenset(self.get_supported_methods(model))
+        handlers = {}
+
+        for method in methods.union({'HEAD'}):
+            if method in self.method_actions:
+                action, takes_input = self.method_actions[method]
+                handlers[method] = (model.get(action), takes_input)
+
+        return _DispatchPlan(model, getattr(model, 'revision', None),
+                             methods, handlers, model.get('version'),
+                             model.get('head'))
+
+    def _plan_handler(self, request, method, wrapper_args):
+        plan = self.get_dispatch_plan()
+
+        if method not in plan.methods and method != 'HEAD':
+            raise MethodNotAllowed(list(plan.methods))
+
+        elif method not in plan.handlers:
+            # A method supported by a subclass that the plan doesn't
+            # know about; fall back to inspecting the model.
+            return self._extract_handler(
+                request, method, self.compose_model(wrapper_args))
+
+        func, takes_input = plan.handlers[method]
+
+        if func is None:
+            # There isn't a 'read' function on the model, so the
+            # wrapped function supplies the resource data.
+            return partial(_bind_arguments(self.__wrapped__, wrapper_args))
+
+        elif takes_input:
+            return partial(func, request.input)
+
+        else:
+            return partial(func)
+
     def _extract_handler(self, request, method, model):
         supported_methods = self.get_supported_methods(model)
 
@@ -271,6 +504,9 @@ class Resource(AbstractResource):
         elif method == 'PUT':
             return partial(model['write'], request.input)
 
+        elif method == 'PATCH':
+            return partial(model['patch'], request.input)
+
         else:
             raise ValueError
 
@@ -315,7 +551,9 @@ class Resource(AbstractResource):
 
 class Collection(Resource):
     """
-    Collection(of, include_urls=False, bindargs=None, **keywords)
+    Collection(of, include_urls=False, bindargs=None, lazy_urls=False, \
+page_size=None, max_page_size=None, sort_by=(), total_count=False, \
+**keywords)
 
     A :class:`Resource` that acts as a collection of other resources.
 
@@ -331,14 +569,78 @@ class Collection(Resource):
         For example: a child resource may have the URL variable ``:id``,
         but have a corresponding field named ``user_id``; the appropriate
         value for *bindargs* in this case would be ``{'user_id': 'id'}``.
+    :param lazy_urls: If ``True`` (and *include_urls* is set), mapping items
+        are wrapped in a read-only view that only builds the ``url`` field
+        when it is actually read, instead of being copied into a new
+        dictionary with the URL built up-front.
+    :param page_size: If given, ``GET`` requests to the collection return a
+        single page of this many items, unless the client asks for a
+        different number with the ``limit`` query parameter. The page
+        starts at the item given by the ``offset`` parameter, and the
+        response has a ``Link`` header with ``next`` and ``prev`` links
+        to the neighbouring pages (which use an opaque ``cursor``
+        parameter instead).
+    :param max_page_size: The largest number of items that a client can
+        ask for in one page; larger limits are reduced to this. Defaults to
+        *page_size*.
+    :param sort_by: Arguments passed to the collection data's
+        :meth:`~findig.tools.dataset.AbstractDataSet.sorted` method before
+        it is paginated, so that pages are taken in a stable order.
+    :param total_count: If ``True``, paginated responses have an
+        ``X-Total-Count`` header with the number of items in the whole
+        collection. Data sets are counted with their
+        :meth:`~findig.tools.dataset.AbstractDataSet.count` method, which
+        their backend can usually answer without reading the items.
+
+    Pages are taken with the collection data's
+    :meth:`~findig.tools.dataset.AbstractDataSet.limit` method if it has
+    one, so that data sets backed by a database only fetch one page from
+    it. Other iterables are sliced.
+
+    A ``POST`` request whose input is a list creates an item for each
+    element of the list. The items are created with the data-model's
+    ``make_many`` action if it has one (so that data sets can store them
+    in bulk), or else one at a time with ``make``. The response has a
+    ``207 Multi-Status`` status, and its data is a list of results for
+    each item, in order: each has the item's ``status``, its ``location``
+    (if its URL can be built) and the ``body`` that creating it returned.
+
+    Item URLs are built from a template compiled from the child resource's
+    URL rules when the application's URL map is built. Child rules that use
+    defaults, subdomains or host matching can't be compiled, and URLs for
+    them are built through werkzeug instead.
 
     """
+    method_actions = dict(Resource.method_actions, POST=('make', True))
+
     def __init__(self, of, **args):
         super(Collection, self).__init__(**args)
         self.include_urls = args.pop('include_urls', False)
+        self.lazy_urls = args.pop('lazy_urls', False)
         bindargs = args.pop('bindargs', {})
+        self.page_size = args.pop('page_size', None)
+        self.max_page_size = args.pop('max_page_size', None) or self.page_size
+        self.sort_by = tuple(args.pop('sort_by', ()))
+        self.total_count = args.pop('total_count', False)
         self.collects = collections.namedtuple(
             "collected_resource", "resource binding")(of, bindargs)
+        self._url_template = None
+
+    def get_item_url_template(self, url_map):
+        """
+        Return a compiled template for building the URLs of child items, or
+        ``None`` if the child's URL rules can't be compiled.
+
+        The template is compiled once for each URL map.
+
+        **This is an internal method.**
+        """
+        cached = self._url_template
+        if cached is None or cached[0] is not url_map:
+            child, bind_args = self.collects
+            template = _URLTemplate.compile(url_map, child.name, bind_args)
+            cached = self._url_template = (url_map, template)
+        return cached[1]
 
     def get_supported_methods(self, model=None):
         model = self.compose_model() if model is None else model
@@ -349,32 +651,159 @@ class Collection(Resource):
 
         return supported
 
+    def _plan_handler(self, request, method, wrapper_args):
+        if method == 'POST' and isinstance(request.input, list):
+            return self._extract_handler(
+                request, method, self.compose_model(wrapper_args))
+        else:
+            return super()._plan_handler(request, method, wrapper_args)
+
     def _extract_handler(self, request, method, model):
-        if method == 'POST':
+        if method == 'POST' and isinstance(request.input, list):
+            if 'make' not in model:
+                raise MethodNotAllowed(list(self.get_supported_methods(model)))
+
+            def make_many(items, **url_values):
+                return self._make_many(model, items, url_values)
+
+            return partial(make_many, request.input)
+        elif method == 'POST':
             return partial(model['make'], request.input)
         else:
             return super()._extract_handler(request, method, model)
 
-    def handle_request(self, request, wrapper_args):
-        ret = super().handle_request(request, wrapper_args)
+    def _make_many(self, model, items, url_values):
+        if 'make_many' in model:
+            make_many = model['make_many']
+            args, kwargs = validate_arguments(
+                make_many, (items,), dict(url_values))
+            results = [(201, key) for key in make_many(*args, **kwargs)]
+
+        else:
+            # Each item is created on its own, so some of them can fail
+            # without the others being rolled back.
+            make = model['make']
+            results = []
+            for data in items:
+                args, kwargs = validate_arguments(
+                    make, (data,), dict(url_values))
+                try:
+                    results.append((201, make(*args, **kwargs)))
+                except HTTPException as err:
+                    results.append((err.code, err.description))
+
+        ctx.response['status'] = 207
+        return [self._make_result(status, body) for status, body in results]
+
+    def _make_result(self, status, body):
+        result = {'status': status, 'body': body}
+        if status == 201 and body is not None:
+            url = self._try_build_item_url(body)
+            if url is not None:
+                result['location'] = url
+        return result
+
+    async def _finish_request_async(self, request, ret):
+        if self.page_size is not None \
+                and request.method.upper() in ('GET', 'HEAD'):
+            # Fetching a page of the data may block.
+            return await run_sync(self._finish_request, request, ret)
+        return self._finish_request(request, ret)
+
+    def _finish_request(self, request, ret):
+        if isinstance(ret, BaseResponse):
+            # Error and 304 (Not Modified) responses are passed through.
+            return ret
 
         method = request.method.upper()
 
         # After the request has been handled, these branches may modify
         # the output
-        if method == 'POST':
+        if method == 'POST' and isinstance(request.input, list):
+            # A multi-status result from _make_many()
+            pass
+
+        elif method == 'POST':
             ctx.response.setdefault('status', 201)
 
             url = self._try_build_item_url(ret)
             if url is not None:
                 ctx.response['headers'].setdefault('Location', url)
 
-        elif method == 'GET' and self.include_urls:
-            ret = map(self._include_url_in_item, ret)
+        elif method == 'GET' or method == 'HEAD':
+            # HEAD responses don't have a body, but they get the same
+            # pagination headers as GET responses.
+            fields = self._get_fields(request)
+            if self.page_size is not None:
+                ret = self._paginate(request, ret, fields)
+            elif fields is not None:
+                ret = _project_items(ret, fields)
+            if self.include_urls:
+                ret = map(self._include_url_in_item, ret)
 
         return ret
 
+    def _paginate(self, request, data, fields=None):
+        offset, limit = self._get_page(request.args)
+
+        if self.total_count:
+            if not isinstance(data, AbstractDataSet):
+                # Counting may consume the data, so it's read up-front.
+                data = list(data)
+                total = len(data)
+            else:
+                total = data.count()
+            ctx.response['headers']['X-Total-Count'] = str(total)
+
+        if self.sort_by and hasattr(data, 'sorted'):
+            data = data.sorted(*self.sort_by)
+
+        # One item more than the page is fetched, to find out whether
+        # there's a next page.
+        if hasattr(data, 'limit'):
+            page = data.limit(limit + 1, offset)
+        else:
+            page = itertools.islice(data, offset, offset + limit + 1)
+
+        # Only the page is projected, so that the data can still be
+        # sorted on fields that aren't projected.
+        if fields is not None:
+            page = _project_items(page, fields)
+        page = list(page)
+
+        links = []
+        if len(page) > limit:
+            page.pop()
+            links.append(_page_link(request, 'next', offset + limit, limit))
+        if offset > 0:
+            links.append(
+                _page_link(request, 'prev', max(0, offset - limit), limit))
+        if links:
+            ctx.response['headers']['Link'] = ", ".join(links)
+
+        return page
+
+    def _get_page(self, args):
+        try:
+            if 'cursor' in args:
+                offset, limit = _decode_cursor(args['cursor'])
+            else:
+                offset = int(args.get('offset', 0))
+                limit = int(args.get('limit', self.page_size))
+        except ValueError:
+            raise BadRequest("Invalid pagination parameters.")
+
+        if offset < 0 or limit < 1:
+            raise BadRequest("Invalid pagination parameters.")
+
+        return offset, min(limit, self.max_page_size)
+
     def _include_url_in_item(self, item):
+        if self.lazy_urls and isinstance(item, Mapping):
+            template = self.get_item_url_template(url_adapter.map)
+            if template is not None:
+                return _ItemWithURL(item, template, url_adapter.script_name)
+
         url = self._try_build_item_url(item)
         if url is not None:
             if isinstance(item, Mapping):
@@ -392,6 +821,11 @@ class Collection(Resource):
         child, bind_args = self.collects
         if not isinstance(data, Mapping):
             data = data.__dict__
+
+        template = self.get_item_url_template(url_adapter.map)
+        if template is not None:
+            return template.build(data, url_adapter.script_name)
+
         args = {
             (bind_args[k] if k in bind_args else k): data[k]
             for k in data
@@ -404,4 +838,211 @@ class Collection(Resource):
             return url
 
 
+def _project(data, fields):
+    # Restrict resource data to some of its fields, pushing the
+    # projection into the data's backend if it supports it.
+    if hasattr(data, 'project'):
+        return data.project(*fields)
+    elif isinstance(data, Mapping):
+        return {k: data[k] for k in fields if k in data}
+    else:
+        return data
+
+
+def _project_items(data, fields):
+    if hasattr(data, 'project'):
+        return data.project(*fields)
+    else:
+        return (_project(item, fields) for item in data)
+
+
+def _encode_cursor(offset, limit):
+    raw = "{},{}".format(offset, limit).encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def _decode_cursor(cursor):
+    # Raises ValueError for cursors that weren't made by _encode_cursor
+    # (binascii.Error and UnicodeDecodeError are both ValueErrors).
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    offset, limit = raw.decode('ascii').split(",")
+    return int(offset), int(limit)
+
+
+def _page_link(request, rel, offset, limit):
+    args = request.args.copy()
+    args.pop('limit', None)
+    args.pop('offset', None)
+    args['cursor'] = _encode_cursor(offset, limit)
+    return '<{}?{}>; rel="{}"'.format(request.base_url, url_encode(args), rel)
+
+
+def check_preconditions(request, etag, last_modified=None):
+    """
+    Check a request's conditional headers against the current version of
+    a resource.
+
+    :param request: The request whose headers are checked.
+    :param etag: The resource's current (unquoted) entity tag.
+    :param last_modified: When the resource was last modified, if known.
+    :return: ``False`` if the request is a ``GET`` or ``HEAD`` that can be
+        answered with ``304 Not Modified``, since the client's copy is
+        still current; ``True`` otherwise.
+    :raises werkzeug.exceptions.PreconditionFailed: If the client's
+        ``If-Match`` or ``If-Unmodified-Since`` header doesn't match.
+
+    **This is an internal function.**
+    """
+    environ = request.environ
+
+    if_match = parse_etags(environ.get('HTTP_IF_MATCH'))
+    if if_match and not if_match.contains(etag):
+        raise PreconditionFailed
+
+    unmodified_since = parse_date(environ.get('HTTP_IF_UNMODIFIED_SINCE'))
+    if unmodified_since is not None and last_modified is not None \
+            and last_modified > unmodified_since:
+        raise PreconditionFailed
+
+    if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+        return is_resource_modified(environ, etag, None, last_modified)
+    else:
+        return True
+
+
+def _is_conditional(request, method):
+    # Reads always carry the resource version (as an ETag), but other
+    # requests only need it looked up if the client asked for a check.
+    if method == 'GET' or method == 'HEAD':
+        return True
+    environ = request.environ
+    return any(header in environ for header in _conditional_headers)
+
+
+_conditional_headers = ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH',
+                        'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+def _action_args(func, args, wrapper_args):
+    # Validate the URL values as arguments to a handler or data-model
+    # action. The values are copied, since validate_arguments() removes
+    # the ones that it uses.
+    return validate_arguments(func, args, dict(wrapper_args))
+
+
+def _bind_arguments(func, args):
+    # Bind keyword arguments to a function, keeping coroutine functions
+    # recognizable as such.
+    if inspect.iscoroutinefunction(func):
+        async def bound():
+            return await func(**args)
+    else:
+        def bound():
+            return func(**args)
+    return bound
+
+
+class _URLTemplate:
+    # A precompiled URL builder for the rules of a single endpoint, that
+    # builds a URL by joining strings together.
+    #
+    # Each variant corresponds to one of the endpoint's rules, in the order
+    # that werkzeug would try them; a variant is a (fields, parts) pair,
+    # where *fields* are the item fields needed to build the URL and
+    # *parts* is a list of (static_text, field, to_url) tuples.
+
+    def __init__(self, variants):
+        self.variants = variants
+
+    @classmethod
+    def compile(cls, url_map, endpoint, bind_args):
+        url_map.update()
+        rules = url_map._rules_by_endpoint.get(endpoint, [])
+
+        if url_map.host_matching or any(
+                r.defaults or r.subdomain or r.redirect_to is not None
+                for r in rules):
+            return None
+
+        # Map each URL variable to the item field it is read from
+        sources = {var: field for field, var in bind_args.items()}
+        # Werkzeug tries rules that accept GET before the rest
+        rules = [r for r in rules if r.methods is None or 'GET' in r.methods] \
+            + [r for r in rules if r.methods is not None
+               and 'GET' not in r.methods]
+
+        variants = []
+        for rule in rules:
+            fields = []
+            parts = []
+            for converter, _, variable in parse_rule(rule.rule):
+                if converter is None:
+                    parts.append((url_quote(variable, url_map.charset,
+                                            safe="/:|+"), None, None))
+                    continue
+
+                field = sources.get(variable, variable)
+                if field in bind_args and bind_args[field] != variable:
+                    # The field is bound to a different variable, and
+                    # nothing supplies this one.
+                    break
+
+                fields.append(field)
+                parts.append(("", field, rule._converters[variable].to_url))
+
+            else:
+                variants.append((fields, parts))
+
+        return cls(variants)
+
+    def _choose(self, data):
+        for fields, parts in self.variants:
+            for field in fields:
+                if data.get(field) is None:
+                    break
+            else:
+                return parts
+
+    def can_build(self, data):
+        return self._choose(data) is not None
+
+    def build(self, data, script_name="/"):
+        parts = self._choose(data)
+
+        if parts is not None:
+            path = "".join(
+                text if field is None else to_url(data[field])
+                for text, field, to_url in parts
+            )
+            return "{}/{}".format(script_name.rstrip("/"), path.lstrip("/"))
+
+
+class _ItemWithURL(Mapping):
+    # A read-only view of a collection item with a 'url' field that is
+    # built on demand.
+    __slots__ = '_item', '_template', '_script_name'
+
+    def __init__(self, item, template, script_name):
+        self._item = item
+        self._template = template
+        self._script_name = script_name
+
+    def _has_url(self):
+        return 'url' not in self._item and self._template.can_build(self._item)
+
+    def __getitem__(self, key):
+        if key == 'url' and self._has_url():
+            return self._template.build(self._item, self._script_name)
+        else:
+            return self._item[key]
+
+    def __iter__(self):
+        yield from self._item
+        if self._has_url():
+            yield 'url'
+
+    def __len__(self):
+        return len(self._item) + self._has_url()
+
+
 __all__ = ['AbstractResource', 'Resource', 'Collection']
@@ -0,0 +1,146 @@
+"""
+The :mod:`findig.routing` module provides an optional URL map that
+indexes its rules, for applications with a large number of routes.
+
+A :class:`werkzeug.routing.Map` matches a request by trying each of its
+rules in turn, until one of them matches. An :class:`IndexedMap` instead
+keeps its rules in a trie keyed by the static segments at the start of
+each rule (its *static prefix*), so that only the rules whose static
+prefix matches the request path are tried at all. The rules that are
+tried are still matched by werkzeug, in werkzeug's usual order, so an
+:class:`IndexedMap` matches exactly the same rules (and produces exactly
+the same URL values, redirects and errors) as a regular map.
+
+To use it with a Findig application, set the application's
+:attr:`~findig.App.url_map_class` before the first request::
+
+    from findig import App
+    from findig.routing import IndexedMap
+
+    app = App()
+    app.url_map_class = IndexedMap
+
+"""
+
+from threading import Lock
+
+from werkzeug.routing import Map, MapAdapter
+
+
+class IndexedMap(Map):
+    """
+    A :class:`werkzeug.routing.Map` that indexes its rules by their static
+    prefixes.
+
+    It takes the same arguments as :class:`werkzeug.routing.Map`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._index = None
+        self._index_lock = Lock()
+        super().__init__(*args, **kwargs)
+
+    def add(self, rulefactory):
+        super().add(rulefactory)
+        self._index = None
+
+    def bind(self, *args, **kwargs):
+        adapter = super().bind(*args, **kwargs)
+        return IndexedMapAdapter(
+            self, adapter.server_name, adapter.script_name,
+            adapter.subdomain, adapter.url_scheme, adapter.path_info,
+            adapter.default_method, adapter.query_args
+        )
+
+    def candidates(self, path_info):
+        """
+        Return the rules that could match a path, in the order that they
+        should be tried.
+
+        :param path_info: The path part of a URL (without the script name).
+        """
+        self.update()
+        index = self._index
+
+        if index is None:
+            with self._index_lock:
+                index = self._index
+                if index is None:
+                    index = self._index = self._build_index()
+
+        node = index
+        found = list(node.rules)
+
+        for segment in _split(path_info):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            found.extend(node.rules)
+
+        found.sort()
+        return [rule for _, rule in found]
+
+    def _build_index(self):
+        root = _IndexNode()
+
+        for position, rule in enumerate(self._rules):
+            node = root
+            for segment in _split(rule.rule):
+                if "<" in segment:
+                    # The static prefix stops at the first segment with
+                    # a variable part.
+                    break
+                node = node.children.setdefault(segment, _IndexNode())
+            node.rules.append((position, rule))
+
+        return root
+
+
+class IndexedMapAdapter(MapAdapter):
+    """
+    A :class:`werkzeug.routing.MapAdapter` for an :class:`IndexedMap`.
+
+    Only rules returned by :meth:`IndexedMap.candidates` are tried when
+    matching.
+    """
+
+    def match(self, path_info=None, method=None, return_rule=False,
+              query_args=None):
+        full_map = self.map
+        path = self.path_info if path_info is None else path_info
+
+        # Werkzeug's matching loop goes through all of the rules on
+        # self.map, so narrow it down to the candidates while matching.
+        self.map = _CandidateView(full_map, full_map.candidates(path))
+        try:
+            return super().match(path_info, method, return_rule, query_args)
+        finally:
+            self.map = full_map
+
+
+class _IndexNode:
+    __slots__ = 'children', 'rules'
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+class _CandidateView:
+    # Looks just like the map that it wraps, except that its rule list
+    # only contains the candidates for a particular path.
+    def __init__(self, map, rules):
+        self._map = map
+        self._rules = rules
+
+    def __getattr__(self, name):
+        return getattr(self._map, name)
+
+
+def _split(path):
+    if isinstance(path, bytes):
+        path = path.decode("utf-8", "replace")
+    return [segment for segment in path.split("/") if segment]
+
+
+__all__ = ['IndexedMap', 'IndexedMapAdapter']
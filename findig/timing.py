@@ -0,0 +1,131 @@
+"""
+The :mod:`findig.timing` module times the phases that a request goes
+through inside a Findig application. Timing is off by default; it's
+turned on for an app by registering a subscriber that receives the
+timings for every request::
+
+    app = App()
+
+    @app.timing_subscriber
+    def log_timings(timings):
+        for phase, duration in timings:
+            print(phase, duration)
+
+or by setting :attr:`findig.App.server_timing`, which sends the timings
+back to the client in a ``Server-Timing`` response header (most browsers
+show these in their developer tools)::
+
+    app.server_timing = True
+
+The phases that are timed are:
+
+* ``match``: matching the request URL against the app's URL rules.
+* ``hook.<name>``: entering the request context manager *name* (see
+  :meth:`findig.App.context`). Lazy context managers are timed when
+  they are first used.
+* ``handle``: handling the request with the resource
+  (:meth:`findig.resource.AbstractResource.handle_request`).
+* ``post-process``: running the resource data through the
+  post-processors.
+* ``format``: converting the resource data to the response body with the
+  formatter.
+* ``serialize``: building the response object from the formatted body.
+
+"""
+
+from collections import namedtuple
+from time import perf_counter
+
+from findig.asgi import call_async
+
+
+#: A single timed phase of a request; *duration* is in seconds.
+Timing = namedtuple('Timing', 'phase duration')
+
+
+class RequestTimer:
+    """
+    Collects the timings for the phases of a single request.
+
+    An app creates one of these for each request when timing is turned on,
+    and makes it available as ``ctx.timer``; otherwise ``ctx.timer`` is
+    ``None``.
+    """
+
+    __slots__ = ('timings',)
+
+    def __init__(self):
+        #: A list of :class:`Timing` tuples, in the order that the phases
+        #: finished.
+        self.timings = []
+
+    def record(self, phase, duration):
+        """Record that a phase took *duration* seconds."""
+        self.timings.append(Timing(phase, duration))
+
+    def phase(self, name):
+        """
+        Return a context manager that times the code that it wraps as
+        the phase *name*.
+        """
+        return _Phase(self, name)
+
+    def call(self, phase, func, *args, **kwargs):
+        """
+        Call a function, timing the call as *phase*, and return its result.
+        """
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(phase, perf_counter() - start)
+
+    def server_timing(self):
+        """
+        Return the timings formatted as the value of a ``Server-Timing``
+        header.
+        """
+        return ", ".join(
+            "{};dur={:.3f}".format(phase, duration * 1000)
+            for phase, duration in self.timings
+        )
+
+
+def timed(timer, phase, func, *args, **kwargs):
+    """
+    Call a function, timing the call as *phase* on *timer*, unless *timer*
+    is ``None``.
+    """
+    if timer is None:
+        return func(*args, **kwargs)
+    else:
+        return timer.call(phase, func, *args, **kwargs)
+
+
+async def timed_async(timer, phase, func, *args, **kwargs):
+    """
+    Like :func:`timed`, but for use in coroutines. The function is called
+    with :func:`findig.asgi.call_async`, so synchronous functions run in
+    the event loop's executor.
+    """
+    if timer is None:
+        return await call_async(func, *args, **kwargs)
+    with timer.phase(phase):
+        return await call_async(func, *args, **kwargs)
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, perf_counter() - self.start)
+
+
+__all__ = ['Timing', 'RequestTimer', 'timed', 'timed_async']
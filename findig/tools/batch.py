@@ -0,0 +1,182 @@
+"""
+The :mod:`findig.tools.batch` module defines the :class:`BatchResource`,
+which lets clients send many requests to an application in a single
+HTTP round trip::
+
+    app.route(BatchResource(), "/batch")
+
+A client ``POST`` s a list of operations to the batch resource, each with
+a *method*, a *path* (relative to the application's root, and optionally
+with a query string), and optionally a *body* and some *headers*:
+
+.. code-block:: javascript
+
+    [
+        {"method": "GET", "path": "/items/1"},
+        {"method": "PUT", "path": "/items/2", "body": {"name": "Two"}},
+        {"method": "GET", "path": "/items/?limit=5"}
+    ]
+
+Each operation is dispatched through the application as a sub-request,
+in order, and the batch responds with a list of their responses:
+
+.. code-block:: javascript
+
+    [
+        {"status": 200, "headers": [...], "body": {"id": 1, ...}},
+        {"status": 200, "headers": [...], "body": null},
+        {"status": 200, "headers": [...], "body": [...]}
+    ]
+
+The headers of each response are a list of ``[name, value]`` pairs, so
+that repeated headers (like ``Set-Cookie``) are kept apart.
+
+Sub-requests inherit the headers of the batch request (so they're
+authorized with the same credentials, for example), except for its
+conditional headers and content headers. Lazy request context values
+(like the :class:`findig.extras.sql.SQLA` session) are shared by the whole
+batch; see :meth:`findig.App.dispatch_subrequest`.
+
+The batch request is parsed with the application's parser, and its
+response is formatted with the application's formatter, so the batch
+resource is best used with a :class:`findig.json.App`.
+
+"""
+
+from collections.abc import Mapping
+from contextvars import ContextVar
+from io import BytesIO
+import json
+
+from werkzeug.exceptions import BadRequest, MethodNotAllowed
+
+from findig.context import ctx
+from findig.resource import AbstractResource
+
+
+# Set while a batch is running, so that batches can't be nested.
+_in_batch = ContextVar('findig_batch', default=False)
+
+# Request headers that aren't passed on from the batch request to its
+# sub-requests, because they describe the batch request itself.
+_unshared_headers = frozenset({
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_IF_RANGE',
+})
+
+
+class BatchResource(AbstractResource):
+    """
+    A resource that dispatches a batch of operations as sub-requests.
+
+    :param name: A name that uniquely identifies the resource.
+    :param max_operations: The largest number of operations allowed in a
+        single batch. Larger batches are rejected with ``400 Bad
+        Request``.
+
+    """
+
+    def __init__(self, name="findig.tools.batch", max_operations=50):
+        self.name = name
+        self.max_operations = max_operations
+
+    def get_supported_methods(self):
+        return {'POST'}
+
+    def handle_request(self, request, url_values):
+        if request.method.upper() != 'POST':
+            raise MethodNotAllowed(['POST'])
+
+        if _in_batch.get():
+            raise BadRequest("Batches can't be nested.")
+
+        operations = request.input
+        if not isinstance(operations, list):
+            raise BadRequest("A batch must be a list of operations.")
+        if len(operations) > self.max_operations:
+            raise BadRequest("A batch can have at most {} operations."
+                             .format(self.max_operations))
+
+        # Check all of the operations before any of them are run.
+        environs = [self.make_environ(request, op) for op in operations]
+
+        token = _in_batch.set(True)
+        try:
+            return [self.run(environ) for environ in environs]
+        finally:
+            _in_batch.reset(token)
+
+    def make_environ(self, request, operation):
+        """
+        Return a WSGI environment for a batch operation.
+
+        **This is an internal method.**
+        """
+        if not isinstance(operation, Mapping) \
+                or not isinstance(operation.get('path'), str):
+            raise BadRequest("Each batch operation must have a path.")
+
+        path, _, query = operation['path'].partition("?")
+        environ = {
+            k: v for k, v in request.environ.items()
+            if k not in _unshared_headers
+        }
+        environ['REQUEST_METHOD'] = str(operation.get('method', 'GET')).upper()
+        environ['PATH_INFO'] = _to_wsgi_str(path)
+        environ['QUERY_STRING'] = _to_wsgi_str(query)
+
+        body = operation.get('body')
+        if body is None:
+            data = b""
+        elif isinstance(body, str):
+            data = body.encode('utf8')
+        else:
+            data = json.dumps(body).encode('utf8')
+            environ['CONTENT_TYPE'] = 'application/json'
+
+        headers = operation.get('headers') or {}
+        if not isinstance(headers, Mapping):
+            raise BadRequest("Batch operation headers must be an object.")
+        for name, value in headers.items():
+            key = name.upper().replace("-", "_")
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_' + key
+            environ[key] = _to_wsgi_str(str(value))
+
+        environ['CONTENT_LENGTH'] = str(len(data))
+        environ['wsgi.input'] = BytesIO(data)
+        return environ
+
+    def run(self, environ):
+        """
+        Dispatch a batch operation, and return its result.
+
+        **This is an internal method.**
+        """
+        response = ctx.app.dispatch_subrequest(environ)
+
+        data = response.get_data()
+        mime_type = response.headers.get('Content-Type', '').partition(";")[0]
+        if not data:
+            body = None
+        elif mime_type.strip() == 'application/json':
+            body = json.loads(data.decode('utf8'))
+        else:
+            body = data.decode(response.charset, 'replace')
+
+        return {
+            'status': response.status_code,
+            'headers': [
+                [k, v] for k, v in response.headers.to_wsgi_list()
+                if k.lower() != 'content-length'
+            ],
+            'body': body,
+        }
+
+
+def _to_wsgi_str(s):
+    # WSGI strings are bytes decoded as latin-1 (PEP 3333).
+    return s.encode('utf8').decode('latin-1')
+
+
+__all__ = ['BatchResource']
@@ -0,0 +1,373 @@
+"""
+The :mod:`findig.tools.cache` module defines the :class:`ResponseCache`
+tool, which keeps formatted responses to ``GET`` requests in memory, so
+that repeated requests for the same resource don't have to run its
+data-model and formatter again::
+
+    cache = ResponseCache(app, ttl=30)
+
+    @cache.cached
+    @app.route("/items/<int:id>")
+    def item(id):
+        return db.get_item(id)
+
+Responses are cached per resource, URL, negotiated content-type and
+(optionally) the values of some request headers. A ``PUT``, ``PATCH``,
+``DELETE`` or ``POST`` request to a resource discards what has been cached
+for it (at the same URL), and everything cached for the collections that
+it belongs to.
+
+"""
+
+from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+from functools import partial
+from inspect import isawaitable
+from threading import Lock
+from time import monotonic
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_date, unquote_etag
+from werkzeug.wrappers import BaseResponse
+
+from findig.context import ctx
+from findig.resource import (AbstractResource, Collection,
+                             check_preconditions)
+from findig.utils import LRUCache
+
+
+#: A formatted response kept by a cache store.
+CachedResponse = namedtuple('CachedResponse', 'status headers mimetype body')
+
+
+class ResponseCache:
+    """
+    A :class:`ResponseCache` caches the formatted responses of resources in
+    an application.
+
+    :param app: The findig application whose responses should be cached.
+    :type app: :class:`findig.App`, or a subclass like
+        :class:`findig.json.App`.
+    :param ttl: The number of seconds that a response is kept for, unless
+        the resource is given its own (see :meth:`cached`).
+    :param vary: The names of request headers whose values cached
+        responses depend on, unless the resource is given its own. For
+        example, a resource whose data depends on the authenticated user
+        should vary on ``Authorization``.
+    :param maxsize: The maximum number of responses kept by the default
+        store.
+    :param store: An :class:`AbstractCacheStore` that keeps the cached
+        responses. By default, a thread-safe, in-memory
+        :class:`MemoryCacheStore` is used.
+
+    """
+
+    #: The HTTP methods that write to a resource, and cause cached
+    #: responses for it to be discarded.
+    write_methods = frozenset({'PUT', 'PATCH', 'DELETE', 'POST'})
+
+    def __init__(self, app=None, ttl=60, vary=(), maxsize=1024, store=None):
+        self.ttl = ttl
+        self.vary = tuple(vary)
+        self.store = MemoryCacheStore(maxsize) if store is None else store
+        self.maxsize = maxsize
+
+        # Cached responses are keyed on version numbers, for both the
+        # resource as a whole and the resource at a particular URL. Writes
+        # bump the version numbers, so that the responses cached before
+        # them are never looked up again (and age out of the store).
+        self._versions = {}
+        self._epoch = 0
+        self._lock = Lock()
+        self._owners = {}
+
+        if app is not None:
+            self.attach_to(app)
+
+    def attach_to(self, app):
+        """
+        Attach the cache to a findig application.
+
+        .. note:: This is called automatically for any app that is passed
+            to the cache's constructor.
+
+        This allows the cache to see the application's write requests, so
+        that it can discard the responses that they make stale.
+
+        :param app: The findig application whose responses are cached.
+        :type app: :class:`findig.App`, or a subclass like
+            :class:`findig.json.App`.
+
+        """
+        app.context(self.invalidator)
+        app.startup_hook(partial(self.__find_owners, app))
+
+    def cached(self, resource=None, ttl=None, vary=None):
+        """
+        cached(resource, ttl=None, vary=None)
+
+        Cache the responses to ``GET`` requests for a resource.
+
+        :param resource: The resource whose responses are cached.
+        :type resource: :class:`findig.resource.Resource`
+        :param ttl: The number of seconds that responses are kept for. If
+            not given, the cache's *ttl* is used.
+        :param vary: The names of request headers whose values the
+            resource's responses depend on. If not given, the cache's
+            *vary* is used.
+
+        This method can be used as a decorator, with or without
+        arguments::
+
+            @cache.cached(ttl=300, vary=['Authorization'])
+            @app.route("/me")
+            def me():
+                return get_user_data()
+
+        """
+        def decorator(resource):
+            ttl_ = self.ttl if ttl is None else ttl
+            vary_ = self.vary if vary is None else tuple(vary)
+
+            resource.handle_request = partial(
+                self._handle_request, resource, resource.handle_request,
+                ttl_, vary_)
+            resource.handle_request_async = partial(
+                self._handle_request_async, resource,
+                resource.handle_request_async, ttl_, vary_)
+            return resource
+
+        if isinstance(resource, AbstractResource):
+            return decorator(resource)
+        else:
+            return decorator
+
+    def invalidate(self, resource, url_values=None):
+        """
+        Discard the responses cached for a resource.
+
+        :param resource: The resource whose responses are discarded. The
+            responses cached for the collections it belongs to are
+            discarded as well.
+        :param url_values: If given, only the responses cached for the
+            resource at the URL with these values are discarded. Otherwise,
+            all of them are.
+        """
+        keys = [resource.name if url_values is None
+                else (resource.name, _freeze(url_values))]
+        keys.extend(self._owners.get(resource.name, ()))
+
+        with self._lock:
+            if len(self._versions) > 2 * self.maxsize:
+                # Rather than let the version numbers grow without bound,
+                # start over with a new epoch that every key includes.
+                self._versions.clear()
+                self._epoch += 1
+
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def invalidator(self):
+        # This is attached to the application as a request context manager,
+        # so that responses are discarded after each write request.
+        if ctx.request.method.upper() in self.write_methods:
+            # Copied, since handling the request may consume url_values.
+            resource, url_values = ctx.resource, dict(ctx.url_values)
+            yield
+            self.invalidate(resource, url_values)
+        else:
+            yield
+
+    def make_key(self, resource, request, url_values, vary):
+        """
+        Return the key that a response for the current request is cached
+        under.
+
+        **This is an internal method.**
+        """
+        frozen_url_values = _freeze(url_values)
+        versions = self._versions
+
+        formatter = ctx.dispatcher.get_formatter(resource)
+        if hasattr(formatter, 'choose_best_handler'):
+            mime_type, _ = formatter.choose_best_handler()
+        else:
+            mime_type = request.headers.get('Accept')
+
+        return (
+            self._epoch,
+            resource.name,
+            versions.get(resource.name, 0),
+            frozen_url_values,
+            versions.get((resource.name, frozen_url_values), 0),
+            request.query_string,
+            mime_type,
+            tuple(request.headers.get(header) for header in vary),
+        )
+
+    def _handle_request(self, resource, handle, ttl, vary,
+                        request, url_values):
+        if request.method.upper() not in ('GET', 'HEAD'):
+            return handle(request, url_values)
+
+        key = self.make_key(resource, request, url_values, vary)
+        cached = self.store.get(key)
+        if cached is not None:
+            response = self._make_response(request, cached)
+            if response is not None:
+                return response
+
+        if request.method.upper() == 'HEAD':
+            # Don't format a body just to cache it; the dispatcher can
+            # answer HEAD requests without one.
+            return handle(request, url_values)
+
+        data = handle(request, url_values)
+        if data is None or isinstance(data, BaseResponse):
+            return data
+
+        mime_type, body = self._format(resource, data)
+        return self._store(key, ttl, mime_type, body)
+
+    async def _handle_request_async(self, resource, handle, ttl, vary,
+                                    request, url_values):
+        if request.method.upper() not in ('GET', 'HEAD'):
+            return await handle(request, url_values)
+
+        key = self.make_key(resource, request, url_values, vary)
+        cached = self.store.get(key)
+        if cached is not None:
+            response = self._make_response(request, cached)
+            if response is not None:
+                return response
+
+        if request.method.upper() == 'HEAD':
+            # Don't format a body just to cache it; the dispatcher can
+            # answer HEAD requests without one.
+            return await handle(request, url_values)
+
+        data = await handle(request, url_values)
+        if data is None or isinstance(data, BaseResponse):
+            return data
+
+        mime_type, body = self._format(resource, data)
+        if isawaitable(body):
+            body = await body
+        return self._store(key, ttl, mime_type, body)
+
+    def _format(self, resource, data):
+        # Do what the dispatcher would have done with the resource data,
+        # so that the formatted response can be cached.
+        dispatcher = ctx.dispatcher
+        process = dispatcher.get_post_processor(resource)
+        format = dispatcher.get_formatter(resource)
+        return format(process(data))
+
+    def _store(self, key, ttl, mime_type, body):
+        response = ctx.dispatcher.response_class(
+            body, mimetype=mime_type,
+            status=ctx.response.get('status'),
+            headers=ctx.response.get('headers'),
+        )
+
+        if response.status_code == 200 and not response.is_streamed:
+            cached = CachedResponse(
+                response.status_code,
+                [(k, v) for k, v in response.headers
+                 if k.lower() not in ('content-type', 'content-length')],
+                response.mimetype,
+                response.get_data(),
+            )
+            self.store.set(key, cached, ttl)
+
+        return response
+
+    def _make_response(self, request, cached):
+        # Answer a request from a cached response, checking its
+        # conditional headers against the validators (ETag and
+        # Last-Modified) that were sent with the response. Nothing is
+        # returned if there aren't any to check them against.
+        headers = Headers(cached.headers)
+        etag = headers.get('ETag')
+        last_modified = parse_date(headers.get('Last-Modified'))
+
+        if etag is not None or last_modified is not None:
+            if etag is not None:
+                etag, _ = unquote_etag(etag)
+            if not check_preconditions(request, etag, last_modified):
+                return ctx.dispatcher.response_class(
+                    status=304, headers=headers)
+        elif any(name.startswith('HTTP_IF_') for name in request.environ):
+            return None
+
+        return ctx.dispatcher.response_class(
+            cached.body, status=cached.status, headers=headers,
+            mimetype=cached.mimetype)
+
+    def __find_owners(self, app):
+        owners = {}
+        for resource in app.endpoints.values():
+            if isinstance(resource, Collection):
+                child, _ = resource.collects
+                owners.setdefault(child.name, []).append(resource.name)
+        self._owners = owners
+
+
+class AbstractCacheStore(metaclass=ABCMeta):
+    """
+    An abstract store for cached responses.
+
+    Keys are hashable tuples of strings, numbers and ``None``; values are
+    :class:`CachedResponse` tuples.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """
+        Return the response stored for *key*, or ``None`` if there isn't
+        one (or it has expired).
+        """
+
+    @abstractmethod
+    def set(self, key, response, ttl):
+        """Store a response for *key*, for *ttl* seconds."""
+
+    @abstractmethod
+    def clear(self):
+        """Discard all of the stored responses."""
+
+
+class MemoryCacheStore(AbstractCacheStore):
+    """
+    A thread-safe, in-memory cache store that holds up to *maxsize*
+    responses, discarding the least recently used ones first.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.items = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is not None:
+            expires, response = item
+            if expires > monotonic():
+                return response
+
+            try:
+                del self.items[key]
+            except KeyError:
+                pass
+
+    def set(self, key, response, ttl):
+        self.items[key] = (monotonic() + ttl, response)
+
+    def clear(self):
+        self.items.clear()
+
+
+def _freeze(url_values):
+    return tuple(sorted(url_values.items()))
+
+
+__all__ = ['ResponseCache', 'AbstractCacheStore', 'MemoryCacheStore',
+           'CachedResponse']
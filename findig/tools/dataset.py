@@ -2,6 +2,7 @@ from abc import ABCMeta, abstractmethod
 from collections.abc import Callable, Iterable, Mapping, MutableMapping
 from contextlib import contextmanager
 from itertools import islice
+import heapq
 
 from werkzeug.utils import cached_property
 
@@ -73,7 +74,7 @@ class AbstractDataSet(Iterable, metaclass=ABCMeta):
         present on the record), otherwise it is compared against the field
         for equality.
         """
-        return FilteredDataSet(self, **search_spec)
+        return QueryDataSet(self, QueryPlan().filter(**search_spec))
 
     def limit(self, count, offset=0):
         """
@@ -83,7 +84,7 @@ class AbstractDataSet(Iterable, metaclass=ABCMeta):
         :param count: The maximum number of items to return
 
         """
-        return DataSetSlice(self, offset, offset+count)
+        return QueryDataSet(self, QueryPlan().limit(count, offset))
 
     def sorted(self, *sort_spec, descending=False):
         """
@@ -101,7 +102,92 @@ class AbstractDataSet(Iterable, metaclass=ABCMeta):
         those that don't.
 
         """
-        return OrderedDataSet(self, *sort_spec, descending=descending)
+        return QueryDataSet(
+            self, QueryPlan().sort(*sort_spec, descending=descending))
+
+    def project(self, *fields):
+        """
+        Return a view of this data set whose records only have the given
+        fields.
+
+        Unknown field names are ignored. Implementations backed by a
+        database should only fetch the given fields from it; the
+        default implementation reads each record in full, and then
+        discards the other fields.
+        """
+        return QueryDataSet(self, QueryPlan().project(*fields))
+
+    def count(self):
+        """
+        Return the number of items in the data set.
+
+        The default implementation iterates through the data set; data
+        sets should override it if their backend can count the items
+        without reading them.
+        """
+        return sum(1 for _ in self)
+
+    def compile_plan(self, plan):
+        """
+        Compile a :class:`QueryPlan` for this data set.
+
+        Return a pair ``(dataset, rest)``, where *dataset* is a data set
+        that runs as much of the plan as the backend can, and *rest* is a
+        :class:`QueryPlan` with the parts of it that have to be run in
+        Python over *dataset*'s items.
+
+        The default implementation pushes each part of the plan down
+        through this data set's :meth:`filtered`, :meth:`sorted`,
+        :meth:`limit` and :meth:`project` methods, if the data set
+        overrides them to query its backend (that is, if they don't
+        return a generic :class:`QueryDataSet`). Predicates and sort key
+        functions are never pushed down, and neither is any part of the
+        plan that depends on a part that couldn't be.
+        """
+        ds, rest = self, plan
+
+        search = {k: v for k, v in rest.filters.items()
+                  if not isinstance(v, Callable)}
+        if search:
+            ds, pushed = _push_down(ds, 'filtered', **search)
+            if pushed:
+                rest = rest.replace(filters={
+                    k: v for k, v in rest.filters.items() if k not in search
+                })
+
+        if rest.order and not any(isinstance(k, Callable) for k in rest.order):
+            ds, pushed = _push_down(
+                ds, 'sorted', *rest.order, descending=rest.descending)
+            if pushed:
+                rest = rest.replace(order=(), descending=False)
+
+        # A slice can only be taken after all of the filters and sorting
+        # have been run.
+        if rest.count is not None and not rest.filters and not rest.order:
+            ds, pushed = _push_down(ds, 'limit', rest.count, rest.offset)
+            if pushed:
+                rest = rest.replace(offset=0, count=None)
+
+        # Likewise, a projection can only be taken if none of the fields
+        # that are still to be filtered or sorted on are dropped.
+        if rest.fields is not None \
+                and rest.needed_fields() <= set(rest.fields):
+            ds, pushed = _push_down(ds, 'project', *rest.fields)
+            if pushed:
+                rest = rest.replace(fields=None)
+
+        return ds, rest
+
+    def explain(self):
+        """
+        Return a description of how the data set's items are queried.
+
+        For views built with :meth:`filtered`, :meth:`sorted`,
+        :meth:`limit` and :meth:`project`, this shows the data set that
+        the backend queries, and which parts of the query were pushed down
+        to it and which are run in Python (see :meth:`compile_plan`).
+        """
+        return repr(self)
 
 
 class MutableDataSet(AbstractDataSet, metaclass=ABCMeta):
@@ -113,6 +199,16 @@ class MutableDataSet(AbstractDataSet, metaclass=ABCMeta):
     def add(self, data):
         """Add a new child item to the data set."""
 
+    def add_many(self, items):
+        """
+        Add several new child items to the data set, and return a list of
+        the keys that :meth:`add` returned for each of them, in order.
+
+        The default implementation calls :meth:`add` for each item; data
+        sets should override it if they can store the items in bulk.
+        """
+        return [self.add(data) for data in items]
+
 
 class AbstractRecord(Mapping, metaclass=ABCMeta):
     """
@@ -144,6 +240,25 @@ class AbstractRecord(Mapping, metaclass=ABCMeta):
         values.
         """
 
+    def version(self):
+        """
+        Return a value that changes whenever the record's data does,
+        or ``None`` if the record isn't versioned (the default).
+
+        Implementations should be able to do this without reading the
+        record's data, so that conditional requests for the record can be
+        answered cheaply (see :class:`findig.data_model.AbstractDataModel`).
+        """
+        return None
+
+    def project(self, *fields):
+        """
+        Return a view of this record that only has the given fields.
+
+        See :meth:`AbstractDataSet.project`.
+        """
+        return ProjectedRecord(self, *fields)
+
 
 class MutableRecord(MutableMapping, AbstractRecord, metaclass=ABCMeta):
     """
@@ -214,6 +329,12 @@ class LazyRecord(AbstractRecord):
     def read(self):
         return self.record
 
+    def version(self):
+        return self.record.version()
+
+    def project(self, *fields):
+        return self.record.project(*fields)
+
     @cached_property
     def record(self):
         return self.func()
@@ -316,6 +437,10 @@ class DataSetSlice(AbstractDataSet):
     def __iter__(self):
         yield from islice(self.ds, self.start, self.stop, self.step)
 
+    def count(self):
+        return _slice_count(_count(self.ds), self.start, self.stop,
+                            self.step)
+
     def __repr__(self):
         return "{!r}[{}:{}]".format(
             self.ds,
@@ -324,19 +449,339 @@ class DataSetSlice(AbstractDataSet):
         )
 
 
+class ProjectedDataSet(AbstractDataSet):
+    """
+    A concrete implementation of a data set that wraps another data set
+    and only exposes some of the fields of its records.
+    """
+    def __init__(self, dataset, *fields):
+        self.ds = dataset
+        self.fields = fields
+
+    def __iter__(self):
+        for record in self.ds:
+            if isinstance(record, AbstractRecord):
+                yield record.project(*self.fields)
+            else:
+                yield ProjectedRecord(record, *self.fields)
+
+    def count(self):
+        return _count(self.ds)
+
+    def __repr__(self):
+        return "<projected-view[{}] of {!r}>".format(
+            ", ".join(self.fields),
+            self.ds
+        )
+
+
+class ProjectedRecord(AbstractRecord):
+    """
+    A record that wraps another record (or mapping), and only exposes
+    some of its fields.
+    """
+    def __init__(self, record, *fields):
+        self.record = record
+        self.fields = fields
+
+    def read(self):
+        record = self.record
+        return {k: record[k] for k in self.fields if k in record}
+
+    def version(self):
+        version = getattr(self.record, 'version', None)
+        return None if version is None else version()
+
+
+class QueryPlan:
+    """
+    A declarative description of a query over a data set: a filter, a
+    sort order, a slice and a projection, which are run in that order.
+
+    Plans are immutable; the :meth:`filter`, :meth:`sort`, :meth:`limit`
+    and :meth:`project` methods return a new plan with a step added, or
+    ``None`` if the step can't be merged into the plan (because running
+    it in the plan's order would give different results than running it
+    after the plan).
+
+    :param filters: A filter specification, as taken by
+        :meth:`AbstractDataSet.filtered`.
+    :param order: A sort specification, as taken by
+        :meth:`AbstractDataSet.sorted`.
+    :param descending: Whether the items are sorted in descending order.
+    :param offset: The number of items to skip.
+    :param count: The maximum number of items, or ``None``.
+    :param fields: The fields that records are projected onto, or
+        ``None``.
+
+    """
+    __slots__ = ('filters', 'order', 'descending', 'offset', 'count',
+                 'fields')
+
+    def __init__(self, filters=None, order=(), descending=False, offset=0,
+                 count=None, fields=None):
+        self.filters = {} if filters is None else dict(filters)
+        self.order = tuple(order)
+        self.descending = descending
+        self.offset = offset
+        self.count = count
+        self.fields = None if fields is None else tuple(fields)
+
+    def __eq__(self, other):
+        if not isinstance(other, QueryPlan):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a)
+                   for a in self.__slots__)
+
+    def __repr__(self):
+        return "<query-plan {}>".format(self)
+
+    def __str__(self):
+        return " | ".join(self.steps()) or "(everything)"
+
+    def replace(self, **changes):
+        """Return a copy of the plan with some of its attributes changed."""
+        attrs = {a: getattr(self, a) for a in self.__slots__}
+        attrs.update(changes)
+        return QueryPlan(**attrs)
+
+    def filter(self, **search_spec):
+        if self._sliced() or set(search_spec) & set(self.filters) \
+                or not self._projects(set(search_spec)):
+            return None
+        filters = dict(self.filters)
+        filters.update(search_spec)
+        return self.replace(filters=filters)
+
+    def sort(self, *sort_spec, descending=False):
+        if not sort_spec:
+            return self
+        elif self._sliced() or self.order \
+                or not self._projects(self._names(sort_spec)):
+            return None
+        return self.replace(order=sort_spec, descending=descending)
+
+    def limit(self, count, offset=0):
+        offset += self.offset
+        if self.count is not None:
+            count = max(0, min(count, self.count + self.offset - offset))
+        return self.replace(offset=offset, count=count)
+
+    def project(self, *fields):
+        if self.fields is not None:
+            fields = [f for f in fields if f in self.fields]
+        return self.replace(fields=fields)
+
+    def needed_fields(self):
+        """
+        Return the set of fields that the plan's filter and sort order
+        read.
+        """
+        return set(self.filters) | self._names(self.order)
+
+    def pushed_down(self, rest):
+        """
+        Return the parts of this plan that aren't in *rest*, the part
+        of it left over by :meth:`AbstractDataSet.compile_plan`.
+        """
+        sliced = self._sliced() and not rest._sliced()
+        return QueryPlan(
+            filters={k: v for k, v in self.filters.items()
+                     if k not in rest.filters},
+            order=() if rest.order else self.order,
+            descending=False if rest.order else self.descending,
+            offset=self.offset if sliced else 0,
+            count=self.count if sliced else None,
+            fields=self.fields if rest.fields is None else None,
+        )
+
+    def steps(self):
+        """
+        Return a list of descriptions of the steps in the plan.
+        """
+        steps = []
+        if self.filters:
+            steps.append("filtered({})".format(", ".join(
+                "{}={}".format(k, _describe(v))
+                for k, v in self.filters.items()
+            )))
+        if self.order:
+            steps.append("sorted({}{})".format(
+                ", ".join(_describe(k) for k in self.order),
+                ", descending=True" if self.descending else ""
+            ))
+        if self._sliced():
+            steps.append("limit({}, offset={})".format(
+                self.count, self.offset))
+        if self.fields is not None:
+            steps.append("project({})".format(", ".join(self.fields)))
+        return steps
+
+    def apply(self, dataset):
+        """
+        Run the plan in Python over the items of a data set (or any
+        iterable of records), and return a view of the results.
+        """
+        if self.filters:
+            dataset = FilteredDataSet(dataset, **self.filters)
+        if self.order:
+            # If the sorted items are sliced, only the items up to the end
+            # of the slice have to be kept while sorting.
+            dataset = OrderedDataSet(
+                dataset, *self.order, descending=self.descending,
+                first=None if self.count is None
+                else self.offset + self.count)
+        if self._sliced():
+            dataset = DataSetSlice(
+                dataset, self.offset,
+                None if self.count is None else self.offset + self.count)
+        if self.fields is not None:
+            dataset = ProjectedDataSet(dataset, *self.fields)
+        return dataset
+
+    def _sliced(self):
+        return self.offset > 0 or self.count is not None
+
+    def _projects(self, fields):
+        # Whether records still have all of the fields after the
+        # projection.
+        return self.fields is None or fields <= set(self.fields)
+
+    @staticmethod
+    def _names(sort_spec):
+        if any(isinstance(k, Callable) for k in sort_spec):
+            # A sort key function could read any field.
+            return {None}
+        return set(sort_spec)
+
+
+class QueryDataSet(AbstractDataSet):
+    """
+    A view of a data set that runs a :class:`QueryPlan` over it.
+
+    This is what :meth:`AbstractDataSet.filtered`,
+    :meth:`~AbstractDataSet.sorted`, :meth:`~AbstractDataSet.limit` and
+    :meth:`~AbstractDataSet.project` return, unless the data set
+    overrides them. Chaining these methods on the view adds to its plan
+    where possible, and the plan is compiled with the wrapped data set's
+    :meth:`~AbstractDataSet.compile_plan` when the view is iterated, so
+    that the backend runs as much of it as it can.
+    """
+    def __init__(self, dataset, plan):
+        self.ds = dataset
+        self.plan = plan
+
+    def __iter__(self):
+        ds, rest = self.ds.compile_plan(self.plan)
+        yield from rest.apply(ds)
+
+    def __repr__(self):
+        return "<query-view({!r})|{}>".format(self.ds, self.plan)
+
+    def filtered(self, **search_spec):
+        return self._add_step(self.plan.filter(**search_spec),
+                              QueryPlan().filter(**search_spec))
+
+    def sorted(self, *sort_spec, descending=False):
+        return self._add_step(
+            self.plan.sort(*sort_spec, descending=descending),
+            QueryPlan().sort(*sort_spec, descending=descending))
+
+    def limit(self, count, offset=0):
+        return self._add_step(self.plan.limit(count, offset),
+                              QueryPlan().limit(count, offset))
+
+    def project(self, *fields):
+        return self._add_step(self.plan.project(*fields),
+                              QueryPlan().project(*fields))
+
+    def count(self):
+        # Sorting and projecting the items doesn't change how many there
+        # are, so only the filters and the slice are run.
+        ds, rest = self.ds.compile_plan(self.plan)
+        if rest.filters:
+            total = FilteredDataSet(ds, **rest.filters).count()
+        else:
+            total = ds.count()
+        return _slice_count(total, rest.offset, None if rest.count is None
+                            else rest.offset + rest.count)
+
+    def explain(self):
+        ds, rest = self.ds.compile_plan(self.plan)
+        lines = [ds.explain()]
+        pushed = self.plan.pushed_down(rest).steps()
+        if pushed:
+            lines.append("pushed down: " + " | ".join(pushed))
+        if rest.steps():
+            lines.append("in python: " + " | ".join(rest.steps()))
+        return "\n".join(lines)
+
+    def _add_step(self, merged, step):
+        if merged is not None:
+            return QueryDataSet(self.ds, merged)
+        else:
+            # The step has to run after this view's plan.
+            return QueryDataSet(self, step)
+
+
+def _push_down(dataset, method, *args, **kwargs):
+    # Apply a query method to a data set, and return the result and
+    # whether the data set's backend ran it (rather than a generic view).
+    result = getattr(dataset, method)(*args, **kwargs)
+    if isinstance(result, QueryDataSet):
+        return dataset, False
+    else:
+        return result, True
+
+
+def _count(dataset):
+    # Count the items of a data set, or of any other iterable.
+    if isinstance(dataset, AbstractDataSet):
+        return dataset.count()
+    else:
+        return sum(1 for _ in dataset)
+
+
+def _slice_count(total, start, stop=None, step=None):
+    # The number of items in a slice of a data set with *total* items.
+    return len(range(*slice(start, stop, step).indices(total)))
+
+
+def _describe(value):
+    if isinstance(value, Callable) and hasattr(value, '__name__'):
+        return value.__name__
+    else:
+        return repr(value)
+
+
 class OrderedDataSet(AbstractDataSet):
     """
     A concrete implementation of a data set that wraps another data set
     and returns its items in order.
+
+    :param first: If given, only this many of the first items in order
+        are returned. They're picked with a bounded heap, so that only
+        that many items are held in memory while the wrapped data set is
+        read.
     """
-    def __init__(self, dataset, *sort_spec, descending=False):
+    def __init__(self, dataset, *sort_spec, descending=False, first=None):
         self.ds = dataset
         self.ss = sort_spec
         self.rv = descending
+        self.first = first
 
     def __iter__(self):
-        yield from sorted(
-            self.ds, key=self.make_key(*self.ss), reverse=self.rv)
+        key = self.make_key(*self.ss)
+        if self.first is None:
+            yield from sorted(self.ds, key=key, reverse=self.rv)
+        elif self.rv:
+            yield from heapq.nlargest(self.first, self.ds, key=key)
+        else:
+            yield from heapq.nsmallest(self.first, self.ds, key=key)
+
+    def count(self):
+        total = _count(self.ds)
+        return total if self.first is None else min(total, self.first)
 
     def __repr__(self):
         return "<sorted-view[{}] of {!r}>".format(
@@ -356,6 +801,8 @@ class OrderedDataSet(AbstractDataSet):
                 return tuple(record.get(k, extremum()) for k in sort_spec)
             return keyfunc
 
+
 __all__ = ['AbstractDataSet', 'AbstractRecord', 'MutableDataSet',
            'MutableRecord', 'FilteredDataSet', 'DataSetSlice',
-           'OrderedDataSet']
+           'OrderedDataSet', 'ProjectedDataSet', 'ProjectedRecord',
+           'QueryPlan', 'QueryDataSet']
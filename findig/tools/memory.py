@@ -0,0 +1,434 @@
+"""
+The :mod:`findig.tools.memory` module defines :class:`MemorySet`, a data
+set that keeps its items in memory, and answers queries from indexes that
+it maintains on their fields::
+
+    teams = MemorySet(key='id', indexes=['league'], sorted_indexes=['rank'])
+    teams.add({'id': 1, 'league': "east", 'rank': 3})
+
+    @app.route("/teams/")
+    @app.resource
+    def team_list():
+        return teams.filtered(league="east").sorted('rank').limit(10)
+
+It's a good fit for reference data that's read far more often than it's
+changed, and a fast stand-in for a database-backed data set in tests and
+benchmarks.
+
+"""
+
+from bisect import bisect_left, insort
+from collections.abc import Callable, Hashable
+from contextlib import contextmanager
+from itertools import count, islice
+from threading import RLock
+
+from findig.tools.dataset import (AbstractDataSet, FilteredDataSet,
+                                  MutableDataSet, MutableRecord)
+from findig.utils import extremum
+
+
+# Sorted index entries for items without the field come last, like
+# they do in OrderedDataSet.
+_MISSING = extremum()
+
+
+class MemorySet(MutableDataSet):
+    """
+    MemorySet(items=(), key='id', indexes=(), sorted_indexes=())
+
+    A thread-safe, in-memory data set with hash and sorted indexes.
+
+    :param items: Items (mappings) that the set starts out with.
+    :param key: The name of the field that identifies an item. Items that
+        are added without it are given a generated integer id.
+    :param indexes: The names of fields to keep hash indexes for. Filters
+        that test these fields for equality (and :meth:`fetch_now` calls
+        that look items up by them) only look at the matching items,
+        instead of every item in the set.
+    :param sorted_indexes: The names of fields to keep sorted indexes for.
+        Sorting the set by one of these fields (see
+        :meth:`~findig.tools.dataset.AbstractDataSet.sorted`) walks the
+        index instead of sorting the items, so that taking the first
+        few of them is cheap. They also answer range queries
+        (:meth:`between`). The values of these fields must be comparable
+        with each other.
+
+    Chains of :meth:`~findig.tools.dataset.AbstractDataSet.filtered`,
+    :meth:`~findig.tools.dataset.AbstractDataSet.sorted` and
+    :meth:`~findig.tools.dataset.AbstractDataSet.limit` calls on the set
+    are answered from its indexes when it compiles their query plan (see
+    :meth:`~findig.tools.dataset.AbstractDataSet.compile_plan`).
+
+    The items are copied into the set, and records read from it are
+    snapshots: they aren't changed by later writes to the set.
+
+    """
+
+    def __init__(self, items=(), key='id', indexes=(), sorted_indexes=()):
+        self.key = key
+        self._lock = RLock()
+        self._items = {}
+        self._seqs = {}
+        self._versions = {}
+        self._next_seq = count()
+        self._last_id = 0
+        self._hash_indexes = {field: {} for field in indexes}
+        self._sorted_indexes = {field: [] for field in sorted_indexes}
+        self.add_many(items)
+
+    def __iter__(self):
+        return iter(_MemoryView(self))
+
+    def __repr__(self):
+        return "<memory-set(key={!r})>".format(self.key)
+
+    def add(self, data):
+        return self.add_many([data])[0]
+
+    def add_many(self, items):
+        keys = []
+        with self._lock:
+            for data in items:
+                data = dict(data)
+                if self.key not in data:
+                    data[self.key] = self._generate_id()
+
+                id = data[self.key]
+                if isinstance(id, int) and id > self._last_id:
+                    self._last_id = id
+                if id in self._items:
+                    raise ValueError(
+                        "An item with {}={!r} already exists."
+                        .format(self.key, id))
+
+                self._seqs[id] = next(self._next_seq)
+                try:
+                    self._index(id, data)
+                except TypeError:
+                    del self._seqs[id]
+                    raise
+                self._items[id] = data
+                self._versions[id] = 1
+                keys.append({self.key: id})
+        return keys
+
+    def count(self):
+        with self._lock:
+            return len(self._items)
+
+    def fetch_now(self, **spec):
+        for record in _MemoryView(self, spec, count=1):
+            return record
+        else:
+            raise LookupError("No matching item found.")
+
+    def between(self, field, start=None, stop=None):
+        """
+        Return a view of the items whose *field* is at least *start* and
+        less than *stop* (either of which may be ``None`` to leave the
+        range open), in order. Items without the field aren't included.
+
+        The field must have a sorted index.
+        """
+        if field not in self._sorted_indexes:
+            raise ValueError("{!r} doesn't have a sorted index."
+                             .format(field))
+        return _MemoryView(self, order=field, bounds=(start, stop))
+
+    def clear(self):
+        """Remove all of the items from the set."""
+        with self._lock:
+            self._items.clear()
+            self._seqs.clear()
+            self._versions.clear()
+            for buckets in self._hash_indexes.values():
+                buckets.clear()
+            for entries in self._sorted_indexes.values():
+                del entries[:]
+
+    def compile_plan(self, plan):
+        lookup = self._lookup_fields(plan.filters)
+        order = plan.order[0] if len(plan.order) == 1 else None
+
+        if not plan.order or (order in self._sorted_indexes and not lookup):
+            # The whole plan (except for the projection) is answered
+            # from the indexes.
+            view = _MemoryView(self, plan.filters, order, plan.descending,
+                               plan.offset, plan.count)
+            rest = plan.replace(filters={}, order=(), descending=False,
+                                offset=0, count=None)
+        else:
+            # The items that an index lookup finds are sorted in Python.
+            view = _MemoryView(self, plan.filters)
+            rest = plan.replace(filters={})
+
+        return view, rest
+
+    def _select(self, filters, order=None, descending=False, offset=0,
+                count=None, bounds=None):
+        # Return a list of (id, data) pairs for the items that match a
+        # query, in order.
+        if count == 0:
+            return []
+
+        with self._lock:
+            ids = self._candidates(filters, order, descending, bounds)
+            items = self._items
+            if not filters:
+                ids = islice(ids, offset, None if count is None
+                             else offset + count)
+                return [(id, items[id]) for id in ids]
+
+            results = []
+            for id in ids:
+                data = items[id]
+                if FilteredDataSet.check_match(data, filters):
+                    if offset:
+                        offset -= 1
+                    else:
+                        results.append((id, data))
+                        if len(results) == count:
+                            break
+            return results
+
+    def _count(self, filters, order, descending, offset, count, bounds):
+        with self._lock:
+            lookup = self._lookup_fields(filters)
+            if not filters and bounds is not None:
+                entries = self._sorted_indexes[order]
+                start, stop = bounds
+                total = (
+                    bisect_left(entries, (_MISSING if stop is None else stop,))
+                    - (0 if start is None else bisect_left(entries, (start,)))
+                )
+            elif not filters:
+                total = len(self._items)
+            elif lookup == list(filters) and len(lookup) == 1 \
+                    and lookup[0] != self.key:
+                # A single hash index lookup; the bucket has every match.
+                total = len(self._hash_indexes[lookup[0]].get(
+                    filters[lookup[0]], ()))
+            else:
+                return len(self._select(filters, order, descending, offset,
+                                        count, bounds))
+
+        stop = None if count is None else offset + count
+        return len(range(*slice(offset, stop).indices(max(total, 0))))
+
+    def _explain_access(self, filters, order, bounds):
+        lookup = self._lookup_fields(filters)
+        if lookup:
+            return "hash index lookup ({})".format(", ".join(lookup))
+        elif bounds is not None:
+            return "sorted index range scan ({})".format(order)
+        elif order is not None:
+            return "sorted index scan ({})".format(order)
+        else:
+            return "full scan"
+
+    def _candidates(self, filters, order, descending, bounds):
+        lookup = self._lookup_fields(filters)
+        if self.key in lookup:
+            id = filters[self.key]
+            return [id] if id in self._items else []
+
+        elif lookup:
+            indexes = self._hash_indexes
+            ids = min((indexes[f].get(filters[f], ()) for f in lookup),
+                      key=len)
+            # An item moves to the end of its bucket when it's changed,
+            # so the bucket is put back in the order of the set.
+            ids = sorted(ids, key=self._seqs.__getitem__)
+            if order is not None:
+                ids.sort(key=lambda id: self._items[id].get(order, _MISSING),
+                         reverse=descending)
+            return ids
+
+        elif order is not None:
+            entries = self._sorted_indexes[order]
+            start, stop = 0, len(entries)
+            if bounds is not None:
+                # Items without the field aren't in any range.
+                if bounds[0] is not None:
+                    start = bisect_left(entries, (bounds[0],))
+                stop = bisect_left(entries, (
+                    _MISSING if bounds[1] is None else bounds[1],))
+            if descending:
+                return _descending(entries, start, stop)
+            else:
+                return (entries[i][2] for i in range(start, stop))
+
+        else:
+            return iter(self._items)
+
+    def _lookup_fields(self, filters):
+        # The filtered fields that an index can look up.
+        return [
+            field for field, value in filters.items()
+            if (field == self.key or field in self._hash_indexes)
+            and isinstance(value, Hashable)
+            and not isinstance(value, Callable)
+        ]
+
+    def _generate_id(self):
+        # Generated ids follow the largest one that the set has seen, so
+        # that the ids of deleted items aren't reused.
+        self._last_id += 1
+        return self._last_id
+
+    def _index(self, id, data):
+        seq = self._seqs[id]
+        added = []
+        try:
+            for field, entries in self._sorted_indexes.items():
+                insort(entries, (data.get(field, _MISSING), seq, id))
+                added.append(field)
+        except TypeError:
+            for field in added:
+                self._unindex_sorted(field, id, data)
+            raise
+
+        for field, buckets in self._hash_indexes.items():
+            value = data.get(field)
+            if isinstance(value, Hashable):
+                buckets.setdefault(value, {})[id] = None
+
+    def _unindex(self, id, data):
+        for field in self._sorted_indexes:
+            self._unindex_sorted(field, id, data)
+
+        for field, buckets in self._hash_indexes.items():
+            value = data.get(field)
+            if isinstance(value, Hashable) and value in buckets:
+                bucket = buckets[value]
+                bucket.pop(id, None)
+                if not bucket:
+                    del buckets[value]
+
+    def _unindex_sorted(self, field, id, data):
+        entries = self._sorted_indexes[field]
+        del entries[bisect_left(
+            entries, (data.get(field, _MISSING), self._seqs[id], id))]
+
+    def _read(self, id):
+        with self._lock:
+            try:
+                return self._items[id]
+            except KeyError:
+                raise LookupError("The item no longer exists.")
+
+    def _patch(self, id, add_data, remove_fields, replace):
+        with self._lock:
+            old = self._read(id)
+            new = {self.key: id} if replace else dict(old)
+            for field in remove_fields:
+                new.pop(field, None)
+            new.update(add_data)
+            if new.get(self.key) != id:
+                raise ValueError("An item's {!r} can't be changed."
+                                 .format(self.key))
+
+            self._unindex(id, old)
+            try:
+                self._index(id, new)
+            except TypeError:
+                self._index(id, old)
+                raise
+            self._items[id] = new
+            self._versions[id] += 1
+            return new
+
+    def _delete(self, id):
+        with self._lock:
+            self._unindex(id, self._read(id))
+            del self._items[id]
+            del self._seqs[id]
+            del self._versions[id]
+
+
+class MemoryRecord(MutableRecord):
+    """
+    A record of an item in a :class:`MemorySet`.
+
+    Edit blocks hold the set's lock, so that the edits made in them (and
+    reads of the set by other threads) don't interleave.
+    """
+    def __init__(self, dataset, id, data=None):
+        self.ds = dataset
+        self.id = id
+        if data is not None:
+            self.__dict__['cached_data'] = data
+
+    def __repr__(self):
+        return "<item({!r}) of {!r}>".format(self.id, self.ds)
+
+    def read(self):
+        return self.ds._read(self.id)
+
+    def patch(self, add_data, remove_fields, replace=False):
+        self.invalidate(
+            self.ds._patch(self.id, add_data, remove_fields, replace))
+
+    def delete(self):
+        self.ds._delete(self.id)
+        self.invalidate()
+
+    def version(self):
+        with self.ds._lock:
+            return self.ds._versions.get(self.id)
+
+    def start_edit_block(self):
+        self.ds._lock.acquire()
+
+    def close_edit_block(self, token):
+        self.ds._lock.release()
+
+    @contextmanager
+    def edit_block(self):
+        # The lock is released even if an edit fails, since other threads
+        # would otherwise wait on it forever.
+        token = self.start_edit_block()
+        try:
+            yield token
+        finally:
+            self.close_edit_block(token)
+
+
+class _MemoryView(AbstractDataSet):
+    # The items of a MemorySet that match a query, read from a snapshot
+    # taken when the view is iterated.
+    def __init__(self, dataset, filters=None, order=None, descending=False,
+                 offset=0, count=None, bounds=None):
+        self.ms = dataset
+        self.query = dict(filters=filters or {}, order=order,
+                          descending=descending, offset=offset, count=count,
+                          bounds=bounds)
+
+    def __iter__(self):
+        for id, data in self.ms._select(**self.query):
+            yield MemoryRecord(self.ms, id, data)
+
+    def __repr__(self):
+        return "<query-view({!r})>".format(self.ms)
+
+    def count(self):
+        return self.ms._count(**self.query)
+
+    def explain(self):
+        query = self.query
+        return "{!r}\nmemory: {}".format(self.ms, self.ms._explain_access(
+            query['filters'], query['order'], query['bounds']))
+
+
+def _descending(entries, start, stop):
+    # Walk the index backwards, keeping items with equal values in the
+    # order they were added (as a stable, reversed sort would).
+    while stop > start:
+        run = bisect_left(entries, (entries[stop - 1][0],), start, stop)
+        for i in range(run, stop):
+            yield entries[i][2]
+        stop = run
+
+
+__all__ = ['MemorySet', 'MemoryRecord']
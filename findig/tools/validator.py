@@ -530,9 +530,15 @@ tzinfo=datetime.timezone(datetime.timedelta(0, 14400)))
             elif extras:
                 raise UnexpectedFields(extras, self)
 
-            # Check for required fields
-            missing = [field for field, required in restrictions.items()
-                       if required and field not in data]
+            # Check for required fields (PATCH requests only send the
+            # fields that they change, but can't remove required ones)
+            if ctx.request.method.upper() == 'PATCH':
+                missing = [field for field, required in restrictions.items()
+                           if required and field in data
+                           and data[field] is None]
+            else:
+                missing = [field for field, required in restrictions.items()
+                           if required and field not in data]
             if missing:
                 raise MissingFields(missing, self)
 
@@ -554,6 +560,11 @@ tzinfo=datetime.timezone(datetime.timedelta(0, 14400)))
         **This is an internal method.**
 
         """
+        if isinstance(data, list) and isinstance(ctx.resource, Collection) \
+                and ctx.request.method.upper() == 'POST':
+            # A list of items to create; each one is validated.
+            return [self.validate(item) for item in data]
+
         spec = {}
         spec.update(self.validation_specs.get(None, {}))
         if self.include_collections and isinstance(ctx.resource, Collection):
@@ -568,6 +579,7 @@ tzinfo=datetime.timezone(datetime.timedelta(0, 14400)))
         wrapped = self.__handle_restrictions(_ContainerWrapper(data))
 
         conversion_errs = []
+        patching = ctx.request.method.upper() == 'PATCH'
 
         # Transform the data according to the conversion spec
         for field, field_spec in spec.items():
@@ -575,6 +587,10 @@ tzinfo=datetime.timezone(datetime.timedelta(0, 14400)))
             if field not in wrapped:
                 continue
 
+            # A null field in a PATCH request removes the field
+            if patching and wrapped[field] is None:
+                continue
+
             try:
                 converted = self.__check_item(wrapped, field, field_spec)
             except InvalidSpecificationError:
@@ -1,5 +1,7 @@
+from collections import OrderedDict
 from collections.abc import Callable, Iterable
 from functools import reduce
+from threading import Lock
 import re
 
 
@@ -85,6 +87,7 @@ class DataPipe:
     """
     def __init__(self, *funcs):
         self.funcs = []
+        self.revision = 0
 
         for func in funcs:
             if isinstance(func, DataPipe):
@@ -103,7 +106,76 @@ class DataPipe:
 
         """
         self.funcs.append(func)
+        self.revision += 1
         return func
 
     def __call__(self, data):
         return reduce(lambda x, f: f(x), self.funcs, data)
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe cache that discards its least recently used
+    items once it holds more than *maxsize* of them.
+
+    :param maxsize: The maximum number of items the cache will hold.
+
+    The cache keeps count of lookups that found an item (:attr:`hits`)
+    and lookups that didn't (:attr:`misses`)::
+
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache['a'] = 1
+        >>> cache['b'] = 2
+        >>> cache.get('a')
+        1
+        >>> cache['c'] = 3
+        >>> cache.get('b') is None
+        True
+        >>> cache.hits, cache.misses
+        (1, 1)
+
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the item cached for *key*, or *default* if there isn't one.
+        """
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        """Remove all items from the cache and reset its counters."""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
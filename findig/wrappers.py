@@ -1,9 +1,7 @@
 from werkzeug.utils import cached_property
 from werkzeug.wrappers import Request as Request_
 
-from findig.content import Parser
 from findig.context import ctx
-from findig.utils import DataPipe, tryeach
 
 
 class Request(Request_):
@@ -19,20 +17,12 @@ class Request(Request_):
         Request content that has been parsed into a python object.
         This is a read-only property.
         """
-        parsed = tryeach(
-            [
-                getattr(ctx.resource, 'parser', Parser()),
-                ctx.dispatcher.parser
-            ],
-            self.data
-        )[1]
-
-        process = DataPipe(
-            getattr(ctx.resource, 'pre_processor', None),
-            ctx.dispatcher.pre_processor
-        )
-
-        return process(parsed)
+        dispatcher, resource = ctx.dispatcher, ctx.resource
+
+        parse = dispatcher.get_parser(resource)
+        process = dispatcher.get_pre_processor(resource)
+
+        return process(parse(self.data)[1])
 
 
 __all__ = ['Request']
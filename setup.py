@@ -37,7 +37,7 @@ setup(
 
     keywords="web framework werkzeug REST",
 
-    packages=find_packages(exclude=["test*",]),
+    packages=find_packages(exclude=["test*", "benchmarks*"]),
 
     package_data={
         'findig': ['VERSION.txt'],
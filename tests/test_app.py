@@ -88,6 +88,28 @@ def test_app_context_management(app, environ):
     assert temp_fobj.file.closed
     assert not hasattr(ctx, 'temp_file')
 
+def test_lazy_app_context(app, environ):
+    events = []
+
+    @app.context(lazy=True)
+    def connection():
+        events.append('open')
+        yield 'conn'
+        events.append('close')
+
+    # A request that doesn't use the value never sets it up
+    with app.build_context(environ):
+        pass
+    assert events == []
+
+    with app.build_context(environ):
+        assert ctx.connection == 'conn'
+        assert ctx.connection == 'conn'
+        assert events == ['open']
+
+    assert events == ['open', 'close']
+    assert not hasattr(ctx, 'connection')
+
 def test_cleanup_hook(app, environ):
     items = [49, 48, 43, 42]
 
@@ -119,4 +141,44 @@ def test_late_cleanup_hook(app, environ):
     with app.build_context(environ):
         app.cleanup_hook(items.clear)
 
-    assert items == []
\ No newline at end of file
+    assert items == []
+
+
+def test_request_timing():
+    app = App()
+    received = []
+
+    @app.context
+    def session():
+        yield 'session'
+
+    @app.context(lazy=True)
+    def connection():
+        yield 'connection'
+
+    @app.route("/")
+    def index():
+        return ctx.connection
+
+    @app.timing_subscriber
+    def subscriber(timings):
+        received.append(timings)
+
+    c = Client(app, BaseResponse)
+    response = c.get("/")
+    assert 'Server-Timing' not in response.headers
+
+    phases = [phase for phase, duration in received[0]]
+    assert phases == ['match', 'hook.session', 'hook.connection', 'handle',
+                      'post-process', 'format', 'serialize']
+    assert all(duration >= 0 for phase, duration in received[0])
+
+    app.server_timing = True
+    response = c.get("/")
+    header = response.headers['Server-Timing']
+    assert header.startswith("match;dur=")
+    assert "hook.session;dur=" in header
+
+def test_timing_is_off_by_default(app, environ):
+    with app.build_context(environ):
+        assert ctx.timer is None
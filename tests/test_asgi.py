@@ -0,0 +1,252 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from werkzeug.datastructures import MultiDict
+from werkzeug.wrappers import BaseResponse
+
+from findig import App
+from findig.context import ctx
+from findig.data_model import DataModel
+from findig.json import App as JSONApp
+
+
+def call(app, method="GET", path="/", body=b"", headers=()):
+    # Run a single request through the app's ASGI interface, and
+    # return (status, headers, body).
+    async def run():
+        return await request(app, method, path, body, headers)
+    return asyncio.run(run())
+
+
+async def request(app, method="GET", path="/", body=b"", headers=()):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b"",
+        'headers': [(k.encode(), v.encode()) for k, v in headers],
+    }
+    await app.asgi(scope, receive, send)
+
+    start = sent[0]
+    assert start['type'] == 'http.response.start'
+    body = b"".join(m.get('body', b"") for m in sent[1:])
+    assert not sent[-1].get('more_body', False)
+    return start['status'], MultiDict(start['headers']), body
+
+
+def test_sync_resource():
+    app = App()
+    threads = []
+
+    @app.route("/")
+    def index():
+        threads.append(threading.current_thread())
+        return "Hello"
+
+    status, headers, body = call(app)
+    assert status == 200
+    assert body == b"Hello"
+    assert headers[b'content-type'].startswith(b'text/plain')
+
+    # Synchronous resource functions run in the executor.
+    assert threads[0] is not threading.main_thread()
+
+
+def test_sync_formatting_runs_in_executor():
+    app = App()
+    threads = []
+
+    @app.route("/")
+    async def index():
+        return "Hello"
+
+    @index.formatter.register("text/plain", default=True)
+    def format_text(data):
+        threads.append(threading.current_thread())
+        return data.upper()
+
+    status, headers, body = call(app)
+    assert body == b"HELLO"
+    assert threads[0] is not threading.main_thread()
+
+
+def test_async_resource_and_context():
+    app = JSONApp()
+    events = []
+
+    @app.context
+    async def conn():
+        events.append('open')
+        yield 'connection'
+        events.append('close')
+
+    @app.route("/items/<int:id>")
+    async def item(id):
+        await asyncio.sleep(0)
+        return {'id': id, 'conn': ctx.conn}
+
+    status, _, body = call(app, path="/items/4")
+    assert status == 200
+    assert json.loads(body.decode()) == {'id': 4, 'conn': 'connection'}
+    assert events == ['open', 'close']
+
+
+def test_async_model_actions():
+    app = JSONApp()
+    store = {}
+    model = DataModel()
+
+    @model('write')
+    async def write(data):
+        store.update(data)
+
+    @model('read')
+    async def read():
+        return store
+
+    @app.route("/store")
+    @app.resource(model=model)
+    def storage():
+        pass
+
+    status, _, _ = call(app, "PUT", "/store", b'{"a": 1}',
+                        [('Content-Type', 'application/json')])
+    assert status == 200
+    assert store == {'a': 1}
+
+    status, _, body = call(app, path="/store")
+    assert json.loads(body.decode()) == {'a': 1}
+
+
+def test_concurrent_requests_have_separate_contexts():
+    app = App()
+    arrived = []
+
+    @app.route("/<name>")
+    async def greet(name):
+        arrived.append(name)
+        # Wait until both requests are being handled at the same time.
+        while len(arrived) < 2:
+            await asyncio.sleep(0)
+        return "Hi " + ctx.url_values['name']
+
+    async def run():
+        return await asyncio.gather(
+            request(app, path="/a"), request(app, path="/b"))
+
+    (_, _, a), (_, _, b) = asyncio.run(run())
+    assert (a, b) == (b"Hi a", b"Hi b")
+
+
+def test_errors():
+    app = App()
+
+    @app.route("/fail")
+    async def fail():
+        raise LookupError
+
+    status, _, _ = call(app, path="/fail")
+    assert status == 404
+
+    status, _, _ = call(app, path="/nowhere")
+    assert status == 404
+
+
+def test_head_has_no_body():
+    app = App()
+
+    @app.route("/")
+    async def index():
+        return "Hello"
+
+    status, _, body = call(app, "HEAD")
+    assert status == 200
+    assert body == b""
+
+
+def test_lifespan():
+    app = App()
+    started = []
+    app.startup_hook(lambda: started.append(True))
+
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(app.asgi({'type': 'lifespan'}, receive, send))
+    assert started == [True]
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+
+def test_async_context_unsupported_for_lazy():
+    app = App()
+
+    with pytest.raises(ValueError):
+        @app.context(lazy=True)
+        async def conn():
+            yield 'connection'
+
+
+def test_streamed_response():
+    app = JSONApp(stream=True)
+    closed = []
+
+    @app.context
+    def tracker():
+        yield
+        closed.append(True)
+
+    @app.route("/numbers")
+    def numbers():
+        return (i for i in range(1000))
+
+    status, _, body = call(app, path="/numbers")
+    assert status == 200
+    assert json.loads(body.decode()) == list(range(1000))
+    assert closed == [True]
+
+
+def test_async_conditional_get():
+    app = App()
+
+    @app.route("/")
+    def index():
+        return "Hello"
+
+    @index.model("version")
+    async def version():
+        return 7
+
+    status, headers, body = call(app, headers=[('If-None-Match', '"7"')])
+    assert status == 304
+    assert body == b""
+    assert headers[b'etag'] == b'"7"'
+
+
+def test_repeated_response_headers():
+    app = App()
+
+    @app.route("/")
+    def index():
+        return BaseResponse(headers=[('Set-Cookie', "a=1"),
+                                     ('Set-Cookie', "b=2")])
+
+    status, headers, body = call(app)
+    assert headers.getlist(b'set-cookie') == [b"a=1", b"b=2"]
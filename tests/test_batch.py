@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+
+from findig.context import ctx
+from findig.json import App
+from findig.tools.batch import BatchResource
+
+
+@pytest.fixture
+def app():
+    app = App()
+    app.route(BatchResource(max_operations=5), "/batch")
+    return app
+
+
+def post(app, operations, **args):
+    response = Client(app, BaseResponse).post(
+        "/batch", data=json.dumps(operations),
+        content_type="application/json", **args)
+    return response.status_code, json.loads(response.get_data(as_text=True))
+
+
+def test_batch(app):
+    data = {1: {'id': 1, 'name': "one"}}
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        return data[id]
+
+    @item.model("write")
+    def write_item(new_data, id):
+        data[id] = dict(new_data)
+
+    status, results = post(app, [
+        {'path': "/items/1"},
+        {'method': "PUT", 'path': "/items/2", 'body': {'name': "two"}},
+        {'method': "get", 'path': "/items/2?x=1"},
+        {'path': "/items/3"},
+        {'path': "/nowhere"},
+    ])
+
+    assert status == 200
+    assert [r['status'] for r in results] == [200, 200, 200, 404, 404]
+    assert results[0]['body'] == {'id': 1, 'name': "one"}
+    assert ["Content-Type", "application/json"] in results[0]['headers']
+    assert results[2]['body'] == {'name': "two"}
+
+
+def test_lazy_context_is_shared(app):
+    entered = []
+    hooks = []
+
+    @app.context(lazy=True)
+    def conn():
+        entered.append(1)
+        yield "connection"
+
+    @app.context
+    def per_request():
+        hooks.append(ctx.request.path)
+        yield
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        return {'id': id, 'conn': ctx.conn}
+
+    status, results = post(app, [{'path': "/items/1"}, {'path': "/items/2"}])
+    assert [r['body']['conn'] for r in results] == ["connection"] * 2
+    assert entered == [1]
+    assert hooks == ["/batch", "/items/1", "/items/2"]
+
+
+def test_repeated_headers(app):
+    @app.route("/cookies")
+    def cookies():
+        return BaseResponse(headers=[('Set-Cookie', "a=1"),
+                                     ('Set-Cookie', "b=2")])
+
+    status, results = post(app, [{'path': "/cookies"}])
+    assert [v for k, v in results[0]['headers'] if k == 'Set-Cookie'] \
+        == ["a=1", "b=2"]
+
+
+def test_bad_batches(app):
+    assert post(app, {'path': "/items/1"})[0] == 400
+    assert post(app, [{'method': "GET"}])[0] == 400
+    assert post(app, [{'path': "/"}] * 6)[0] == 400
+
+    status, results = post(app, [{'method': "POST", 'path': "/batch",
+                                  'body': []}])
+    assert results[0]['status'] == 400
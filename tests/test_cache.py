@@ -0,0 +1,158 @@
+import json
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+
+from findig.json import App
+from findig.tools.cache import MemoryCacheStore, ResponseCache
+
+
+@pytest.fixture
+def app():
+    return App()
+
+
+@pytest.fixture
+def cache(app):
+    return ResponseCache(app, ttl=60)
+
+
+@pytest.fixture
+def items(app, cache):
+    data = {1: {'id': 1, 'name': "one"}, 2: {'id': 2, 'name': "two"}}
+    calls = []
+
+    @cache.cached
+    @app.route("/items/<int:id>")
+    def item(id):
+        calls.append(id)
+        return data[id]
+
+    @item.model("write")
+    def write_item(new_data, id):
+        data[id] = dict(new_data)
+
+    @cache.cached(vary=['X-User'])
+    @app.route("/items/")
+    @item.collection
+    def collection():
+        calls.append('all')
+        return [data[k] for k in sorted(data)]
+
+    @collection.model("make")
+    def make_item(new_data):
+        data[new_data['id']] = dict(new_data)
+        return new_data
+
+    return data, calls
+
+
+def get(client, path, **args):
+    response = client.get(path, **args)
+    assert response.status_code == 200
+    return json.loads(response.get_data(as_text=True))
+
+
+def test_get_is_cached(app, items):
+    data, calls = items
+    c = Client(app, BaseResponse)
+
+    assert get(c, "/items/1") == {'id': 1, 'name': "one"}
+    assert get(c, "/items/1") == {'id': 1, 'name': "one"}
+    assert get(c, "/items/2") == {'id': 2, 'name': "two"}
+    assert get(c, "/items/1?x=1") == {'id': 1, 'name': "one"}
+    assert calls == [1, 2, 1]
+
+
+def test_vary_headers(app, items):
+    data, calls = items
+    c = Client(app, BaseResponse)
+
+    get(c, "/items/", headers={'X-User': "a"})
+    get(c, "/items/", headers={'X-User': "a"})
+    get(c, "/items/", headers={'X-User': "b"})
+    assert calls == ['all', 'all']
+
+
+def test_write_invalidates_item_and_collection(app, items):
+    data, calls = items
+    c = Client(app, BaseResponse)
+
+    get(c, "/items/1")
+    get(c, "/items/2")
+    get(c, "/items/")
+
+    response = c.put("/items/1", data=json.dumps({'id': 1, 'name': "uno"}),
+                     content_type="application/json")
+    assert response.status_code == 200
+    del calls[:]
+
+    assert get(c, "/items/1") == {'id': 1, 'name': "uno"}
+    assert get(c, "/items/2") == {'id': 2, 'name': "two"}
+    assert get(c, "/items/")[0] == {'id': 1, 'name': "uno"}
+    assert calls == [1, 'all']
+
+
+def test_post_invalidates_collection(app, items):
+    data, calls = items
+    c = Client(app, BaseResponse)
+
+    assert len(get(c, "/items/")) == 2
+    response = c.post("/items/", data=json.dumps({'id': 3, 'name': "three"}),
+                      content_type="application/json")
+    assert response.status_code == 201
+    assert len(get(c, "/items/")) == 3
+
+
+def test_cached_conditional_requests(app, cache):
+    calls = []
+    versions = {1: 3}
+
+    @cache.cached
+    @app.route("/items/<int:id>")
+    def item(id):
+        calls.append(id)
+        return {'id': id}
+
+    @item.model("version")
+    def item_version(id):
+        return versions[id]
+
+    c = Client(app, BaseResponse)
+    assert get(c, "/items/1") == {'id': 1}
+    assert calls == [1]
+
+    response = c.get("/items/1", headers={'If-None-Match': '"3"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"3"'
+
+    response = c.get("/items/1", headers={'If-None-Match': '"2"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"3"'
+
+    response = c.get("/items/1", headers={'If-Match': '"2"'})
+    assert response.status_code == 412
+    assert calls == [1]
+
+
+def test_cached_unversioned_conditional_request(app, items):
+    data, calls = items
+    c = Client(app, BaseResponse)
+
+    get(c, "/items/1")
+    response = c.get("/items/1", headers={'If-None-Match': '"1"'})
+    assert response.status_code == 200
+    assert calls == [1, 1]
+
+
+def test_memory_store_expiry():
+    store = MemoryCacheStore(maxsize=2)
+    store.set('a', 1, 60)
+    store.set('b', 2, -1)
+    assert store.get('a') == 1
+    assert store.get('b') is None
+
+    store.set('c', 3, 60)
+    store.set('d', 4, 60)
+    assert store.get('a') is None
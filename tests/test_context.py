@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+
+from findig.context import RequestContext
+
+
+@pytest.fixture
+def context():
+    return RequestContext('findig_test_ctx')
+
+
+def test_push_pop(context):
+    context.outer = 1
+    token = context.push()
+    assert not hasattr(context, 'outer')
+
+    context.inner = 2
+    assert context.inner == 2
+    del context.inner
+    assert not hasattr(context, 'inner')
+
+    context.inner = 3
+    context.pop(token)
+    assert context.outer == 1
+    assert not hasattr(context, 'inner')
+
+
+def test_proxy(context):
+    value = context('value')
+
+    with pytest.raises(RuntimeError):
+        value.real
+
+    token = context.push()
+    context.value = 5
+    assert value.real == 5
+    context.pop(token)
+
+
+def test_lazy_value(context):
+    calls = []
+    token = context.push()
+    context.set_lazy('conn', lambda: calls.append(1) or 'connection')
+
+    assert calls == []
+    assert context.conn == 'connection'
+    assert context.conn == 'connection'
+    assert calls == [1]
+    context.pop(token)
+
+
+def test_threads_are_isolated(context):
+    context.push()
+    context.value = 'main'
+    seen = []
+
+    def run():
+        seen.append(getattr(context, 'value', None))
+        context.push()
+        context.value = 'thread'
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    assert seen == [None]
+    assert context.value == 'main'
+
+
+def test_tasks_are_isolated(context):
+    async def handle(name):
+        token = context.push()
+        context.name = name
+        await asyncio.sleep(0)
+        try:
+            return context.name
+        finally:
+            context.pop(token)
+
+    async def run():
+        return await asyncio.gather(handle('a'), handle('b'))
+
+    assert asyncio.run(run()) == ['a', 'b']
+
+
+def test_shared_lazy_value(context):
+    calls = []
+    outer = context.push()
+    context.set_lazy('conn', lambda: calls.append(1) or 'connection')
+
+    inner = context.push(share=['conn'])
+    assert context.conn == 'connection'
+    context.pop(inner)
+
+    assert context.conn == 'connection'
+    assert calls == [1]
+    context.pop(outer)
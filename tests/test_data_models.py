@@ -96,4 +96,29 @@ def test_data_model_mut_map():
     del model['read']
 
     with pytest.raises(KeyError):
-        maker = model['read']
\ No newline at end of file
+        maker = model['read']
+
+
+def test_dataset_model_patch():
+    from findig.tools.dataset import MutableRecord
+
+    class Record(MutableRecord):
+        def __init__(self):
+            self.patches = []
+
+        def read(self):
+            return {}
+
+        def delete(self):
+            pass
+
+        def patch(self, add_data, remove_fields, replace=False):
+            self.patches.append((add_data, remove_fields, replace))
+
+    record = Record()
+    model = DataSetDataModel(record)
+    assert 'patch' in list(model)
+    assert len(model) == len(list(model))
+
+    model['patch']({'name': "Jen", 'state': None})
+    assert record.patches == [({'name': "Jen"}, ['state'], False)]
@@ -106,4 +106,91 @@ def test_sort_multi(people):
     sorted_set = people.sorted('age', 'name')
     assert not people.iterated
     assert isinstance(sorted_set, AbstractDataSet)
-    assert [r['id'] for r in sorted_set] == [3,7,1,8,5,2,6,4]
\ No newline at end of file
+    assert [r['id'] for r in sorted_set] == [3,7,1,8,5,2,6,4]
+def test_project(people):
+    names = people.project('id', 'name', 'height')
+    assert not people.iterated
+    assert isinstance(names, AbstractDataSet)
+    assert dict(list(names)[2]) == {'id': 3, 'name': "Terrance Riverdarb"}
+    assert dict(people.fetch(id=4).project('age')) == {'age': 74}
+
+def test_query_chain_matches_views(people):
+    query = people.filtered(age=lambda a: a > 20).sorted('age', 'name') \
+                  .limit(4, 1).limit(2, 1).project('id', 'age')
+    assert isinstance(query, QueryDataSet)
+    assert query.plan.count == 2 and query.plan.offset == 2
+    assert [dict(r) for r in query] == [{'id': 8, 'age': 32},
+                                        {'id': 5, 'age': 32}]
+
+    # A filter after a slice can't be merged into the slice's plan
+    nested = people.limit(3).filtered(age=lambda a: a > 20)
+    assert isinstance(nested.ds, QueryDataSet)
+    assert [r['id'] for r in nested] == [1, 2]
+
+def test_query_plan_merging():
+    plan = QueryPlan().project('id', 'name')
+    assert plan.filter(name="Jen") is not None
+    assert plan.filter(age=32) is None
+    assert plan.sort('age') is None
+    assert QueryPlan().limit(5).sort('age') is None
+    assert QueryPlan().limit(5, 2).limit(10, 4) == QueryPlan(offset=6, count=1)
+    assert QueryPlan().filter(age=32).filter(age=33) is None
+
+class PushDownSet(MockDataSet):
+    def __init__(self, data, filters=None):
+        self.data = data
+        self.filters = filters or {}
+
+    def __iter__(self):
+        for d in self.data:
+            if FilteredDataSet.check_match(d, self.filters):
+                yield MockRecord(d)
+
+    def filtered(self, **spec):
+        return PushDownSet(self.data, dict(self.filters, **spec))
+
+def test_query_push_down(people):
+    pushy = PushDownSet(people.data)
+    query = pushy.sorted('name').filtered(age=32, name=lambda n: "J" in n)
+
+    backend, rest = pushy.compile_plan(query.plan)
+    assert backend.filters == {'age': 32}
+    assert list(rest.filters) == ['name'] and rest.order == ('name',)
+    assert [r['id'] for r in query] == [5]
+    assert query.explain().splitlines()[1:] == [
+        "pushed down: filtered(age=32)",
+        "in python: filtered(name=<lambda>) | sorted('name')",
+    ]
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sorted_limit_matches_full_sort(people, descending):
+    ordered = OrderedDataSet(people, 'age', descending=descending)
+    expected = [r['id'] for r in ordered][2:5]
+    query = people.sorted('age', descending=descending).limit(3, 2)
+    assert [r['id'] for r in query] == expected
+
+def test_filtered_limit_stops_early(people):
+    seen = []
+    def young(age):
+        seen.append(age)
+        return age < 30
+
+    assert [r['id'] for r in people.filtered(age=young).limit(2)] == [1, 3]
+    assert seen == [25, 34, 16]
+
+def test_count(people):
+    assert people.count() == 8
+    assert people.filtered(age=32).count() == 2
+    assert people.sorted('age').limit(5, 6).count() == 2
+    assert people.project('id').limit(3).count() == 3
+    assert DataSetSlice(people, 1, 7, 2).count() == 3
+    assert OrderedDataSet(people, 'age', first=3).count() == 3
+
+def test_count_uses_backend(people):
+    class CountingSet(PushDownSet):
+        def count(self):
+            return 100 if not self.filters else len(list(self))
+
+    counting = CountingSet(people.data)
+    assert counting.sorted('name').limit(4, 96).count() == 4
+    assert counting.filtered(age=32).limit(4).count() == 2
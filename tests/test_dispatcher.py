@@ -5,6 +5,7 @@ from werkzeug.routing import Rule
 from findig.data_model import DictDataModel
 from findig.dispatcher import Dispatcher
 from findig.resource import Resource, AbstractResource
+from findig.utils import DataPipe
 
 @pytest.fixture
 def dispatcher():
@@ -134,4 +135,31 @@ def test_method_warning(dispatcher, recwarn):
 #    test_resource = TestResource('test')
 #    test_resource2 = TestResource2('test2')
 #    dispatcher.route(test_resource, '/my_route')
-#    dispatcher.route(test_resource2, '/items/<id>/<t>')
\ No newline at end of file
+#    dispatcher.route(test_resource2, '/items/<id>/<t>')
+
+def test_composed_formatter_cached(dispatcher):
+    res = dispatcher.resource(lambda: {})
+
+    formatter = dispatcher.get_formatter(res)
+    assert dispatcher.get_formatter(res) is formatter
+    assert set(formatter.handlers) == {'text/plain'}
+
+    res.formatter.register('application/json', str)
+    new_formatter = dispatcher.get_formatter(res)
+    assert new_formatter is not formatter
+    assert set(new_formatter.handlers) == {'text/plain', 'application/json'}
+
+
+def test_composed_processors_rebuilt(dispatcher):
+    res = dispatcher.resource(lambda: {})
+    res.post_processor = DataPipe(lambda d: d + 1)
+
+    process = dispatcher.get_post_processor(res)
+    assert process(1) == 2
+    assert dispatcher.get_post_processor(res) is process
+
+    dispatcher.post_processor.stage(lambda d: d * 10)
+    assert dispatcher.get_post_processor(res)(1) == 20
+
+    dispatcher.post_processor = DataPipe()
+    assert dispatcher.get_post_processor(res)(1) == 2
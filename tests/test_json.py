@@ -0,0 +1,184 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+import json
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+
+from findig.context import ctx
+from findig.json import *
+
+
+@pytest.mark.parametrize('data', [
+    [1, 2, 3],
+    {'items': [{'id': 1}, {'id': 2}], 'count': 2},
+    {1: 'int key', 2.5: 'float key', None: 'null key', True: 'bool key'},
+    [[], {}, "string", None, [[1], [2, 3]]],
+    "just a string",
+])
+def test_iter_json_matches_dumps(data):
+    encoder = CustomEncoder()
+    assert "".join(iter_json(data, encoder)) == json.dumps(data)
+
+
+def test_iter_json_consumes_lazily():
+    consumed = []
+
+    def items():
+        for i in range(3):
+            consumed.append(i)
+            yield {'id': i}
+
+    fragments = iter_json(items(), CustomEncoder())
+    assert next(fragments) == "["
+    assert next(fragments) == '{"id": 0}'
+    assert consumed == [0]
+
+
+def test_streamed_response():
+    app = App(stream=True, chunk_size=32)
+
+    @app.route("/items")
+    def items():
+        # The request context must still be around while the response
+        # body is generated
+        return ({'id': i, 'path': ctx.request.path} for i in range(100))
+
+    @app.route("/small")
+    def small():
+        return iter([1, 2, 3])
+
+    client = Client(app, BaseResponse)
+
+    response = client.get("/items")
+    assert 'Content-Length' not in response.headers
+    assert json.loads(response.get_data(as_text=True)) == [
+        {'id': i, 'path': '/items'} for i in range(100)
+    ]
+
+    response = client.get("/small")
+    assert 'Content-Length' in response.headers
+    assert json.loads(response.get_data(as_text=True)) == [1, 2, 3]
+
+
+def test_stream_errors_before_first_chunk():
+    app = App(stream=True)
+
+    @app.route("/broken")
+    def broken():
+        def items():
+            raise LookupError
+            yield
+
+        return items()
+
+    response = Client(app, BaseResponse).get("/broken")
+    assert response.status_code == 500
+    assert json.loads(response.get_data(as_text=True)) == {
+        "message": "internal error"
+    }
+
+
+codecs = [StdlibCodec()]
+try:
+    codecs.append(OrjsonCodec())
+except ImportError:
+    pass
+
+
+@pytest.mark.parametrize('codec', codecs)
+def test_codec_type_dispatch(codec):
+    app = App(codec=codec)
+
+    class Point:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    @app.to_json.register(Point)
+    def point_to_json(p):
+        return [p.x, p.y]
+
+    data = {
+        'when': datetime(2015, 7, 18, 12, 30),
+        'id': UUID(int=1),
+        'price': Decimal("10.10"),
+        'at': Point(1, 2),
+        'tags': {'a'},
+    }
+
+    assert json.loads(app.serialize(data)) == {
+        'when': '2015-07-18T12:30:00',
+        'id': '00000000-0000-0000-0000-000000000001',
+        'price': '10.10',
+        'at': [1, 2],
+        'tags': ['a'],
+    }
+
+    # The registration is local to the app
+    with pytest.raises(TypeError):
+        App(codec=codec).serialize(Point(1, 2))
+
+
+def test_default_codec():
+    expected = OrjsonCodec if len(codecs) > 1 else StdlibCodec
+    assert isinstance(App().codec, expected)
+    assert isinstance(App(indent=4).codec, StdlibCodec)
+
+
+@pytest.mark.parametrize('codec', codecs)
+def test_codec_fallback_keeps_generators(codec):
+    app = App(codec=codec)
+    data = {'items': (i for i in range(3)), 'big': 2 ** 70}
+    assert json.loads(app.serialize(data)) == {
+        'items': [0, 1, 2],
+        'big': 2 ** 70,
+    }
+
+
+@pytest.mark.parametrize('codec', codecs)
+def test_codec_builtin_subclasses(codec):
+    class Color(str):
+        pass
+
+    class Count(int):
+        pass
+
+    app = App(codec=codec)
+    data = {'color': Color("red"), 'count': Count(3), 'big': 2 ** 70}
+
+    assert json.loads(app.serialize(data)) == {
+        'color': "red",
+        'count': 3,
+        'big': 2 ** 70,
+    }
+
+
+def test_encoder_cls_selects_stdlib_codec():
+    class Encoder(CustomEncoder):
+        pass
+
+    app = App(encoder_cls=Encoder)
+    assert isinstance(app.codec, StdlibCodec)
+    assert app.codec.encoder_cls is Encoder
+
+
+@pytest.mark.parametrize('plain_dicts', [True, False])
+def test_plain_dicts(plain_dicts):
+    app = App(plain_dicts=plain_dicts)
+    received = []
+
+    @app.route("/items", methods=['PUT'])
+    def items():
+        return {}
+
+    @items.model("write")
+    def write(data):
+        received.append(data)
+
+    Client(app, BaseResponse).put(
+        "/items", data='{"a": 1}', content_type="application/json")
+
+    assert [dict(d) for d in received] == [{'a': 1}]
+    assert (type(received[0]) is dict) == plain_dicts
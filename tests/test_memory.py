@@ -0,0 +1,117 @@
+from threading import Thread
+
+import pytest
+
+from findig.tools.memory import MemorySet
+
+
+@pytest.fixture
+def people():
+    return MemorySet([
+        dict(id=1, name="Te-jé Rodgers", age=25, team="red"),
+        dict(id=2, name="John Smith", age=34, team="blue"),
+        dict(id=3, name="Terrance Riverdarb", age=16, team="red"),
+        dict(id=4, name="Anna Harris", age=74),
+        dict(id=5, name="Jen Brathwaithe", age=32, team="red"),
+        dict(id=6, name="Glen Posner", age=52, team="blue"),
+        dict(id=7, name="Harriet Peters", age=21, team="red"),
+        dict(id=8, name="Anthony Simm", age=32, team="blue"),
+    ], indexes=['team'], sorted_indexes=['age'])
+
+
+def ids(dataset):
+    return [r['id'] for r in dataset]
+
+
+def test_fetch(people):
+    assert people.fetch_now(id=3)['name'] == "Terrance Riverdarb"
+    assert people.fetch_now(team="blue")['id'] == 2
+    assert people.fetch_now(team=None)['id'] == 4
+    with pytest.raises(LookupError):
+        people.fetch_now(id=9)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_queries_match_generic_views(people, descending):
+    query = people.sorted('age', descending=descending).limit(3, 1)
+    plain = sorted(people, key=lambda r: r['age'], reverse=descending)
+    assert ids(query) == ids(plain[1:4])
+    assert query.explain().splitlines()[1] == "memory: sorted index scan (age)"
+
+    query = people.filtered(team="red", age=lambda a: a > 18) \
+                  .sorted('age', descending=descending)
+    assert ids(query) == ([5, 1, 7] if descending else [7, 1, 5])
+    assert query.explain().splitlines()[1] == \
+        "memory: hash index lookup (team)"
+
+
+def test_between(people):
+    assert ids(people.between('age', 21, 34)) == [7, 1, 5, 8]
+    assert ids(people.between('age', start=52)) == [6, 4]
+
+    # Items without the field are left out of open-ended ranges
+    people.add(dict(id=9, name="Ageless"))
+    assert ids(people.between('age', start=52)) == [6, 4]
+    assert people.between('age', start=52).count() == 2
+    assert ids(people.between('age', stop=20)) == [3]
+    assert len(ids(people.between('age'))) == 8
+    assert people.between('age').count() == 8
+    assert ids(people.sorted('age'))[-1] == 9
+    with pytest.raises(ValueError):
+        people.between('name')
+
+
+def test_writes_reindex(people):
+    record = people.fetch_now(id=4)
+    record.patch({'team': "blue", 'age': 20}, ())
+    assert record.version() == 2
+    assert ids(people.filtered(team="blue")) == [2, 4, 6, 8]
+    assert ids(people.sorted('age').limit(2)) == [3, 4]
+
+    record.delete()
+    assert ids(people.filtered(team="blue")) == [2, 6, 8]
+    assert people.add({'name': "New"}) == {'id': 9}
+    with pytest.raises(ValueError):
+        people.add({'id': 9})
+
+
+def test_concurrent_writes():
+    numbers = MemorySet(indexes=['parity'], sorted_indexes=['n'])
+
+    def add(start):
+        for n in range(start, 1000, 4):
+            numbers.add({'n': n, 'parity': n % 2})
+            list(numbers.filtered(parity=n % 2).limit(5))
+
+    threads = [Thread(target=add, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r['n'] for r in numbers.sorted('n')] == list(range(1000))
+    assert len(list(numbers.filtered(parity=1))) == 500
+
+
+def test_count(people):
+    assert people.count() == 8
+    assert people.filtered(team="red").count() == 4
+    assert people.filtered(team="red", age=32).count() == 1
+    assert people.sorted('age').limit(5, 6).count() == 2
+    assert people.between('age', 21, 34).count() == 4
+
+
+def test_failed_edit_block_releases_lock(people):
+    record = people.fetch_now(id=1)
+    with pytest.raises(TypeError):
+        with record.edit_block():
+            # Strings can't be sorted among the ages in the index
+            record.update(age="old")
+
+    counts = []
+    thread = Thread(target=lambda: counts.append(people.count()),
+                    daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert counts == [8]
+    assert people.fetch_now(id=1)['age'] == 25
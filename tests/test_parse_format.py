@@ -1,4 +1,6 @@
-﻿import pytest
+﻿from abc import ABCMeta
+
+import pytest
 
 from findig import App
 from findig.content import *
@@ -197,3 +199,61 @@ def test_register_handler(obj, handler, mime, arg, expected, app):
 
     runtest()
 
+
+
+def test_negotiation_cached(app):
+    formatter = Formatter()
+    formatter.register("application/json", lambda d: "json")
+    formatter.register("text/html", lambda d: "html")
+
+    cache = Formatter.negotiation_cache
+    builder = EnvironBuilder(headers=[("Accept", "text/html;q=0.9,*/*;q=0.8")])
+
+    with app.build_context(builder.get_environ()):
+        hits = cache.hits
+        assert formatter({}) == ("text/html", "html")
+        assert formatter({}) == ("text/html", "html")
+        assert cache.hits == hits + 1
+
+        # Registering a new handler invalidates the negotiation result
+        formatter.register("text/html", lambda d: "new html")
+        assert formatter({}) == ("text/html", "new html")
+
+
+def test_error_handler_resolution():
+    class CustomLookupError(KeyError):
+        pass
+
+    handler = ErrorHandler()
+    handler.register(BaseException, lambda e: "base")
+    handler.register(LookupError, lambda e: "lookup")
+
+    assert handler(CustomLookupError()) == "lookup"
+    assert handler(ValueError()) == "base"
+
+    # New registrations must take effect for already resolved types
+    handler.register(KeyError, lambda e: "key")
+    assert handler(CustomLookupError()) == "key"
+    assert handler(IndexError()) == "lookup"
+
+
+def test_error_handler_virtual_subclasses():
+    class Retryable(Exception, metaclass=ABCMeta):
+        pass
+
+    Retryable.register(ConnectionError)
+
+    handler = ErrorHandler()
+    handler.register(Exception, lambda e: "exception")
+    handler.register(Retryable, lambda e: "retry")
+
+    assert handler(ConnectionResetError()) == "retry"
+    assert handler(KeyError()) == "exception"
+
+
+def test_error_handler_reraises_unhandled():
+    handler = ErrorHandler()
+    handler.register(LookupError, lambda e: "lookup")
+
+    with pytest.raises(ValueError):
+        handler(ValueError())
@@ -1,8 +1,18 @@
 #-*- coding: utf-8 -*-
 from findig.extras.redis import *
 from findig.extras.redis import IndexToken
+from findig.tools.dataset import AbstractDataSet
 from fakeredis import FakeStrictRedis
 import pytest
+import random
+
+
+class MockSet(AbstractDataSet):
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        yield from self.items
 
 
 @pytest.fixture
@@ -30,6 +40,10 @@ def test_index_token_hash():
     tok2 = IndexToken(dict(id=1, name="Jen"))
     assert tok1 == tok2
 
+def test_index_token_hash_stable():
+    # The hash mustn't change between processes
+    assert hash(IndexToken(dict(id=1, name="Jen"))) == 244567336
+
 def test_type_preserved(rs):
     person = rs.fetch(id=4)
     assert isinstance(person['age'], int)
@@ -60,4 +74,136 @@ def test_clear(redis, rs):
     assert list(rs) == []
     assert redis.zcard(rs.colkey) == 0
     assert redis.zcard(rs.indkey) == 0
-    assert not redis.get(rs.incrkey)
\ No newline at end of file
+    assert not redis.get(rs.incrkey)
+def test_record_version(rs):
+    record = rs.fetch_now(id=3)
+    first = record.version()
+    record.patch(dict(age=17), ())
+    assert record.version() == first + 1
+    assert rs.fetch_now(id=3).version() == first + 1
+    record.delete()
+    assert not rs.r.exists(record.versionkey)
+
+    # A re-added item doesn't reuse the versions of the deleted one
+    rs.add(dict(id=3, name="Terrance Riverdarb", age=16))
+    assert rs.fetch_now(id=3).version() not in (first, first + 1)
+
+    # Items stored without a version (by older releases) don't have one
+    rs.r.delete(record.versionkey)
+    assert rs.fetch_now(id=3).version() is None
+
+def test_limit(rs):
+    ids = [r['id'] for r in rs]
+    page = rs.limit(3, 2)
+    assert isinstance(page, RedisSet)
+    assert [r['id'] for r in page] == ids[2:5]
+    assert [r['id'] for r in page.filtered(id=ids[3])] == [ids[3]]
+
+    assert list(rs.limit(0)) == []
+    assert rs.limit(0).count() == 0
+    assert list(rs.limit(0, 4)) == []
+
+def test_project(rs):
+    record = rs.fetch_now(id=4).project('name', 'state')
+    assert dict(record) == {'name': "Anna Harris"}
+
+    records = rs.project('id', 'age').limit(2)
+    assert [set(r) for r in records] == [{'id', 'age'}] * 2
+
+    # Projections narrow; they never bring back a hidden field
+    assert [dict(r) for r in rs.project('id', 'name').project('age')] \
+        == [{}] * 10
+    assert dict(record.project('name', 'age')) == {'name': "Anna Harris"}
+
+def test_sparse_fields_dont_widen_projection(rs):
+    import json
+    from werkzeug.test import Client
+    from werkzeug.wrappers import BaseResponse
+    from findig.json import App
+
+    app = App()
+
+    @app.route("/people")
+    @app.resource(sparse_fields=True)
+    def people():
+        return rs.project('id', 'name')
+
+    client = Client(app, BaseResponse)
+    response = client.get("/people?fields=id,age")
+    people = json.loads(response.get_data(as_text=True))
+    assert people[:2] == [{'id': 1}, {'id': 2}]
+
+def test_filter_parity(rs):
+    # Chained filters give the same results as the generic data set views
+    rand = random.Random(0)
+    items = [dict(r) for r in rs]
+    values = {'id': [1, 5, 8], 'age': [16, 32, 34],
+              'name': ["John Smith", "Jen Brathwaithe"]}
+
+    for _ in range(50):
+        query, generic = rs, MockSet(items)
+        for _ in range(rand.randint(1, 3)):
+            field = rand.choice(sorted(values))
+            spec = {field: rand.choice(values[field])}
+            query = query.filtered(**spec)
+            generic = generic.filtered(**spec)
+
+        expected = sorted(r['id'] for r in generic)
+        assert sorted(r['id'] for r in query) == expected
+        assert query.count() == len(expected)
+
+def test_patch_reindexes(redis):
+    people = RedisSet("mock-people", client=redis,
+                      candidate_keys=[('id',), ('email',)])
+    people.add(dict(id=1, email="jen@example.com", age=32))
+
+    people.fetch_now(id=1).patch(dict(email="jb@example.com"), ())
+    assert people.fetch_now(email="jb@example.com")['age'] == 32
+    assert list(people.filtered(email="jen@example.com")) == []
+    people.clear()
+
+def test_add_many(redis):
+    people = RedisSet("mock-people", client=redis)
+    people.add(dict(name="Jen"))
+    keys = people.add_many([dict(name="John"), dict(id=9, name="Anna"),
+                            dict(name="Glen")])
+
+    assert [dict(key) for key in keys] == [{'id': '2'}, {'id': 9},
+                                           {'id': '3'}]
+    assert people.fetch_now(id=3)['name'] == "Glen"
+    assert redis.get(people.incrkey) == b"3"
+    people.clear()
+
+def test_explain(rs):
+    query = rs.filtered(id=3).sorted('age').limit(1)
+    assert query.explain().splitlines() == [
+        "<filtered-redis-view('mock-collection')|id=3>",
+        "redis: index scan (id=3)",
+        "in python: sorted('age') | limit(1, offset=0)",
+    ]
+    assert [r['id'] for r in query] == [3]
+
+def test_count(redis):
+    people = RedisSet("mock-people", client=redis,
+                      candidate_keys=[('id',), ('team',)])
+    people.add_many([dict(id=1, team="red"), dict(id=2, team="blue"),
+                     dict(id=3, team="red")])
+
+    assert people.count() == 3
+    assert people.limit(5, 1).count() == 2
+    assert people.filtered(team="red").count() == 2
+    assert people.filtered(team=lambda t: t != "red").count() == 1
+    people.clear()
+
+def test_count_hash_collisions(redis):
+    # With one-byte index tokens, some of these teams' tokens collide
+    people = RedisSet("mock-teams", client=redis, index_size=1,
+                      candidate_keys=[('team',)])
+    teams = ["team {}".format(i) for i in range(200)]
+    people.add_many(dict(team=team) for team in teams)
+
+    assert [people.filtered(team=team).count() for team in teams] \
+        == [1] * len(teams)
+    assert [len(list(people.filtered(team=team))) for team in teams] \
+        == [1] * len(teams)
+    people.clear()
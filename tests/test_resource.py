@@ -1,12 +1,24 @@
+import json
+
 import pytest
+from werkzeug.exceptions import BadRequest
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
 
 from findig import App
+from findig.json import App as JSONApp
 from findig.resource import AbstractResource, Collection, Resource
+from findig.tools.dataset import DataSetSlice
+from findig.tools.memory import MemorySet
 
 @pytest.fixture
 def app():
     return App()
 
+@pytest.fixture
+def json_app():
+    return JSONApp()
+
 def test_subclass_abstract():
     assert issubclass(Resource, AbstractResource)
     assert issubclass(Collection, AbstractResource)
@@ -47,3 +59,393 @@ def test_name_bindings_error_on_different_resource(num:int, app):
     with app.test_context(path="/index/bar/{}".format(num)):
         with pytest.raises(AttributeError):
             assert item.num == num
+
+def test_dispatch_plan_compiled_with_url_map(app):
+    @app.route("/item")
+    def item():
+        return "data"
+
+    assert item._plan is None
+    assert Client(app, BaseResponse).get("/item").status_code == 200
+
+    plan = item.get_dispatch_plan()
+    assert plan is item._plan
+    assert plan.methods == {'GET'}
+    assert Client(app, BaseResponse).delete("/item").status_code == 405
+    assert item.get_dispatch_plan() is plan
+
+def test_dispatch_plan_invalidated_on_model_change(app):
+    deleted = []
+
+    @app.route("/item")
+    def item():
+        return "data"
+
+    client = Client(app, BaseResponse)
+    assert client.delete("/item").status_code == 405
+    old_plan = item.get_dispatch_plan()
+
+    item.model['delete'] = lambda: deleted.append(True)
+    plan = item.get_dispatch_plan()
+    assert plan is not old_plan
+    assert 'DELETE' in plan.methods
+
+@pytest.mark.parametrize('lazy_urls', [False, True])
+def test_collection_item_urls(json_app, lazy_urls):
+    @json_app.route("/people/<int:id>")
+    @json_app.route("/people/<int:id>/<name>")
+    def person(id, name=None):
+        return {}
+
+    @json_app.route("/people")
+    @person.collection(include_urls=True, lazy_urls=lazy_urls,
+                       bindargs={'person_id': 'id'})
+    def people():
+        return [
+            {'person_id': 1, 'name': 'Jen'},
+            {'person_id': 2},
+            {'person_id': None, 'name': 'Nobody'},
+            {'person_id': 4, 'url': '/custom'},
+        ]
+
+    response = Client(json_app, BaseResponse).get("/people")
+    assert json.loads(response.get_data(as_text=True)) == [
+        {'person_id': 1, 'name': 'Jen', 'url': '/people/1/Jen'},
+        {'person_id': 2, 'url': '/people/2'},
+        {'person_id': None, 'name': 'Nobody'},
+        {'person_id': 4, 'url': '/custom'},
+    ]
+
+def test_item_url_template_matches_werkzeug(app):
+    @app.route("/items/<int:id>/<path:rest>")
+    def item(id, rest):
+        pass
+
+    @app.route("/items")
+    @item.collection
+    def items():
+        return []
+
+    data = {'id': 12, 'rest': 'a b/c'}
+    with app.test_context(path="/items"):
+        template = items.get_item_url_template(app.url_map)
+        assert template is not None
+        assert items._try_build_item_url(data) == \
+            item.build_url(data) == "/items/12/a%20b/c"
+
+def test_conditional_get(app):
+    reads = []
+    versions = {1: 3}
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        reads.append(id)
+        return "data"
+
+    @item.model("version")
+    def item_version(id):
+        return versions[id]
+
+    client = Client(app, BaseResponse)
+    response = client.get("/items/1")
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"3"'
+
+    response = client.get("/items/1", headers={'If-None-Match': '"3"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"3"'
+    assert reads == [1]
+
+    versions[1] = 4
+    response = client.get("/items/1", headers={'If-None-Match': '"3"'})
+    assert response.status_code == 200
+    assert reads == [1, 1]
+
+def test_conditional_get_last_modified(app):
+    from datetime import datetime
+
+    @app.route("/item")
+    def item():
+        return "data"
+
+    item.model['version'] = lambda: datetime(2015, 5, 1, 12, 30, 15, 500)
+
+    client = Client(app, BaseResponse)
+    response = client.get("/item")
+    assert response.headers['Last-Modified'] == \
+        "Fri, 01 May 2015 12:30:15 GMT"
+
+    response = client.get("/item", headers={
+        'If-Modified-Since': "Fri, 01 May 2015 12:30:15 GMT"})
+    assert response.status_code == 304
+
+    response = client.get("/item", headers={
+        'If-Modified-Since': "Fri, 01 May 2015 12:30:14 GMT"})
+    assert response.status_code == 200
+
+def test_lazy_version(app):
+    from findig.tools.dataset import AbstractRecord
+
+    checks = []
+
+    class Record(AbstractRecord):
+        def read(self):
+            return {'id': 1}
+
+        def version(self):
+            checks.append(1)
+            return 5
+
+    @app.route("/item")
+    @app.resource(lazy=True)
+    def item():
+        return Record()
+
+    client = Client(app, BaseResponse)
+    response = client.get("/item")
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"5"'
+    assert checks == [1]
+
+    response = client.get("/item", headers={'If-None-Match': '"5"'})
+    assert response.status_code == 304
+    assert checks == [1, 1]
+
+    response = client.get("/item", headers={'If-Match': '"4"'})
+    assert response.status_code == 412
+
+def test_write_precondition(json_app):
+    writes = []
+
+    @json_app.route("/item")
+    def item():
+        return "data"
+
+    item.model['version'] = lambda: "v2"
+    item.model['write'] = lambda data: writes.append(data)
+
+    client = Client(json_app, BaseResponse)
+    response = client.put("/item", data="{}", headers={'If-Match': '"v1"'},
+                          content_type="application/json")
+    assert response.status_code == 412
+    assert writes == []
+
+    for etag in ('"v2"', '*', None):
+        headers = {} if etag is None else {'If-Match': etag}
+        response = client.put("/item", data="{}", headers=headers,
+                              content_type="application/json")
+        assert response.status_code == 200
+    assert len(writes) == 3
+
+def test_head_skips_formatting(app):
+    formatted = []
+
+    @app.route("/item")
+    def item():
+        return "data"
+
+    @item.formatter.register("text/html", default=True)
+    def format_html(data):
+        formatted.append(data)
+        return "<p>{}</p>".format(data)
+
+    client = Client(app, BaseResponse)
+    response = client.head("/item")
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith("text/html")
+    assert 'Content-Length' not in response.headers
+    assert formatted == []
+
+    client.get("/item")
+    assert formatted == ["data"]
+
+def test_head_action(app):
+    reads = []
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        reads.append(id)
+        return "data"
+
+    @item.model("head")
+    def item_head(id):
+        return {'Content-Length': "4", 'X-Item': str(id)}
+
+    response = Client(app, BaseResponse).head("/items/3")
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == "4"
+    assert response.headers['X-Item'] == "3"
+    assert response.headers['Content-Type'].startswith("text/plain")
+    assert reads == []
+
+def test_collection_pagination(json_app):
+    data = [{'id': i} for i in range(25)]
+    limits = []
+
+    class Items(list):
+        def limit(self, count, offset=0):
+            limits.append((count, offset))
+            return DataSetSlice(self, offset, offset + count)
+
+    @json_app.route("/items/<int:id>")
+    def item(id):
+        return data[id]
+
+    @json_app.route("/items")
+    @item.collection(page_size=10, max_page_size=20)
+    def items():
+        return Items(data)
+
+    client = Client(json_app, BaseResponse)
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200
+        links = {}
+        for link in response.headers.get('Link', '').split(", "):
+            if link:
+                target, rel = link.split("; ")
+                links[rel[5:-1]] = target[1:-1].replace("http://localhost", "")
+        return json.loads(response.get_data(as_text=True)), links
+
+    page, links = get("/items")
+    assert page == data[:10]
+    assert limits == [(11, 0)]
+    assert set(links) == {'next'}
+
+    page, links = get(links['next'])
+    assert page == data[10:20]
+    assert set(links) == {'next', 'prev'}
+
+    page, links = get(links['next'])
+    assert page == data[20:]
+    assert set(links) == {'prev'}
+
+    page, links = get(links['prev'])
+    assert page == data[10:20]
+
+    assert get("/items?limit=5&offset=3")[0] == data[3:8]
+    assert get("/items?limit=100")[0] == data[:20]
+    assert client.get("/items?limit=x").status_code == 400
+    assert client.get("/items?cursor=garbage").status_code == 400
+
+def test_sparse_fields(json_app):
+    data = [{'id': i, 'name': "Item {}".format(i), 'size': i * 10}
+            for i in range(5)]
+
+    @json_app.route("/items/<int:id>")
+    @json_app.resource(sparse_fields=True)
+    def item(id):
+        return data[id]
+
+    @json_app.route("/items")
+    @item.collection(page_size=2, sparse_fields=True)
+    def items():
+        return data
+
+    client = Client(json_app, BaseResponse)
+
+    def get(url):
+        return json.loads(client.get(url).get_data(as_text=True))
+
+    assert get("/items/1?fields=name,size") == {'name': "Item 1", 'size': 10}
+    assert get("/items/1?fields=id&fields=x") == {'id': 1}
+    assert get("/items/1") == data[1]
+    assert get("/items?fields=id&offset=2") == [{'id': 2}, {'id': 3}]
+
+def test_patch(json_app):
+    data = {'name': "Jen", 'age': 32}
+
+    @json_app.route("/item")
+    def item():
+        return data
+
+    @item.model("patch")
+    def patch_item(changes):
+        data.update(changes)
+
+    client = Client(json_app, BaseResponse)
+    response = client.patch("/item", data=json.dumps({'age': 33}),
+                            content_type="application/json")
+    assert response.status_code == 200
+    assert data == {'name': "Jen", 'age': 33}
+    assert client.delete("/item").status_code == 405
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_collection_post_list(bulk, json_app):
+    data, calls = {}, []
+
+    @json_app.route("/items/<int:id>")
+    def item(id):
+        return data[id]
+
+    @json_app.route("/items/")
+    @item.collection
+    def items():
+        return list(data.values())
+
+    @items.model("make")
+    def make_item(new_data):
+        calls.append('make')
+        if 'id' not in new_data:
+            raise BadRequest("No id.")
+        data[new_data['id']] = new_data
+        return {'id': new_data['id']}
+
+    if bulk:
+        @items.model("make_many")
+        def make_items(new_items):
+            calls.append('make_many')
+            data.update((d['id'], d) for d in new_items)
+            return [{'id': d['id']} for d in new_items]
+
+    client = Client(json_app, BaseResponse)
+    body = [{'id': 1}, {'name': "two"}] if not bulk else [{'id': 1}, {'id': 2}]
+    response = client.post("/items/", data=json.dumps(body),
+                           content_type="application/json")
+    assert response.status_code == 207
+
+    results = json.loads(response.get_data(as_text=True))
+    assert results[0] == {'status': 201, 'body': {'id': 1},
+                          'location': "/items/1"}
+    if bulk:
+        assert calls == ['make_many']
+        assert results[1]['location'] == "/items/2"
+    else:
+        assert calls == ['make', 'make']
+        assert results[1] == {'status': 400, 'body': "No id."}
+
+    response = client.post("/items/", data=json.dumps({'id': 3}),
+                           content_type="application/json")
+    assert response.status_code == 201
+
+def test_collection_total_count(json_app):
+    data = MemorySet({'id': i} for i in range(25))
+
+    @json_app.route("/items/<int:id>")
+    def item(id):
+        return data.fetch(id=id)
+
+    @json_app.route("/items")
+    @item.collection(page_size=10, total_count=True)
+    def items():
+        return data
+
+    @json_app.route("/plain")
+    @item.collection(page_size=10, total_count=True)
+    def plain():
+        return ({'id': i} for i in range(25))
+
+    client = Client(json_app, BaseResponse)
+    for url in ("/items?offset=20", "/plain?offset=20"):
+        response = client.get(url)
+        assert response.headers['X-Total-Count'] == "25"
+        assert len(json.loads(response.get_data(as_text=True))) == 5
+
+    # HEAD responses have the same pagination headers
+    for url in ("/items?offset=10", "/plain?offset=10"):
+        get, head = client.get(url), client.head(url)
+        assert head.status_code == 200
+        assert head.get_data() == b""
+        assert head.headers['X-Total-Count'] == "25"
+        assert head.headers['Link'] == get.headers['Link']
@@ -0,0 +1,86 @@
+import pytest
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, RequestRedirect, Rule
+from werkzeug.test import Client
+from werkzeug.wrappers import BaseResponse
+
+from findig import App
+from findig.context import ctx
+from findig.routing import IndexedMap
+
+
+rules = [
+    ("/", "index", None),
+    ("/items", "items", ["GET", "POST"]),
+    ("/items/<int:id>", "item", ["GET", "PUT"]),
+    ("/items/new", "new_item", None),
+    ("/items/<int:id>/parts/<name>", "part", None),
+    ("/files/<path:path>", "file", None),
+    ("/users/", "users", None),
+    ("/users/<any(me, you):who>", "user", None),
+    ("/page-<int:num>", "page", None),
+]
+
+
+def make_maps():
+    def rule_list():
+        return [Rule(rule, endpoint=endpoint, methods=methods)
+                for rule, endpoint, methods in rules]
+
+    return Map(rule_list()), IndexedMap(rule_list())
+
+
+@pytest.mark.parametrize('path, method', [
+    ("/", "GET"),
+    ("/items", "GET"),
+    ("/items", "POST"),
+    ("/items", "DELETE"),
+    ("/items/42", "PUT"),
+    ("/items/new", "GET"),
+    ("/items/nope", "GET"),
+    ("/items/42/parts/wheel", "GET"),
+    ("/items/42/parts", "GET"),
+    ("/files/a/b/c.txt", "GET"),
+    ("/users", "GET"),
+    ("/users/me", "GET"),
+    ("/users/them", "GET"),
+    ("/page-3", "GET"),
+    ("/nowhere/at/all", "GET"),
+])
+def test_indexed_map_matches_like_werkzeug(path, method):
+    results = []
+
+    for url_map in make_maps():
+        adapter = url_map.bind("localhost")
+        try:
+            rule, values = adapter.match(path, method, return_rule=True)
+        except (NotFound, MethodNotAllowed, RequestRedirect) as err:
+            results.append((type(err), getattr(err, 'valid_methods', None),
+                            getattr(err, 'new_url', None)))
+        else:
+            results.append((rule.rule, rule.endpoint, values))
+
+    assert results[0] == results[1]
+
+
+def test_candidates_narrowed():
+    _, url_map = make_maps()
+    candidates = [r.rule for r in url_map.candidates("/items/42/parts/x")]
+
+    assert "/files/<path:path>" not in candidates
+    assert "/items/<int:id>/parts/<name>" in candidates
+
+
+def test_app_with_indexed_map():
+    app = App()
+    app.url_map_class = IndexedMap
+
+    @app.route("/items/<int:id>")
+    def item(id):
+        assert ctx.resource is item
+        return "item {}".format(id)
+
+    client = Client(app, BaseResponse)
+    assert client.get("/items/3").data == b"item 3"
+    assert client.get("/items/x").status_code == 404
+    assert isinstance(app.url_map, IndexedMap)
@@ -290,3 +290,77 @@ def test_patch_record(sqla_set, conn, app):
     assert cursor.execute(
         "select state,name,age from person where id = 1000;"
     ).fetchone() == ("CO", "John Smith", 34)
+
+def test_record_version(db, app):
+    class Note(db.Base):
+        id = Column(Integer, primary_key=True)
+        text = Column(Unicode(150))
+        revision = Column(Integer, nullable=False)
+        __mapper_args__ = {'version_id_col': revision}
+
+    db.create_all()
+    notes = SQLASet(Note)
+
+    with app.test_context(create_route=True):
+        notes.add({'text': "hello"})
+        note = notes.fetch_now(text="hello")
+        assert note.version() == 1
+        note.patch({'text': "hi"}, ())
+        assert note.version() == 2
+
+def test_unversioned_record(sqla_set, app):
+    with app.test_context(create_route=True):
+        sqla_set.add({'name': "Jen", 'age': 32})
+        assert sqla_set.fetch_now(name="Jen").version() is None
+
+def test_project(sqla_set, app):
+    with app.test_context(create_route=True):
+        sqla_set.add({'name': "Jen", 'age': 32, 'state': "NY"})
+        people = sqla_set.project('name', 'state')
+        assert [dict(p) for p in people] == [{'name': "Jen", 'state': "NY"}]
+        person = sqla_set.project('age').fetch_now(name="Jen")
+        assert dict(person) == {'age': 32}
+
+        # Projections narrow; they never bring back a hidden field
+        people = sqla_set.project('name').project('name', 'age')
+        assert [dict(p) for p in people] == [{'name': "Jen"}]
+        assert dict(person.project('age', 'state')) == {'age': 32}
+
+def test_replace_record(sqla_set, conn, app):
+    with app.test_context(create_route=True):
+        sqla_set.add({'name': "Jen", 'age': 32, 'state': "NY"})
+        person = sqla_set.fetch_now(name="Jen")
+        person.patch({'name': "Jenny", 'age': 33}, (), replace=True)
+
+    assert conn.cursor().execute(
+        "select state,name,age from person;").fetchall() == \
+        [(None, "Jenny", 33)]
+
+def test_add_many(sqla_set, conn, app):
+    with app.test_context(create_route=True):
+        keys = sqla_set.add_many([
+            {'name': "Jen", 'age': 32},
+            {'name': "John", 'age': 34},
+        ])
+
+    assert keys == [{'id': 1}, {'id': 2}]
+    assert conn.cursor().execute(
+        "select id,name from person order by id;").fetchall() == \
+        [(1, "Jen"), (2, "John")]
+
+def test_add_many_is_atomic(sqla_set, conn, app):
+    with app.test_context(create_route=True):
+        with pytest.raises(SQLASet.CommitError):
+            sqla_set.add_many([{'name': "Jen", 'age': 32}, {'name': "John"}])
+
+    assert conn.cursor().execute(
+        "select count(*) from person;").fetchone() == (0,)
+
+def test_count(sqla_set, app):
+    with app.test_context(create_route=True):
+        sqla_set.add_many([{'name': "Jen", 'age': 32},
+                           {'name': "John", 'age': 34},
+                           {'name': "Anna", 'age': 32}])
+        assert sqla_set.count() == 3
+        assert sqla_set.filtered(age=32).count() == 2
+        assert sqla_set.sorted('age').limit(2, 2).count() == 1
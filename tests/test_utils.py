@@ -21,4 +21,17 @@ def test_extremum():
         assert extremum() > item
         assert item < extremum()
         assert item > extremum(-1)
-        assert extremum(-1) < item
\ No newline at end of file
+        assert extremum(-1) < item
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=3)
+    for i in range(3):
+        cache[i] = str(i)
+
+    cache.get(0)
+    cache[3] = "3"
+
+    assert 1 not in cache
+    assert all(k in cache for k in (0, 2, 3))
+    assert len(cache) == 3
+    assert (cache.hits, cache.misses) == (1, 0)
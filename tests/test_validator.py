@@ -186,3 +186,46 @@ def test_collection_inheritance_overide(app):
             assert validator.validate({"foo": "87", "bar": "strip me baby"}) == {"foo": 87}
 
         assert validator.validate({"foo": str(test_uuid)}) == {"foo": test_uuid}
+
+def test_collection_post_list(app):
+    validator = Validator(app)
+
+    @validator.enforce(foo=int)
+    @validator.restrict('foo')
+    @app.route("/<id>")
+    def item(id):
+        pass
+
+    @app.route("/")
+    @item.collection
+    def items():
+        pass
+
+    @items.model("make")
+    def make_item(data):
+        pass
+
+    with app.test_context(path="/", method="POST"):
+        assert validator.validate([{"foo": "1"}, {"foo": "2"}]) == \
+            [{"foo": 1}, {"foo": 2}]
+
+def test_patch_can_only_remove_optional_fields(app):
+    validator = Validator(app)
+
+    @validator.enforce(age=int)
+    @validator.restrict('*name', 'age', 'state')
+    @app.route("/")
+    def item():
+        pass
+
+    @item.model("patch")
+    def patch_item(changes):
+        pass
+
+    with app.test_context(path="/", method="PATCH"):
+        assert validator.validate({"age": "33"}) == {"age": 33}
+        assert validator.validate({"age": None, "state": None}) == \
+            {"age": None, "state": None}
+
+        with pytest.raises(MissingFields):
+            validator.validate({"name": None})